@@ -1,26 +1,75 @@
 # agents.py
 
-from sheets import log_lead, check_existing_lead
+from sheets import log_lead, check_existing_lead, start_lead_sync
 from prompts import (
     SYSTEM_PROMPT,
     GREETING_PROMPT,
     FOLLOW_UP_PROMPT,
     COMPLETION_PROMPT,
-    ERROR_PROMPT
+    ERROR_PROMPT,
+    AVAILABLE_REPLY,
+    BUSY_REPLY,
+    UNSURE_REPLY,
+    SCHEDULING_FALLBACK,
+    COMPLETION_FALLBACK,
+    SAVE_FAILED_REPLY,
+    ANYTHING_ELSE_FALLBACK,
+    FIELD_QUESTIONS,
+    transcript_extraction_prompt,
+    lead_type_prompt
 )
 
+from context import ConversationContext, format_message
+from llm_cache import get_llm_cache
+from rate_limit import rate_limited, LLM_RATE_LIMIT
+import tracing
+from fast_extract import fast_extract
+from classifiers import classify_lead_type, classify_interest, tokenize
+from prompt_render import render_fields, render_missing, render_prompt
+import prompt_render
+import metering
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, AIMessage, messages_from_dict, messages_to_dict
+from langchain_core.messages import HumanMessage, AIMessage
+import os
 import uuid
+import asyncio
 from datetime import datetime, timedelta
 import json
 import re
 import random
 
+# One structured LLM call per turn (extraction + interest level + reply).
+# Set AGENT_SINGLE_CALL=false to use the original multi-call path.
+SINGLE_CALL_TURNS = os.getenv("AGENT_SINGLE_CALL", "true").lower() in ("1", "true", "yes")
+
+# Rule-based extraction tier that answers short, unambiguous messages without the LLM
+FAST_PATH_EXTRACTION = os.getenv("AGENT_FAST_PATH", "true").lower() in ("1", "true", "yes")
+
+# Version of the to_state() format; bump when the layout changes
+STATE_VERSION = 1
+
+def create_llm():
+    """Create the chat model used by the agent"""
+    # With the shared rate limiter on, it does the retrying (with backoff and pacing)
+    return ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.7, max_retries=1 if LLM_RATE_LIMIT else 6)
+
 class RealEstateAgent:
-    def __init__(self, initial_phone=None):
-        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.7)
+    def __init__(self, initial_phone=None, single_call=None, llm=None):
+        # Pass llm to share one client (and its connection pool) across agents.
+        # Calls are paced by the process-wide rate limiter.
+        self.llm = rate_limited(llm or create_llm())
+        # Shared memo of deterministic LLM answers (None when LLM_CACHE_BACKEND=off)
+        self.llm_cache = get_llm_cache()
+        self.single_call = SINGLE_CALL_TURNS if single_call is None else single_call
+        self.fast_path = FAST_PATH_EXTRACTION
+        self.llm_calls_avoided = 0  # LLM calls skipped thanks to the rule-based tier
+        self.meter = metering.Meter()  # Tokens, TTS/STT and Sheets usage of this call
         self.memory = []  # Simple list to store messages
+        # Bounded, cached transcript (recent messages + rolling summary) for prompts
+        self.context = ConversationContext(
+            invoke=lambda prompt: self._invoke(prompt, "summary"),
+            ainvoke=lambda prompt: self._ainvoke(prompt, "summary")
+        )
         self.company_name = "Elite Properties"  # You can change this to your company name
         self.required_fields = {
             "UID": None,  # Will be auto-generated
@@ -60,6 +109,54 @@ class RealEstateAgent:
         self.consecutive_misses = 0  # Track how many times we've asked without getting an answer
         self.skipped_fields = {"Interest Level", "Use Case", "Competitors", "Call Outcome", "Notes", "Phone"}  # Added Phone to skipped fields
         self.existing_lead_checked = False  # Track if we've checked for an existing lead
+        self.planned_questions = {}  # Question wording already chosen per field, so pre-synthesized audio matches
+        self.defer_logging = False  # Set on throwaway copies: completing the call only marks the lead as due
+        self.log_pending = False  # The call completed while logging was deferred
+
+    def to_state(self):
+        """
+        Compact, JSON-serializable snapshot of the conversation so any worker can
+        resume it with from_state(). Only filled fields are stored and messages
+        are [role, content] pairs ("h" for the user, "a" for the agent).
+        """
+        return {
+            "v": STATE_VERSION,
+            "fields": {field: value for field, value in self.required_fields.items() if value is not None},
+            "memory": [["h" if isinstance(msg, HumanMessage) else "a", msg.content] for msg in self.memory],
+            "lead_type": self.lead_type,
+            "started": self.conversation_started,
+            "in_progress": self.call_in_progress,
+            "last_field": self.last_question_field,
+            "misses": self.consecutive_misses,
+            "skipped": sorted(self.skipped_fields),
+            "lead_checked": self.existing_lead_checked,
+            "avoided": self.llm_calls_avoided,
+            "planned": self.planned_questions,
+            "meter": self.meter.to_state(),
+            "context": self.context.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state, llm=None, single_call=None):
+        """Rebuild an agent from a to_state() snapshot"""
+        if state.get("v") != STATE_VERSION:
+            raise ValueError(f"Unsupported agent state version: {state.get('v')}")
+        agent = cls(single_call=single_call, llm=llm)
+        agent.required_fields.update(state["fields"])
+        agent.memory = [HumanMessage(content=content) if role == "h" else AIMessage(content=content)
+                        for role, content in state["memory"]]
+        agent.lead_type = state["lead_type"]
+        agent.conversation_started = state["started"]
+        agent.call_in_progress = state["in_progress"]
+        agent.last_question_field = state["last_field"]
+        agent.consecutive_misses = state["misses"]
+        agent.skipped_fields = set(state["skipped"])
+        agent.existing_lead_checked = state["lead_checked"]
+        agent.llm_calls_avoided = state.get("avoided", 0)
+        agent.planned_questions = dict(state.get("planned") or {})
+        agent.meter.load_state(state.get("meter") or {})
+        agent.context.load_state(state.get("context") or {})
+        return agent
 
     def generate_uid(self):
         return str(uuid.uuid4())
@@ -72,159 +169,353 @@ class RealEstateAgent:
         if not self.required_fields["Last Contact Date"]:
             self.required_fields["Last Contact Date"] = now
 
-    def determine_lead_type(self, message):
-        """Determine if this is a residential or commercial inquiry"""
-        residential_keywords = ["house", "home", "apartment", "condo", "residential", "live", "family"]
-        commercial_keywords = ["office", "business", "company", "commercial", "retail", "warehouse", "industrial"]
-        
-        message_lower = message.lower()
-        residential_matches = sum(1 for word in residential_keywords if word in message_lower)
-        commercial_matches = sum(1 for word in commercial_keywords if word in message_lower)
+    def _classify_lead_type(self, message):
+        """
+        Local lead type classification. Returns (lead_type, prompt): prompt is
+        the LLM prompt to settle it when the classifier is unsure, else None.
+        """
+        lead_type, confidence, confident = classify_lead_type(message)
+        if confident or lead_type is None:
+            return lead_type, None
         
-        if residential_matches > commercial_matches:
-            return "residential"
-        elif commercial_matches > residential_matches:
+        # Mixed signals ("a home office"): let the LLM settle it
+        tracing.debug(f"Lead type unclear ({lead_type}, {confidence:.2f}), asking the LLM")
+        return None, lead_type_prompt.format(message=message)
+
+    def _apply_lead_type_response(self, response):
+        answer = self._response_text(response).strip().lower()
+        if "commercial" in answer:
             return "commercial"
+        if "residential" in answer:
+            return "residential"
         return None
 
+    def determine_lead_type(self, message):
+        """Determine if this is a residential or commercial inquiry"""
+        lead_type, prompt = self._classify_lead_type(message)
+        if prompt is None:
+            return lead_type
+        try:
+            return self._apply_lead_type_response(self._invoke(prompt, "classification"))
+        except Exception as e:
+            print(f"Error classifying lead type: {e}")
+            return None
+
+    async def adetermine_lead_type(self, message):
+        """Async determine_lead_type: the LLM fallback doesn't block the event loop"""
+        lead_type, prompt = self._classify_lead_type(message)
+        if prompt is None:
+            return lead_type
+        try:
+            return self._apply_lead_type_response(await self._ainvoke(prompt, "classification"))
+        except Exception as e:
+            print(f"Error classifying lead type: {e}")
+            return None
+
     def get_remaining_fields(self):
         """Get fields that still need to be filled"""
         return [field for field, value in self.required_fields.items() 
                 if value is None and not field.endswith("(auto-generated)")]
 
-    def extract_info(self, message):
-        """Extract information from the user's message"""
+    def _detect_lead_type(self, message):
+        """Set the lead type (and blank out fields that don't apply) if the message reveals it"""
+        if self.lead_type or not self.call_in_progress:
+            return False
+        return self._set_lead_type(self.determine_lead_type(message))
+
+    async def _adetect_lead_type(self, message):
+        """Async counterpart of _detect_lead_type"""
+        if self.lead_type or not self.call_in_progress:
+            return False
+        return self._set_lead_type(await self.adetermine_lead_type(message))
+
+    def _set_lead_type(self, lead_type):
+        if not lead_type:
+            return False
+        
+        self.lead_type = lead_type
+        tracing.debug(f"Set lead type to: {lead_type}")
+        if lead_type == "residential":
+            # Set appropriate fields for residential
+            business_fields = ["Company", "Position", "Industry", "Company Size"]
+            for field in business_fields:
+                self.required_fields[field] = "-"
+        else:
+            # Set appropriate fields for commercial
+            residential_fields = ["Use Case"]
+            for field in residential_fields:
+                self.required_fields[field] = "-"
+        return True
+
+    def _apply_direct_patterns(self, message):
+        """Fill email and phone from unambiguous patterns in the message"""
         extracted_something = False
-        try:
-            # Print for debugging
-            print(f"Extracting from message: {message}")
-            
-            # Update timestamps
-            self.update_timestamps()
-            
-            # Property type detection
-            if not self.lead_type and self.call_in_progress:
-                lead_type = self.determine_lead_type(message)
-                if lead_type:
-                    self.lead_type = lead_type
-                    print(f"Set lead type to: {lead_type}")
-                    if lead_type == "residential":
-                        # Set appropriate fields for residential
-                        business_fields = ["Company", "Position", "Industry", "Company Size"]
-                        for field in business_fields:
-                            self.required_fields[field] = "-"
-                    else:
-                        # Set appropriate fields for commercial
-                        residential_fields = ["Use Case"]
-                        for field in residential_fields:
-                            self.required_fields[field] = "-"
-                    
-                    extracted_something = True
-                    
-                    return True
-            
-            # Check for direct patterns for unambiguous fields
-            email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', message)
-            if email_match and self.required_fields["Email"] is None:
-                self.required_fields["Email"] = email_match.group(1)
-                print(f"Extracted email: {email_match.group(1)}")
-                extracted_something = True
-                
-            # Check for phone patterns
-            phone_pattern = r'(\+?\d{7,}|\d{3,}[-\s]?\d{3,}[-\s]?\d{3,}|\d{10,})'
-            phone_match = re.search(phone_pattern, message)
-            if phone_match and self.required_fields["Phone"] is None:
-                self.required_fields["Phone"] = phone_match.group(1)
-                print(f"Extracted phone: {phone_match.group(1)}")
-                extracted_something = True
-                
-            # Use LLM for contextual extraction - let the LLM decide what fields match
-            extraction_prompt = f"""Extract relevant information from this message: "{message}"
-            
-            Current information so far: {self.required_fields}
-            Lead type: {self.lead_type or "Not determined yet"}
-            Last question field: {self.last_question_field or "None"}
-            
-            IMPORTANT:
-            1. For "Name", only extract if it's clearly a person's name, not a property type or other preference.
-            2. For "Location", extract any mentioned locations for property interest.
-            3. For "Budget Range", extract any budget information.
-            4. For "Use Case", identify how they plan to use the property (e.g., primary residence, investment, office space, etc.)
-            5. For "Competitors", identify any competing properties or agencies they mention.
-            6. For "Property Type", extract what type of property they're looking for (e.g., house, apartment, condo, office space, retail, etc.)
-            7. For "Property Size", extract any size requirements (e.g., square footage, number of bedrooms/bathrooms, etc.)
-            8. For "Timeline", extract how soon they want to buy/sell/move (e.g., immediately, within 3 months, next year, etc.)
-            9. If they mention any dates for availability or viewings, capture this as "Availability".
-            10. If the last question was about a specific field, focus on finding information for that field.
-            
-            Return a JSON object with only the fields that have new information. For example:
-            {{
-                "Name": "John Smith",
-                "Location": "Downtown",
-                "Budget Range": "500k-700k",
-                "Use Case": "Primary residence for family of four",
-                "Property Type": "Single-family home",
-                "Property Size": "3 bedrooms, at least 2000 sq ft",
-                "Timeline": "Looking to move within 2 months"
-            }}
-            
-            Only include fields that are explicitly mentioned or can be reasonably inferred from the message.
-            If no new information is found, return an empty object {{}}."""
-            
-            print("\n=== DEBUG: Starting LLM extraction ===")
-            print(f"Message to extract from: {message}")
-            
-            # Use invoke instead of predict
-            response = self.llm.invoke(extraction_prompt)
+        email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', message)
+        if email_match and self.required_fields["Email"] is None:
+            self.required_fields["Email"] = email_match.group(1)
+            tracing.debug(f"Extracted email: {email_match.group(1)}")
+            extracted_something = True
             
-            # Get the content from the response
-            if hasattr(response, 'content'):
-                content = response.content
+        # Check for phone patterns
+        phone_pattern = r'(\+?\d{7,}|\d{3,}[-\s]?\d{3,}[-\s]?\d{3,}|\d{10,})'
+        phone_match = re.search(phone_pattern, message)
+        if phone_match and self.required_fields["Phone"] is None:
+            self.required_fields["Phone"] = phone_match.group(1)
+            tracing.debug(f"Extracted phone: {phone_match.group(1)}")
+            extracted_something = True
+        return extracted_something
+
+    def _apply_extracted_fields(self, info_dict):
+        """Copy fields from an LLM extraction result into required_fields"""
+        extracted_something = False
+        if info_dict and isinstance(info_dict, dict):
+            tracing.debug(f"LLM extraction found: {info_dict}")
+            for field, value in info_dict.items():
+                if field in self.required_fields and value:
+                    self.required_fields[field] = value
+                    tracing.debug(f"Updated {field} = {value}")
+                    extracted_something = True
+                else:
+                    tracing.debug(f"Skipped field {field} because: {'field not in required_fields' if field not in self.required_fields else 'value is empty'}")
+        return extracted_something
+
+    def _parse_json_content(self, response):
+        """Get the text of an LLM response and parse it as JSON, stripping markdown fences"""
+        content = response.content if hasattr(response, 'content') else str(response)
+        content = content.strip()
+        if content.startswith('```'):
+            # Remove the first line (```json or similar) and last line (```)
+            content = '\n'.join(content.split('\n')[1:-1])
+        return json.loads(content)
+
+    def _invoke(self, prompt, purpose):
+        """Run a blocking LLM call. purpose tags what the call is for (extraction, interest, ...)"""
+        prompt = render_prompt(prompt, purpose)
+        with tracing.span(f"llm.{purpose}"):
+            if self.llm_cache:
+                response = self.llm_cache.invoke(self.llm, prompt, purpose)
             else:
-                content = str(response)
+                response = self.llm.invoke(prompt)
+        metering.record_llm(purpose, prompt, response, self.meter)
+        return response
+
+    async def _ainvoke(self, prompt, purpose):
+        """Async counterpart of _invoke"""
+        prompt = render_prompt(prompt, purpose)
+        with tracing.span(f"llm.{purpose}"):
+            if self.llm_cache:
+                response = await self.llm_cache.ainvoke(self.llm, prompt, purpose)
+            else:
+                response = await self.llm.ainvoke(prompt)
+        metering.record_llm(purpose, prompt, response, self.meter)
+        return response
+
+    def _transcript(self):
+        """Conversation transcript for prompts, rendered once per turn"""
+        return self.context.render(self.memory)
+
+    def _response_text(self, response):
+        """Get the text content of an LLM response"""
+        return response.content if hasattr(response, 'content') else str(response)
+
+    def _prepare_extraction(self, message, lead_type_set=None):
+        """
+        Run the local extraction steps and build the LLM extraction prompt.
+        Returns (prompt, extracted_something); prompt is None when the
+        rule-based tier accounted for the whole message, which ends extraction
+        for this turn. Async callers detect the lead type themselves and pass
+        the result as lead_type_set.
+        """
+        # Print for debugging
+        tracing.debug(f"Extracting from message: {message}")
+        
+        # Update timestamps
+        self.update_timestamps()
+        
+        # Property type detection. The message that reveals it usually says what
+        # they're after too ("a house for my family"), so extraction goes on
+        if lead_type_set is None:
+            lead_type_set = self._detect_lead_type(message)
+        
+        # Rule-based tier: short, unambiguous answers skip the LLM entirely
+        if self._apply_fast_extraction(message):
+            # Only extraction is saved; interest level still runs on the next LLM turn
+            self.llm_calls_avoided += 1
+            return None, True
+        
+        # Check for direct patterns for unambiguous fields
+        extracted_something = self._apply_direct_patterns(message) or lead_type_set
+            
+        # Use LLM for contextual extraction - let the LLM decide what fields match
+        extraction_prompt = self._build_extraction_prompt(message)
+        
+        tracing.debug("\n=== DEBUG: Starting LLM extraction ===")
+        tracing.debug(f"Message to extract from: {message}")
+        return extraction_prompt, extracted_something
+
+    def _build_extraction_prompt(self, message):
+        """LLM extraction prompt: instructions first, then the lead state and the message"""
+        if not prompt_render.COMPACT_PROMPTS:
+            return self._build_original_extraction_prompt(message)
+        return f"""Extract relevant information from the caller's message below.
+        
+        IMPORTANT:
+        1. For "Name", only extract if it's clearly a person's name, not a property type or other preference.
+        2. For "Location", extract any mentioned locations for property interest.
+        3. For "Budget Range", extract any budget information.
+        4. For "Use Case", identify how they plan to use the property (e.g., primary residence, investment, office space, etc.)
+        5. For "Competitors", identify any competing properties or agencies they mention.
+        6. For "Property Type", extract what type of property they're looking for (e.g., house, apartment, condo, office space, retail, etc.)
+        7. For "Property Size", extract any size requirements (e.g., square footage, number of bedrooms/bathrooms, etc.)
+        8. For "Timeline", extract how soon they want to buy/sell/move (e.g., immediately, within 3 months, next year, etc.)
+        9. If they mention any dates for availability or viewings, capture this as "Availability".
+        10. If the last question was about a specific field, focus on finding information for that field.
+        
+        Return a JSON object with only the fields that have new information. For example:
+        {{
+            "Name": "John Smith",
+            "Location": "Downtown",
+            "Budget Range": "500k-700k",
+            "Use Case": "Primary residence for family of four",
+            "Property Type": "Single-family home",
+            "Property Size": "3 bedrooms, at least 2000 sq ft",
+            "Timeline": "Looking to move within 2 months"
+        }}
+        
+        Only include fields that are explicitly mentioned or can be reasonably inferred from the message.
+        If no new information is found, return an empty object {{}}.
+        
+        Current information so far:
+        {render_fields(self.required_fields)}
+        Lead type: {self.lead_type or "Not determined yet"}
+        Last question field: {self.last_question_field or "None"}
+        
+        Message: "{message}\""""
+
+    def _build_original_extraction_prompt(self, message):
+        """The extraction prompt as it was before compact rendering (AGENT_COMPACT_PROMPTS=false)"""
+        return f"""Extract relevant information from this message: "{message}"
+        
+        Current information so far: {self.required_fields}
+        Lead type: {self.lead_type or "Not determined yet"}
+        Last question field: {self.last_question_field or "None"}
+        
+        IMPORTANT:
+        1. For "Name", only extract if it's clearly a person's name, not a property type or other preference.
+        2. For "Location", extract any mentioned locations for property interest.
+        3. For "Budget Range", extract any budget information.
+        4. For "Use Case", identify how they plan to use the property (e.g., primary residence, investment, office space, etc.)
+        5. For "Competitors", identify any competing properties or agencies they mention.
+        6. For "Property Type", extract what type of property they're looking for (e.g., house, apartment, condo, office space, retail, etc.)
+        7. For "Property Size", extract any size requirements (e.g., square footage, number of bedrooms/bathrooms, etc.)
+        8. For "Timeline", extract how soon they want to buy/sell/move (e.g., immediately, within 3 months, next year, etc.)
+        9. If they mention any dates for availability or viewings, capture this as "Availability".
+        10. If the last question was about a specific field, focus on finding information for that field.
+        
+        Return a JSON object with only the fields that have new information. For example:
+        {{
+            "Name": "John Smith",
+            "Location": "Downtown",
+            "Budget Range": "500k-700k",
+            "Use Case": "Primary residence for family of four",
+            "Property Type": "Single-family home",
+            "Property Size": "3 bedrooms, at least 2000 sq ft",
+            "Timeline": "Looking to move within 2 months"
+        }}
+        
+        Only include fields that are explicitly mentioned or can be reasonably inferred from the message.
+        If no new information is found, return an empty object {{}}."""
+
+    def _apply_extraction_response(self, response, message):
+        """Apply the LLM extraction response to required_fields"""
+        extracted_something = False
+        
+        # Get the content from the response
+        content = self._response_text(response)
+        tracing.debug(f"Raw LLM response: {content}")
+        
+        try:
+            # Strip markdown formatting if present and parse as JSON
+            info_dict = self._parse_json_content(response)
+            tracing.debug(f"Parsed JSON: {info_dict}")
             
-            print(f"Raw LLM response: {content}")
+            # Update fields with new information from LLM
+            if self._apply_extracted_fields(info_dict):
+                extracted_something = True
+        except json.JSONDecodeError as e:
+            print(f"Failed to parse JSON: {content}")
+            print(f"JSON Error: {str(e)}")
             
-            try:
-                # Strip markdown formatting if present
-                if content.startswith('```'):
-                    # Remove the first line (```json or similar) and last line (```)
-                    content = '\n'.join(content.split('\n')[1:-1])
-                
-                # Try to parse as JSON
-                info_dict = json.loads(content)
-                print(f"Parsed JSON: {info_dict}")
-                
-                # Update fields with new information from LLM
-                if info_dict and isinstance(info_dict, dict):
-                    print(f"LLM extraction found: {info_dict}")
-                    for field, value in info_dict.items():
-                        if field in self.required_fields and value:
+            # Only use direct answer extraction if LLM fails and we don't have a lead type yet
+            if not self.lead_type:
+                direct_answers = self._check_direct_answers(message)
+                if direct_answers:
+                    tracing.debug(f"Direct answers found: {direct_answers}")
+                    for field, value in direct_answers.items():
+                        if value and field in self.required_fields:
                             self.required_fields[field] = value
-                            print(f"Updated {field} = {value}")
+                            tracing.debug(f"Updated {field} = {value}")
                             extracted_something = True
-                        else:
-                            print(f"Skipped field {field} because: {'field not in required_fields' if field not in self.required_fields else 'value is empty'}")
-            except json.JSONDecodeError as e:
-                print(f"Failed to parse JSON: {content}")
-                print(f"JSON Error: {str(e)}")
-                
-                # Only use direct answer extraction if LLM fails and we don't have a lead type yet
-                if not self.lead_type:
-                    direct_answers = self._check_direct_answers(message)
-                    if direct_answers:
-                        print(f"Direct answers found: {direct_answers}")
-                        for field, value in direct_answers.items():
-                            if value and field in self.required_fields:
-                                self.required_fields[field] = value
-                                print(f"Updated {field} = {value}")
-                                extracted_something = True
+        return extracted_something
+
+    def _needs_interest_level(self):
+        """Determine interest level once we have enough context"""
+        return len(self.memory) >= 3 and self.required_fields["Interest Level"] is None
+
+    def _classify_interest_locally(self):
+        """Set the interest level from the local classifier if it's confident; returns True if set"""
+        user_text = " ".join(msg.content for msg in self.memory if isinstance(msg, HumanMessage))
+        interest_level, confidence, confident = classify_interest(user_text)
+        if not confident:
+            return False
+        self.required_fields["Interest Level"] = interest_level
+        tracing.debug(f"Classified interest level locally: {interest_level} ({confidence:.2f})")
+        return True
+
+    def extract_info(self, message):
+        """Extract information from the user's message"""
+        try:
+            extraction_prompt, extracted_something = self._prepare_extraction(message)
+            if extraction_prompt is None:
+                return True
+            
+            response = self._invoke(extraction_prompt, "extraction")
+            if self._apply_extraction_response(response, message):
+                extracted_something = True
             
             # Determine interest level if we have enough context
-            if len(self.memory) >= 3 and self.required_fields["Interest Level"] is None:
+            if self._needs_interest_level():
                 self._determine_interest_level()
                 
-            print(f"Current required fields: {self.required_fields}")
+            tracing.debug(f"Current required fields: {self.required_fields}")
+            return extracted_something
+        except Exception as e:
+            print(f"Error extracting information: {e}")
+            return False
+
+    async def aextract_info(self, message):
+        """Async extract_info: the extraction and interest-level calls run concurrently"""
+        try:
+            lead_type_set = await self._adetect_lead_type(message)
+            extraction_prompt, extracted_something = self._prepare_extraction(message, lead_type_set)
+            if extraction_prompt is None:
+                return True
+            
+            interest_prompt = self._build_interest_prompt() if self._needs_interest_level() else None
+            calls = [self._ainvoke(extraction_prompt, "extraction")]
+            if interest_prompt:
+                calls.append(self._ainvoke(interest_prompt, "interest"))
+            results = await asyncio.gather(*calls, return_exceptions=True)
+            
+            if interest_prompt:
+                self._apply_interest_result(results[1])
+            
+            if isinstance(results[0], Exception):
+                raise results[0]
+            if self._apply_extraction_response(results[0], message):
+                extracted_something = True
+                
+            tracing.debug(f"Current required fields: {self.required_fields}")
             return extracted_something
         except Exception as e:
             print(f"Error extracting information: {e}")
@@ -283,10 +574,214 @@ class RealEstateAgent:
             
         return info
 
-    def process_message(self, message):
+    def _prepare_combined_turn(self, message, lead_type_checked=False):
+        """Run the local extraction steps and build the single-call turn prompt"""
+        tracing.debug(f"Extracting from message (single call): {message}")
+        self.update_timestamps()
+        
+        # Cheap local extraction first so the LLM sees the freshest state
+        if not lead_type_checked:
+            self._detect_lead_type(message)
+        handled = self._apply_fast_extraction(message)
+        if not handled:
+            self._apply_direct_patterns(message)
+        
+        remaining_fields = [f for f in self.get_remaining_fields() if f not in self.skipped_fields]
+        if self._needs_interest_level() and not self._apply_initial_refusal():
+            self._classify_interest_locally()
+        estimate_interest = self._needs_interest_level()
+        if handled:
+            # The rules accounted for the message - no LLM call this turn
+            return None, remaining_fields, False
+        
+        turn_prompt = self._build_turn_prompt(message, remaining_fields, estimate_interest)
+        return turn_prompt, remaining_fields, estimate_interest
+
+    def _interest_step(self, estimate_interest):
+        if not estimate_interest:
+            return "null (not needed yet)."
+        return ("Hot, Warm or Cold. Hot: any timeline within the year, eagerness/urgency, or multiple questions about properties. "
+                "Warm: some interest or engagement beyond basic responses, and the default when unsure. "
+                "Cold: said no at the start of the call or is not interested.")
+
+    def _build_turn_prompt(self, message, remaining_fields, estimate_interest):
+        """Single-call turn prompt: instructions first, then the transcript, lead state and message"""
+        if not prompt_render.COMPACT_PROMPTS:
+            return self._build_original_turn_prompt(message, remaining_fields, estimate_interest)
+        return f"""You are a real estate agent on a call. Process the caller's latest message and reply in ONE step.
+        
+        Step 1 - "extracted": the fields with new information from the latest message.
+        - For "Name", only extract if it's clearly a person's name, not a property type or other preference.
+        - "Location", "Budget Range", "Use Case", "Competitors", "Property Type", "Property Size", "Timeline" and "Availability" as mentioned.
+        - If the last question was about a specific field, focus on finding information for that field.
+        - Only include fields that are explicitly mentioned or can be reasonably inferred. Use {{}} if nothing is new.
+        
+        Step 2 - "interest_level": {self._interest_step(estimate_interest)}
+        
+        Step 3 - "reply": your next line in the conversation.
+        - Be concise, warm and professional but brief; don't feel like a template or form
+        - Only acknowledge what they just said if it's particularly relevant
+        - Ask about ONE remaining field that is still missing after Step 1, preferably the first one listed
+        - Avoid repeating information they've already provided or starting with "I understand" / "Thanks for sharing"
+        - "reply_field": the remaining field your reply asks about
+        
+        Return only a JSON object:
+        {{
+            "extracted": {{"Location": "Downtown"}},
+            "interest_level": "Warm",
+            "reply": "Great, and what budget range are you working with?",
+            "reply_field": "Budget Range"
+        }}
+        
+        Conversation history:
+        {self._transcript()}
+        
+        Current information so far:
+        {render_fields(self.required_fields)}
+        Lead type: {self.lead_type or "Not determined yet"}
+        Last question field: {self.last_question_field or "None"}
+        Remaining fields to gather: {render_missing(remaining_fields)}
+        
+        Caller's latest message: "{message}\""""
+
+    def _build_original_turn_prompt(self, message, remaining_fields, estimate_interest):
+        """The turn prompt as it was before compact rendering (AGENT_COMPACT_PROMPTS=false)"""
+        return f"""You are a real estate agent on a call. Process the caller's latest message and reply in ONE step.
+
+        Caller's latest message: "{message}"
+        
+        Conversation history:
+        {self._transcript()}
+        
+        Current information so far: {self.required_fields}
+        Lead type: {self.lead_type or "Not determined yet"}
+        Last question field: {self.last_question_field or "None"}
+        Remaining fields to gather: {remaining_fields}
+        
+        Step 1 - "extracted": the fields with new information from the latest message.
+        - For "Name", only extract if it's clearly a person's name, not a property type or other preference.
+        - "Location", "Budget Range", "Use Case", "Competitors", "Property Type", "Property Size", "Timeline" and "Availability" as mentioned.
+        - If the last question was about a specific field, focus on finding information for that field.
+        - Only include fields that are explicitly mentioned or can be reasonably inferred. Use {{}} if nothing is new.
+        
+        Step 2 - "interest_level": {self._interest_step(estimate_interest)}
+        
+        Step 3 - "reply": your next line in the conversation.
+        - Be concise, warm and professional but brief; don't feel like a template or form
+        - Only acknowledge what they just said if it's particularly relevant
+        - Ask about ONE remaining field that is still missing after Step 1, preferably {remaining_fields[0] if remaining_fields else 'any remaining details'}
+        - Avoid repeating information they've already provided or starting with "I understand" / "Thanks for sharing"
+        - "reply_field": the remaining field your reply asks about
+        
+        Return only a JSON object:
+        {{
+            "extracted": {{"Location": "Downtown"}},
+            "interest_level": "Warm",
+            "reply": "Great, and what budget range are you working with?",
+            "reply_field": "Budget Range"
+        }}"""
+
+    def _apply_combined_turn_response(self, response, remaining_fields, estimate_interest):
+        """Apply a single-call turn response and return the reply"""
+        result = self._parse_json_content(response)
+        if not isinstance(result, dict) or not result.get("reply"):
+            raise ValueError(f"Unexpected single-call response: {result}")
+        
+        self._apply_extracted_fields(result.get("extracted"))
+        
+        if estimate_interest:
+            # Missing or unclear answers default to Warm, as in the multi-call path
+            self.required_fields["Interest Level"] = self._normalize_interest_level(result.get("interest_level"))
+            tracing.debug(f"Determined interest level: {self.required_fields['Interest Level']}")
+        
+        reply_field = result.get("reply_field")
+        if reply_field in self.required_fields:
+            self.last_question_field = reply_field
+        else:
+            self._track_question_field(result["reply"], remaining_fields)
+        
+        tracing.debug(f"Current required fields: {self.required_fields}")
+        return result["reply"]
+
+    def extract_info_and_reply(self, message):
+        """
+        Single-call turn: one LLM call returns the extracted fields, an interest
+        level estimate and the next thing to say. Returns the reply, or None if
+        the call failed (the caller then falls back to the multi-call path).
+        """
+        turn_prompt, remaining_fields, estimate_interest = self._prepare_combined_turn(message)
+        if turn_prompt is None:
+            return self._canned_reply(remaining_fields)
+        try:
+            response = self._invoke(turn_prompt, "turn")
+            return self._apply_combined_turn_response(response, remaining_fields, estimate_interest)
+        except Exception as e:
+            print(f"Error in single-call turn, falling back to multi-call: {e}")
+            return None
+
+    async def aextract_info_and_reply(self, message):
+        """Async counterpart of extract_info_and_reply"""
+        await self._adetect_lead_type(message)
+        turn_prompt, remaining_fields, estimate_interest = self._prepare_combined_turn(message, lead_type_checked=True)
+        if turn_prompt is None:
+            return self._canned_reply(remaining_fields)
+        try:
+            response = await self._ainvoke(turn_prompt, "turn")
+            return self._apply_combined_turn_response(response, remaining_fields, estimate_interest)
+        except Exception as e:
+            print(f"Error in single-call turn, falling back to multi-call: {e}")
+            return None
+
+    def _apply_fast_extraction(self, message):
+        """
+        Rule-based extraction tier. If the rules account for the whole message,
+        apply the fields and return True so the LLM extraction can be skipped.
+        """
+        if not self.fast_path:
+            return False
+        fields, complete = fast_extract(message, self.last_question_field, self.required_fields["Name"] is not None)
+        if not complete:
+            return False
+        for field, value in fields.items():
+            # The field we asked about may be corrected; others only fill gaps
+            if field in self.required_fields and (self.required_fields[field] is None or field == self.last_question_field):
+                self.required_fields[field] = value
+                tracing.debug(f"Fast-path extracted {field} = {value}")
+        tracing.debug(f"Fast path handled message, skipping LLM extraction: {message}")
+        return True
+
+    def _canned_reply(self, remaining_fields):
+        """Reply with the stock question for the next field (no LLM call)"""
+        self.llm_calls_avoided += 1
+        tracing.debug(f"Current required fields: {self.required_fields}")
+        if remaining_fields:
+            next_field = remaining_fields[0]
+            self.last_question_field = next_field
+            return self._get_question_for_field(next_field)
+        return ANYTHING_ELSE_FALLBACK
+
+    def _track_question_field(self, response, remaining_fields):
+        """Update the last question field based on the response"""
+        for field in remaining_fields:
+            if field.lower() in response.lower():
+                self.last_question_field = field
+                break
+
+    def _reply(self, response):
+        """Record an agent reply in the conversation history and return it"""
+        self.memory.append(AIMessage(content=response))
+        return response
+
+    def _handle_call_opening(self, message):
+        """
+        Handle the greeting and the "do you have a moment" exchange.
+        Returns the reply, or None once the call is in progress.
+        """
         if not self.conversation_started:
             self.required_fields["UID"] = self.generate_uid()
             self.conversation_started = True
+            # Lead lookups later in the call read the local store; fill it from the sheet meanwhile
+            start_lead_sync()
             return GREETING_PROMPT.format(company_name=self.company_name)
 
         # Update conversation history
@@ -296,155 +791,340 @@ class RealEstateAgent:
         if not self.call_in_progress:
             if any(word in message.lower() for word in ["yes", "sure", "okay", "fine", "go ahead"]):
                 self.call_in_progress = True
-                response = "Great! I'd love to understand what kind of property you're looking for. Are you interested in residential or commercial property?"
-                self.memory.append(AIMessage(content=response))
-                return response
+                return self._reply(AVAILABLE_REPLY)
             elif any(word in message.lower() for word in ["no", "busy", "later", "not now"]):
-                response = "I completely understand. We all have busy schedules. Would there be a better time for us to chat? I'm here whenever works best for you."
-                self.memory.append(AIMessage(content=response))
-                return response
+                return self._reply(BUSY_REPLY)
             else:
-                response = "I hope I didn't catch you at a bad time. Would you like to chat about your property needs now, or would you prefer I reach out later?"
-                self.memory.append(AIMessage(content=response))
-                return response
+                return self._reply(UNSURE_REPLY)
+        return None
 
-        # Extract information from the user's message
-        extracted = self.extract_info(message)
+    def _remaining_fields_after_extraction(self):
+        """Update timestamps and get the fields that are still missing"""
+        # Update timestamps
+        self.update_timestamps()
+        
+        # Get remaining fields to gather
+        return [f for f in self.get_remaining_fields() if f not in self.skipped_fields]
+
+    def _has_essential_fields(self, remaining_fields):
+        """Check if we have all essential fields"""
+        essential_fields = ["Name", "Email", "Phone", "Location", "Budget Range", "Property Type", "Property Size", "Timeline"]
+        essential_remaining = [f for f in remaining_fields if f in essential_fields]
+        return not essential_remaining
+
+    def process_message(self, message):
+        with tracing.turn(self._turn_label()), metering.session(self.meter):
+            return self._process_turn(message)
+
+    async def aprocess_message(self, message):
+        """
+        Async process_message built on ainvoke. Independent LLM calls in a turn
+        run concurrently, and Sheets calls run in a worker thread.
+        """
+        with tracing.turn(self._turn_label()), metering.session(self.meter):
+            return await self._aprocess_turn(message)
+
+    def usage(self):
+        """LLM tokens by purpose, TTS characters, STT seconds, Sheets calls and estimated cost of this call so far"""
+        return self.meter.usage()
+
+    def dump_usage(self):
+        """Log this call's usage (see metering.dump); call once when the call ends"""
+        return metering.dump(self.meter, self.required_fields["UID"] or "call")
+
+    def _turn_label(self):
+        return f"Turn {len(self.memory) // 2 + 1} ({self.required_fields['UID'] or 'new call'})"
+
+    def _process_turn(self, message):
+        opening = self._handle_call_opening(message)
+        if opening is not None:
+            return opening
+
+        # Extract information from the user's message - in single-call mode
+        # the same call also drafts the reply
+        planned_response = None
+        if self.single_call:
+            planned_response = self.extract_info_and_reply(message)
+        if planned_response is None:
+            extracted = self.extract_info(message)
 
         # Check for existing lead once we have an email
         if not self.existing_lead_checked and self.required_fields["Email"]:
             self._check_for_existing_lead()
             self.existing_lead_checked = True
 
-        # Update timestamps
-        self.update_timestamps()
+        remaining_fields = self._remaining_fields_after_extraction()
         
-        # Get remaining fields to gather
-        remaining_fields = [f for f in self.get_remaining_fields() if f not in self.skipped_fields]
+        # If we have all essential fields, try to infer more information and handle scheduling
+        if self._has_essential_fields(remaining_fields):
+            return self._complete_call()
         
-        # Check if we have all essential fields
-        essential_fields = ["Name", "Email", "Phone", "Location", "Budget Range", "Property Type", "Property Size", "Timeline"]
-        essential_remaining = [f for f in remaining_fields if f in essential_fields]
+        # If we don't have all essential fields, continue the conversation
+        if planned_response is not None:
+            return self._reply(planned_response)
         
-        # If we have all essential fields, try to infer more information and handle scheduling
-        if not essential_remaining:
-            print("\nAll essential information collected. Inferring additional details and handling scheduling...")
-            
-            # First, infer any missing information from the conversation
-            inference_prompt = f"""Based on this conversation, infer any missing information and preferences.
+        # Generate a natural, contextual response using LLM
+        try:
+            conversation_response = self._invoke(self._build_conversation_prompt(remaining_fields), "conversation")
+            response = self._apply_conversation_response(conversation_response, remaining_fields)
+        except Exception as e:
+            print(f"Error generating conversation response: {e}")
+            response = self._fallback_question(remaining_fields)
+        
+        return self._reply(response)
+
+    async def _aprocess_turn(self, message):
+        opening = self._handle_call_opening(message)
+        if opening is not None:
+            return opening
+
+        # Summarize older messages without blocking the event loop
+        await self.context.aprepare(self.memory)
+
+        planned_response = None
+        if self.single_call:
+            planned_response = await self.aextract_info_and_reply(message)
+        if planned_response is None:
+            await self.aextract_info(message)
+
+        # Check for existing lead once we have an email
+        if not self.existing_lead_checked and self.required_fields["Email"]:
+            await asyncio.to_thread(self._check_for_existing_lead)
+            self.existing_lead_checked = True
+
+        remaining_fields = self._remaining_fields_after_extraction()
+        
+        if self._has_essential_fields(remaining_fields):
+            return await self._acomplete_call()
+        
+        if planned_response is not None:
+            return self._reply(planned_response)
+        
+        try:
+            conversation_response = await self._ainvoke(self._build_conversation_prompt(remaining_fields), "conversation")
+            response = self._apply_conversation_response(conversation_response, remaining_fields)
+        except Exception as e:
+            print(f"Error generating conversation response: {e}")
+            response = self._fallback_question(remaining_fields)
+        
+        return self._reply(response)
+
+    def _build_inference_prompt(self):
+        """Prompt to infer any missing information from the conversation"""
+        return f"""Based on this conversation, infer any missing information and preferences.
 
-            Conversation history:
-            {[f"{'User' if isinstance(msg, HumanMessage) else 'Agent'}: {msg.content}" for msg in self.memory]}
+        Conversation history:
+        {self._transcript()}
+        
+        Current information:
+        {render_fields(self.required_fields)}
+        
+        Lead type: {self.lead_type}
+        
+        Please infer:
+        1. Use Case (how they plan to use the property)
+        2. Decision Maker (who makes the final decision)
+        3. Interest Level (Hot/Warm/Cold based on urgency and engagement)
+        4. Any specific preferences or requirements mentioned
+        5. Their preferred contact method
+        
+        Return as JSON:
+        {{
+            "Use Case": "inferred use case",
+            "Decision Maker": "inferred decision maker",
+            "Interest Level": "inferred level",
+            "Notes": "any specific preferences or requirements",
+            "Contact Method": "preferred contact method"
+        }}"""
+
+    def _apply_inference_response(self, inference_response):
+        """Fill still-missing fields from the inference response"""
+        if hasattr(inference_response, 'content'):
+            inferred_info = json.loads(inference_response.content)
+            for field, value in inferred_info.items():
+                if field in self.required_fields and (self.required_fields[field] is None or self.required_fields[field] == "Not provided"):
+                    self.required_fields[field] = value
+                    tracing.debug(f"Inferred {field}: {value}")
+
+    def _needs_scheduling(self):
+        """Check if we still need to ask about scheduling"""
+        return not self.required_fields.get("Availability") and not self.required_fields.get("Next Follow-up")
+
+    def _build_scheduling_prompt(self):
+        """Prompt for a question about scheduling a viewing or meeting"""
+        return f"""Based on this conversation, generate a natural question about scheduling a viewing or meeting.
             
-            Current information:
-            {self.required_fields}
+            Information gathered:
+            {render_fields(self.required_fields)}
             
             Lead type: {self.lead_type}
             
-            Please infer:
-            1. Use Case (how they plan to use the property)
-            2. Decision Maker (who makes the final decision)
-            3. Interest Level (Hot/Warm/Cold based on urgency and engagement)
-            4. Any specific preferences or requirements mentioned
-            5. Their preferred contact method
-            
-            Return as JSON:
-            {{
-                "Use Case": "inferred use case",
-                "Decision Maker": "inferred decision maker",
-                "Interest Level": "inferred level",
-                "Notes": "any specific preferences or requirements",
-                "Contact Method": "preferred contact method"
-            }}"""
+            The question should:
+            1. Be brief and direct
+            2. Reference their property type and location
+            3. Ask about their preferred time for viewing/meeting
+            4. Be friendly but professional
             
-            try:
-                inference_response = self.llm.invoke(inference_prompt)
-                if hasattr(inference_response, 'content'):
-                    inferred_info = json.loads(inference_response.content)
-                    for field, value in inferred_info.items():
-                        if field in self.required_fields and (self.required_fields[field] is None or self.required_fields[field] == "Not provided"):
-                            self.required_fields[field] = value
-                            print(f"Inferred {field}: {value}")
-            except Exception as e:
-                print(f"Error inferring information: {e}")
-            
-            # If we don't have scheduling information yet, ask about it
-            if not self.required_fields.get("Availability") and not self.required_fields.get("Next Follow-up"):
-                scheduling_prompt = f"""Based on this conversation, generate a natural question about scheduling a viewing or meeting.
+            Keep it to one sentence."""
+
+    def _build_completion_prompt(self):
+        """Prompt for a brief completion message"""
+        return f"""Generate a brief, friendly completion message for this real estate conversation.
                 
                 Information gathered:
-                {self.required_fields}
+                {render_fields(self.required_fields)}
                 
                 Lead type: {self.lead_type}
                 
-                The question should:
-                1. Be brief and direct
-                2. Reference their property type and location
-                3. Ask about their preferred time for viewing/meeting
-                4. Be friendly but professional
-                
-                Keep it to one sentence."""
+                The message should:
+                1. Be very brief and to the point
+                2. Thank them for their time
+                3. Confirm the next steps (viewing/meeting time if scheduled)
+                4. Not repeat any information they provided
                 
+                Keep it under 2 sentences."""
+
+    def _set_final_status(self):
+        """Set final status before logging"""
+        self.required_fields["Call Outcome"] = "Information Gathered"
+        self.required_fields["Follow-up Required"] = "Yes" if self.required_fields["Interest Level"] in ["Hot", "Warm"] else "No"
+
+    def _complete_call(self):
+        """Infer remaining details, ask about scheduling or log the lead and wrap up"""
+        tracing.debug("\nAll essential information collected. Inferring additional details and handling scheduling...")
+        
+        # First, infer any missing information from the conversation
+        try:
+            self._apply_inference_response(self._invoke(self._build_inference_prompt(), "inference"))
+        except Exception as e:
+            print(f"Error inferring information: {e}")
+        
+        # If we don't have scheduling information yet, ask about it
+        if self._needs_scheduling():
+            try:
+                scheduling_response = self._invoke(self._build_scheduling_prompt(), "scheduling")
+                response = self._response_text(scheduling_response)
+            except Exception as e:
+                print(f"Error generating scheduling question: {e}")
+                response = SCHEDULING_FALLBACK
+            return self._reply(response)
+        
+        # If we have scheduling information, proceed with logging
+        tracing.debug("\nLogging to sheets...")
+        self._generate_follow_up_plan()
+        
+        # Set final status
+        self._set_final_status()
+        
+        # Log to Google Sheets
+        try:
+            success = self._log_lead()
+            if success:
+                # Generate a brief completion message
                 try:
-                    scheduling_response = self.llm.invoke(scheduling_prompt)
-                    response = scheduling_response.content if hasattr(scheduling_response, 'content') else str(scheduling_response)
-                    self.memory.append(AIMessage(content=response))
-                    return response
+                    completion_response = self._invoke(self._build_completion_prompt(), "completion")
+                    response = self._response_text(completion_response)
                 except Exception as e:
-                    print(f"Error generating scheduling question: {e}")
-                    response = "When would be a good time for you to view some properties?"
-                    self.memory.append(AIMessage(content=response))
-                    return response
-            
-            # If we have scheduling information, proceed with logging
-            print("\nLogging to sheets...")
-            self._generate_follow_up_plan()
-            
-            # Set final status
-            self.required_fields["Call Outcome"] = "Information Gathered"
-            self.required_fields["Follow-up Required"] = "Yes" if self.required_fields["Interest Level"] in ["Hot", "Warm"] else "No"
-            
-            # Log to Google Sheets
+                    print(f"Error generating completion message: {e}")
+                    response = COMPLETION_FALLBACK
+            else:
+                response = SAVE_FAILED_REPLY
+        except Exception as e:
+            print(f"Error in completion process: {e}")
+            response = SAVE_FAILED_REPLY
+        
+        return self._reply(response)
+
+    async def _acomplete_call(self):
+        """Async _complete_call: independent calls (inference + scheduling, follow-up + completion) run concurrently"""
+        tracing.debug("\nAll essential information collected. Inferring additional details and handling scheduling...")
+        
+        if self._needs_scheduling():
+            inference_response, scheduling_response = await asyncio.gather(
+                self._ainvoke(self._build_inference_prompt(), "inference"),
+                self._ainvoke(self._build_scheduling_prompt(), "scheduling"),
+                return_exceptions=True
+            )
             try:
-                success = self.log_to_sheet()
-                if success:
-                    # Generate a brief completion message
-                    completion_prompt = f"""Generate a brief, friendly completion message for this real estate conversation.
-                    
-                    Information gathered:
-                    {self.required_fields}
-                    
-                    Lead type: {self.lead_type}
-                    
-                    The message should:
-                    1. Be very brief and to the point
-                    2. Thank them for their time
-                    3. Confirm the next steps (viewing/meeting time if scheduled)
-                    4. Not repeat any information they provided
-                    
-                    Keep it under 2 sentences."""
-                    
-                    try:
-                        completion_response = self.llm.invoke(completion_prompt)
-                        response = completion_response.content if hasattr(completion_response, 'content') else str(completion_response)
-                    except Exception as e:
-                        print(f"Error generating completion message: {e}")
-                        response = "Thank you for your time. I'll be in touch with property options that match your requirements."
-                else:
-                    response = "I've gathered your information. However, I'm having trouble saving it at the moment. Please try again later."
+                if isinstance(inference_response, Exception):
+                    raise inference_response
+                self._apply_inference_response(inference_response)
             except Exception as e:
-                print(f"Error in completion process: {e}")
-                response = "I've gathered your information. However, I'm having trouble saving it at the moment. Please try again later."
+                print(f"Error inferring information: {e}")
             
-            self.memory.append(AIMessage(content=response))
-            return response
+            if isinstance(scheduling_response, Exception):
+                print(f"Error generating scheduling question: {scheduling_response}")
+                response = SCHEDULING_FALLBACK
+            else:
+                response = self._response_text(scheduling_response)
+            return self._reply(response)
         
-        # If we don't have all essential fields, continue the conversation
-        # Generate a natural, contextual response using LLM
-        conversation_prompt = f"""Generate a natural, conversational response for this real estate conversation.
+        # The follow-up plan feeds on the inferred interest level, so inference goes first
+        try:
+            self._apply_inference_response(await self._ainvoke(self._build_inference_prompt(), "inference"))
+        except Exception as e:
+            print(f"Error inferring information: {e}")
+        
+        # The completion message describes the final lead, so plan and set its status first
+        tracing.debug("\nLogging to sheets...")
+        await self._agenerate_follow_up_plan()
+        self._set_final_status()
+        
+        # Logging and the completion message don't depend on each other
+        success, completion_response = await asyncio.gather(
+            asyncio.to_thread(self._log_lead),
+            self._ainvoke(self._build_completion_prompt(), "completion"),
+            return_exceptions=True
+        )
+        
+        if isinstance(success, Exception):
+            print(f"Error in completion process: {success}")
+            response = SAVE_FAILED_REPLY
+        elif not success:
+            response = SAVE_FAILED_REPLY
+        elif isinstance(completion_response, Exception):
+            print(f"Error generating completion message: {completion_response}")
+            response = COMPLETION_FALLBACK
+        else:
+            response = self._response_text(completion_response)
+        
+        return self._reply(response)
+
+    def _build_conversation_prompt(self, remaining_fields):
+        """Prompt for a natural, contextual response that asks for the next field"""
+        if not prompt_render.COMPACT_PROMPTS:
+            return self._build_original_conversation_prompt(remaining_fields)
+        return f"""Generate a natural, conversational response for this real estate conversation.
+        
+        The response should:
+        1. Be concise and to the point
+        2. Only acknowledge what they just said if it's particularly relevant
+        3. Ask about one of the remaining fields in a natural way
+        4. Avoid repeating information they've already provided
+        5. Be warm and professional but brief
+        6. Not feel like a template or form
+        
+        Keep responses short and engaging. Avoid starting with phrases like "I understand" or "Thanks for sharing" unless the information is particularly significant.
+        
+        Conversation history:
+        {self._transcript()}
+        
+        Information gathered so far:
+        {render_fields(self.required_fields)}
+        
+        Lead type: {self.lead_type}
+        Last question field: {self.last_question_field}
+        
+        Remaining fields to gather: {render_missing(remaining_fields)}
+        
+        Focus on gathering information about: {remaining_fields[0] if remaining_fields else 'any remaining details'}"""
+
+    def _build_original_conversation_prompt(self, remaining_fields):
+        """The conversation prompt as it was before compact rendering (AGENT_COMPACT_PROMPTS=false)"""
+        return f"""Generate a natural, conversational response for this real estate conversation.
         
         Conversation history:
-        {[f"{'User' if isinstance(msg, HumanMessage) else 'Agent'}: {msg.content}" for msg in self.memory]}
+        {self._transcript()}
         
         Information gathered so far:
         {self.required_fields}
@@ -465,129 +1145,62 @@ class RealEstateAgent:
         Focus on gathering information about: {remaining_fields[0] if remaining_fields else 'any remaining details'}
         
         Keep responses short and engaging. Avoid starting with phrases like "I understand" or "Thanks for sharing" unless the information is particularly significant."""
+
+    def _apply_conversation_response(self, conversation_response, remaining_fields):
+        """Get the reply text and track which field it asks about"""
+        response = self._response_text(conversation_response)
         
-        try:
-            conversation_response = self.llm.invoke(conversation_prompt)
-            response = conversation_response.content if hasattr(conversation_response, 'content') else str(conversation_response)
-            
-            # Update the last question field based on the response
-            for field in remaining_fields:
-                if field.lower() in response.lower():
-                    self.last_question_field = field
-                    break
-                    
-        except Exception as e:
-            print(f"Error generating conversation response: {e}")
-            # Fallback to template-based response if LLM fails
-            if remaining_fields:
-                next_field = remaining_fields[0]
-                response = self._get_question_for_field(next_field)
-                self.last_question_field = next_field
-            else:
-                response = "Is there anything else you'd like to tell me about your property needs?"
-        
-        self.memory.append(AIMessage(content=response))
+        # Update the last question field based on the response
+        self._track_question_field(response, remaining_fields)
         return response
 
+    def _fallback_question(self, remaining_fields):
+        """Fallback to template-based response if LLM fails"""
+        if remaining_fields:
+            next_field = remaining_fields[0]
+            self.last_question_field = next_field
+            return self._get_question_for_field(next_field)
+        return ANYTHING_ELSE_FALLBACK
+
     def _get_question_for_field(self, field):
         """Get a natural-sounding question for a specific field"""
+        planned = self.planned_questions.pop(field, None)
+        if planned:
+            return planned
+        return self._pick_question(field)
+
+    def _pick_question(self, field):
         # Map fields to their questions with more conversational variations
-        field_questions = {
-            "Name": [
-                "Could you tell me your name?", 
-                "What's your name?", 
-                "Who am I speaking with today?",
-                "I'd love to know who I'm chatting with. Your name?"
-            ],
-            "Company": [
-                "What's your company name?", 
-                "Which company are you with?", 
-                "What's the name of your business?",
-                "Do you work with a particular company?"
-            ],
-            "Position": [
-                "What's your role at the company?", 
-                "What's your position there?", 
-                "What do you do at your company?",
-                "May I ask what your role is?"
-            ],
-            "Industry": [
-                "What industry is your company in?", 
-                "What sector does your business operate in?", 
-                "What type of business are you in?",
-                "What field does your company specialize in?"
-            ],
-            "Location": [
-                "Where are you looking for property?", 
-                "What area are you interested in?", 
-                "Do you have a specific location in mind?",
-                "Which neighborhoods are you considering?",
-                "Is there a particular part of town you prefer?"
-            ],
-            "Budget Range": [
-                "What's your budget range?", 
-                "How much are you looking to spend?", 
-                "What price range works for you?",
-                "Do you have a budget in mind for this property?",
-                "What's your comfort level in terms of price?"
-            ],
-            "Company Size": [
-                "How large is your company?", 
-                "How many employees does your company have?", 
-                "What's the size of your organization?",
-                "Roughly how many people work at your company?"
-            ],
-            "Decision Maker": [
-                "Who will be making the final decision?", 
-                "Are you the decision maker for this?", 
-                "Who else is involved in the decision process?",
-                "Will you be deciding on this yourself or with others?"
-            ],
-            "Property Type": [
-                "What type of property are you looking for?", 
-                "Are you interested in a specific property type like house, apartment, or condo?", 
-                "What kind of property would best suit your needs?",
-                "Do you have a preference between houses, apartments, or other property types?",
-                "What style of property do you have in mind?"
-            ],
-            "Property Size": [
-                "What size property do you need?", 
-                "How many bedrooms or square feet are you looking for?", 
-                "Could you tell me about your space requirements?",
-                "How much space would be ideal for you?",
-                "Are you looking for something cozy or more spacious?"
-            ],
-            "Timeline": [
-                "When are you looking to buy or move?", 
-                "What's your timeline for this purchase?", 
-                "How soon do you want to complete this transaction?",
-                "Do you have a particular moving date in mind?",
-                "Is this something you're looking to do soon or are you just exploring options?"
-            ],
-            "Use Case": [
-                "How will you be using the property?", 
-                "What will the space be used for?", 
-                "What's your intended use for the property?",
-                "Will this be for living, investment, or something else?"
-            ],
-            "Competitors": [
-                "Are you considering other properties or agents?", 
-                "Have you seen any other properties that caught your interest?", 
-                "Are you working with other agents?",
-                "Have you visited any properties yet that you liked or consulted another agent?"
-            ],
-            "Availability": [
-                "When would be a good time for viewings?", 
-                "What days work best for you to see properties?", 
-                "When are you available to tour some options?",
-                "If we find some good matches, when might you be free to take a look?"
-            ]
-        }
-        
-        if field in field_questions:
-            return random.choice(field_questions[field])
+        if field in FIELD_QUESTIONS:
+            return random.choice(FIELD_QUESTIONS[field])
         return f"Could you tell me about your {field.lower().replace('_', ' ')}?"
 
+    def next_reply_candidates(self, count=2):
+        """
+        The canned replies most likely to come next, best guess first, so their
+        audio can be synthesized while the caller is still talking. Question
+        wording is fixed here, so a field asked about next uses the same text.
+        Replies written by the LLM can't be predicted and aren't included.
+        """
+        if not self.conversation_started:
+            return []
+        if not self.call_in_progress:
+            return [AVAILABLE_REPLY, UNSURE_REPLY][:count]
+        remaining = [f for f in self.get_remaining_fields() if f not in self.skipped_fields]
+        if self._has_essential_fields(remaining):
+            return []
+        # Most likely the caller answers the field we asked about, so the next
+        # question is the first other one; failing that, we ask again
+        fields = [f for f in remaining if f != self.last_question_field]
+        if self.last_question_field in remaining:
+            fields.insert(1, self.last_question_field)
+        candidates = []
+        for field in fields[:count]:
+            if field not in self.planned_questions:
+                self.planned_questions[field] = self._pick_question(field)
+            candidates.append(self.planned_questions[field])
+        return candidates
+
     def is_ready_to_log(self):
         """
         Check if we have enough information to log the lead.
@@ -632,53 +1245,101 @@ class RealEstateAgent:
 
         return True
 
-    def log_to_sheet(self):
+    def process_transcript(self, messages):
+        """
+        Extract a lead from a finished call transcript, given as (role, content)
+        pairs with role "user" or "agent": rules first, then one LLM extraction
+        pass over the whole call, the interest level and the follow-up plan.
+        Returns required_fields.
+        """
+        if not self.required_fields["UID"]:
+            self.required_fields["UID"] = self.generate_uid()
+        self.conversation_started = True
+        self.call_in_progress = True
+        self.memory = [HumanMessage(content=content) if role == "user" else AIMessage(content=content)
+                       for role, content in messages]
+        user_messages = [msg.content for msg in self.memory if isinstance(msg, HumanMessage)]
+        self.update_timestamps()
+        
+        self._detect_lead_type(" ".join(user_messages))
+        for message in user_messages:
+            self._apply_direct_patterns(message)
+        
+        remaining_fields = [f for f in self.get_remaining_fields() if f not in {"Interest Level", "Call Outcome", "Call Duration"}]
+        if remaining_fields:
+            prompt = transcript_extraction_prompt.format(
+                transcript="\n".join(format_message(msg) for msg in self.memory),
+                lead_type=self.lead_type or "Not determined",
+                fields=", ".join(remaining_fields)
+            )
+            try:
+                self._apply_extracted_fields(self._parse_json_content(self._invoke(prompt, "extraction")))
+            except Exception as e:
+                print(f"Error extracting from transcript: {e}")
+        
+        self._determine_interest_level()
+        self._generate_follow_up_plan()
+        self._set_final_status()
+        return self.required_fields
+
+    def lead_record(self):
+        """The lead as keyword arguments for sheets.log_lead"""
+        return dict(
+            uid=self.required_fields["UID"],
+            name=self.required_fields["Name"],
+            email=self.required_fields["Email"],
+            phone=self.required_fields["Phone"],
+            location=self.required_fields["Location"],
+            budget=self.required_fields["Budget Range"],
+            property_type=self.required_fields["Property Type"],
+            property_size=self.required_fields["Property Size"],
+            timeline=self.required_fields["Timeline"],
+            interest=self.required_fields["Interest Level"],
+            status=self.required_fields["Status"],
+            created_date=self.required_fields["Created Date"],
+            last_contact_date=self.required_fields["Last Contact Date"],
+            lead_type=self.lead_type,
+            use_case=self.required_fields["Use Case"],
+            company=self.required_fields["Company"],
+            position=self.required_fields["Position"],
+            industry=self.required_fields["Industry"],
+            company_size=self.required_fields["Company Size"],
+            decision_maker=self.required_fields["Decision Maker"],
+            next_followup=self.required_fields["Next Follow-up"],
+            followup_required=self.required_fields["Follow-up Required"],
+            call_outcome=self.required_fields["Call Outcome"],
+            notes=self.required_fields["Notes"],
+            lead_source=self.required_fields["Lead Source"],
+            competitors=self.required_fields["Competitors"]
+        )
+
+    def _log_lead(self):
+        """log_to_sheet, unless logging is deferred - then whoever adopts this agent logs it"""
+        if self.defer_logging:
+            self.log_pending = True
+            return True
+        return self.log_to_sheet()
+
+    def log_to_sheet(self, batched=None):
         """
         Log the lead information to Google Sheets
         """
         try:
-            print("\n=== Logging to Google Sheets ===")
-            print(f"Lead Type: {self.lead_type}")
-            print(f"Interest Level: {self.required_fields['Interest Level']}")
-            print(f"Status: {self.required_fields['Status']}")
+            tracing.debug("\n=== Logging to Google Sheets ===")
+            tracing.debug(f"Lead Type: {self.lead_type}")
+            tracing.debug(f"Interest Level: {self.required_fields['Interest Level']}")
+            tracing.debug(f"Status: {self.required_fields['Status']}")
             
             # Log all fields being sent
-            print("\nFields being logged:")
+            tracing.debug("\nFields being logged:")
             for field, value in self.required_fields.items():
                 if value is not None:
-                    print(f"{field}: {value}")
-            
-            success = log_lead(
-                uid=self.required_fields["UID"],
-                name=self.required_fields["Name"],
-                email=self.required_fields["Email"],
-                phone=self.required_fields["Phone"],
-                location=self.required_fields["Location"],
-                budget=self.required_fields["Budget Range"],
-                property_type=self.required_fields["Property Type"],
-                property_size=self.required_fields["Property Size"],
-                timeline=self.required_fields["Timeline"],
-                interest=self.required_fields["Interest Level"],
-                status=self.required_fields["Status"],
-                created_date=self.required_fields["Created Date"],
-                last_contact_date=self.required_fields["Last Contact Date"],
-                lead_type=self.lead_type,
-                use_case=self.required_fields["Use Case"],
-                company=self.required_fields["Company"],
-                position=self.required_fields["Position"],
-                industry=self.required_fields["Industry"],
-                company_size=self.required_fields["Company Size"],
-                decision_maker=self.required_fields["Decision Maker"],
-                next_followup=self.required_fields["Next Follow-up"],
-                followup_required=self.required_fields["Follow-up Required"],
-                call_outcome=self.required_fields["Call Outcome"],
-                notes=self.required_fields["Notes"],
-                lead_source=self.required_fields["Lead Source"],
-                competitors=self.required_fields["Competitors"]
-            )
+                    tracing.debug(f"{field}: {value}")
+            
+            success = log_lead(**self.lead_record(), batched=batched)
             
             if success:
-                print("\nSuccessfully logged lead to Google Sheets!")
+                tracing.debug("\nSuccessfully logged lead to Google Sheets!")
             else:
                 print("\nFailed to log lead to Google Sheets")
             
@@ -691,8 +1352,8 @@ class RealEstateAgent:
             print(traceback.format_exc())
             return False
 
-    def _determine_interest_level(self):
-        """Have the LLM determine the interest level based on the conversation so far"""
+    def _build_interest_prompt(self):
+        """Build the interest-level prompt, or return None if it was settled without the LLM"""
         # Get the last few messages for context
         recent_messages = self.memory[-min(len(self.memory), 5):]
         conversation_text = "\n".join([
@@ -701,20 +1362,21 @@ class RealEstateAgent:
         ])
         
         # Check if they said "no" at the start (Cold)
-        if len(self.memory) >= 2:
-            first_response = self.memory[1].content.lower() if len(self.memory) > 1 and isinstance(self.memory[1], HumanMessage) else ""
-            if any(word in first_response for word in ["no", "not interested", "busy", "later", "not now"]):
-                self.required_fields["Interest Level"] = "Cold"
-                print("Set interest level to Cold due to initial negative response")
-                return
+        if self._apply_initial_refusal():
+            return None
         
-        interest_prompt = f"""Based on this conversation, determine the client's interest level in finding a property.
+        # Clear-cut cases ("asap", "just browsing") don't need the LLM
+        if self._classify_interest_locally():
+            self.llm_calls_avoided += 1
+            return None
+        
+        return f"""Based on this conversation, determine the client's interest level in finding a property.
         
         Conversation:
         {conversation_text}
         
         Information gathered so far:
-        {self.required_fields}
+        {render_fields(self.required_fields)}
         
         Follow these specific criteria for categorizing interest level:
         - Hot: If they mention any timeline within the year OR show any eagerness/urgency, OR ask multiple questions about properties
@@ -722,41 +1384,60 @@ class RealEstateAgent:
         - Cold: Should already be categorized as Cold if they said no at the start of the conversation
         
         Only respond with one of these three options: Hot, Warm, or Cold."""
+
+    def _apply_initial_refusal(self):
+        """Set the interest level to Cold if the caller's first answer was a no; returns True if set"""
+        first_response = next((msg.content for msg in self.memory if isinstance(msg, HumanMessage)), "")
+        # Whole words, so "know" or "nothing" isn't read as "no"
+        words = tokenize(first_response)
+        if any(word in words for word in ["no", "busy", "later"]) or \
+                any(phrase in " ".join(words) for phrase in ["not interested", "not now"]):
+            self.required_fields["Interest Level"] = "Cold"
+            tracing.debug("Set interest level to Cold due to initial negative response")
+            return True
+        return False
+
+    def _apply_interest_result(self, response):
+        """Apply an interest-level response, or the exception raised instead of one"""
+        if isinstance(response, Exception):
+            print(f"Error determining interest level: {response}")
+            self.required_fields["Interest Level"] = "Warm"  # Default if there's an error
+            return
         
-        try:
-            # Use invoke instead of predict
-            response = self.llm.invoke(interest_prompt)
-            
-            # Get the content from the response
-            if hasattr(response, 'content'):
-                interest_level = response.content.strip()
-            else:
-                interest_level = str(response).strip()
-            
-            # Normalize the response
-            if "hot" in interest_level.lower():
-                self.required_fields["Interest Level"] = "Hot"
-            elif "warm" in interest_level.lower():
-                self.required_fields["Interest Level"] = "Warm"
-            elif "cold" in interest_level.lower():
-                self.required_fields["Interest Level"] = "Cold"
-            else:
-                # Default to Warm if unclear - based on the new criteria
-                self.required_fields["Interest Level"] = "Warm"
-                
-            print(f"Determined interest level: {self.required_fields['Interest Level']}")
+        # Get the content from the response
+        interest_level = self._response_text(response).strip()
+        self.required_fields["Interest Level"] = self._normalize_interest_level(interest_level)
             
+        tracing.debug(f"Determined interest level: {self.required_fields['Interest Level']}")
+
+    def _determine_interest_level(self):
+        """Have the LLM determine the interest level based on the conversation so far"""
+        interest_prompt = self._build_interest_prompt()
+        if interest_prompt is None:
+            return
+        
+        try:
+            response = self._invoke(interest_prompt, "interest")
         except Exception as e:
-            print(f"Error determining interest level: {e}")
-            self.required_fields["Interest Level"] = "Warm"  # Default if there's an error
+            response = e
+        self._apply_interest_result(response)
+
+    def _normalize_interest_level(self, interest_level):
+        """Map a free-form LLM answer onto Hot, Warm or Cold"""
+        interest_level = str(interest_level).lower()
+        if "hot" in interest_level:
+            return "Hot"
+        elif "warm" in interest_level:
+            return "Warm"
+        elif "cold" in interest_level:
+            return "Cold"
+        # Default to Warm if unclear - based on the new criteria
+        return "Warm"
 
     def _infer_missing_fields_from_context(self):
         """Infer missing fields from conversation context using LLM"""
         # Get the full conversation
-        conversation_text = "\n".join([
-            f"{'User' if isinstance(msg, HumanMessage) else 'Agent'}: {msg.content}" 
-            for msg in self.memory
-        ])
+        conversation_text = self._transcript()
         
         # Fields that we want to infer
         fields_to_infer = ["Use Case", "Competitors", "Call Outcome", "Contact Method", "Notes"]
@@ -773,7 +1454,7 @@ class RealEstateAgent:
         {conversation_text}
 
         Current information:
-        {self.required_fields}
+        {render_fields(self.required_fields)}
 
         Lead type: {self.lead_type or "Unknown"}
 
@@ -798,7 +1479,7 @@ class RealEstateAgent:
         
         try:
             # Use invoke instead of predict
-            response = self.llm.invoke(inference_prompt)
+            response = self._invoke(inference_prompt, "inference")
             
             # Get the content from the response
             if hasattr(response, 'content'):
@@ -809,39 +1490,36 @@ class RealEstateAgent:
             # Try to parse as JSON
             try:
                 inferred_info = json.loads(content)
-                print(f"Inferred fields: {inferred_info}")
+                tracing.debug(f"Inferred fields: {inferred_info}")
                 
                 # Update fields with inferred information
                 if inferred_info and isinstance(inferred_info, dict):
                     for field, value in inferred_info.items():
                         if field in self.required_fields and (self.required_fields[field] is None or self.required_fields[field] == "Not provided"):
                             self.required_fields[field] = value
-                            print(f"Updated {field} = {value} (inferred)")
+                            tracing.debug(f"Updated {field} = {value} (inferred)")
             except json.JSONDecodeError:
                 print(f"Failed to parse inferred fields JSON: {content}")
         except Exception as e:
             print(f"Error inferring fields: {e}")
             
-    def _generate_follow_up_plan(self):
-        """Generate a follow-up plan based on interest level and conversation context"""
+    def _build_follow_up_prompt(self):
+        """Build the follow-up plan prompt, or None if we don't know the interest level yet"""
         if not self.required_fields["Interest Level"]:
-            return
+            return None
             
         interest_level = self.required_fields["Interest Level"]
         
         # Get the full conversation
-        conversation_text = "\n".join([
-            f"{'User' if isinstance(msg, HumanMessage) else 'Agent'}: {msg.content}" 
-            for msg in self.memory
-        ])
+        conversation_text = self._transcript()
         
-        follow_up_prompt = f"""Based on this conversation with a {interest_level.lower()} lead, recommend a follow-up plan.
+        return f"""Based on this conversation with a {interest_level.lower()} lead, recommend a follow-up plan.
 
         Conversation:
         {conversation_text}
 
         Lead information:
-        {self.required_fields}
+        {render_fields(self.required_fields)}
 
         Lead type: {self.lead_type or "Unknown"}
         Interest level: {interest_level}
@@ -859,45 +1537,60 @@ class RealEstateAgent:
             "Agent": "Rachel",
             "Preparation": "Prepare property listings in Downtown area within 500k-700k range"
         }}"""
+
+    def _apply_follow_up_response(self, response):
+        """Apply a follow-up plan response to required_fields"""
+        # Get the content from the response
+        content = self._response_text(response)
         
+        # Try to parse as JSON
         try:
-            # Use invoke instead of predict
-            response = self.llm.invoke(follow_up_prompt)
-            
-            # Get the content from the response
-            if hasattr(response, 'content'):
-                content = response.content
-            else:
-                content = str(response)
+            follow_up_plan = json.loads(content)
+            tracing.debug(f"Follow-up plan: {follow_up_plan}")
             
-            # Try to parse as JSON
-            try:
-                follow_up_plan = json.loads(content)
-                print(f"Follow-up plan: {follow_up_plan}")
+            # Update fields with follow-up information
+            if follow_up_plan and isinstance(follow_up_plan, dict):
+                if "Follow-up Required" in follow_up_plan:
+                    self.required_fields["Follow-up Required"] = follow_up_plan["Follow-up Required"]
                 
-                # Update fields with follow-up information
-                if follow_up_plan and isinstance(follow_up_plan, dict):
-                    if "Follow-up Required" in follow_up_plan:
-                        self.required_fields["Follow-up Required"] = follow_up_plan["Follow-up Required"]
+                if "Next Follow-up" in follow_up_plan:
+                    self.required_fields["Next Follow-up"] = follow_up_plan["Next Follow-up"]
                     
-                    if "Next Follow-up" in follow_up_plan:
-                        self.required_fields["Next Follow-up"] = follow_up_plan["Next Follow-up"]
-                        
-                    # Store additional info in Notes if it's not already populated
-                    notes = []
-                    if self.required_fields["Notes"]:
-                        notes.append(self.required_fields["Notes"])
-                        
-                    if "Agent" in follow_up_plan:
-                        notes.append(f"Assigned to: {follow_up_plan['Agent']}")
-                        
-                    if "Preparation" in follow_up_plan:
-                        notes.append(f"Preparation: {follow_up_plan['Preparation']}")
-                        
-                    if notes:
-                        self.required_fields["Notes"] = " | ".join(notes)
-            except json.JSONDecodeError:
-                print(f"Failed to parse follow-up plan JSON: {content}")
+                # Store additional info in Notes if it's not already populated
+                notes = []
+                if self.required_fields["Notes"]:
+                    notes.append(self.required_fields["Notes"])
+                    
+                if "Agent" in follow_up_plan:
+                    notes.append(f"Assigned to: {follow_up_plan['Agent']}")
+                    
+                if "Preparation" in follow_up_plan:
+                    notes.append(f"Preparation: {follow_up_plan['Preparation']}")
+                    
+                if notes:
+                    self.required_fields["Notes"] = " | ".join(notes)
+        except json.JSONDecodeError:
+            print(f"Failed to parse follow-up plan JSON: {content}")
+
+    def _generate_follow_up_plan(self):
+        """Generate a follow-up plan based on interest level and conversation context"""
+        follow_up_prompt = self._build_follow_up_prompt()
+        if follow_up_prompt is None:
+            return
+        
+        try:
+            self._apply_follow_up_response(self._invoke(follow_up_prompt, "follow-up"))
+        except Exception as e:
+            print(f"Error generating follow-up plan: {e}")
+
+    async def _agenerate_follow_up_plan(self):
+        """Async counterpart of _generate_follow_up_plan"""
+        follow_up_prompt = self._build_follow_up_prompt()
+        if follow_up_prompt is None:
+            return
+        
+        try:
+            self._apply_follow_up_response(await self._ainvoke(follow_up_prompt, "follow-up"))
         except Exception as e:
             print(f"Error generating follow-up plan: {e}")
             
@@ -911,7 +1604,7 @@ class RealEstateAgent:
             existing_lead = check_existing_lead(email)
             
             if existing_lead:
-                print(f"Found existing lead: {existing_lead}")
+                tracing.debug(f"Found existing lead: {existing_lead}")
                 
                 # Update UID to match existing lead
                 if "UID" in existing_lead:
@@ -959,6 +1652,8 @@ def main():
             
         response = agent.process_message(user_input)
         print(f"Agent: {response}")
+    
+    agent.dump_usage()
 
 if __name__ == "__main__":
     main()
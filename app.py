@@ -5,10 +5,12 @@ import re
 from agents import RealEstateAgent
 from prompts import GREETING_PROMPT, FOLLOW_UP_PROMPT, COMPLETION_PROMPT, ERROR_PROMPT
 import json
-from speech import speak, listen
+from speech import speak, listen, PlaybackPacer
+from speculative_tts import make_speculator
+import metering
+from tracing import debug
 import os
 from dotenv import load_dotenv
-import base64
 from io import BytesIO
 
 # Load environment variables
@@ -18,20 +20,39 @@ load_dotenv()
 from elevenlabs import ElevenLabs
 client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
 
-@st.cache_data
-def get_audio_base64(audio_data):
-    """Convert audio data to base64 for embedding"""
-    return base64.b64encode(audio_data).decode()
-
 def play_audio(audio_data):
-    """Create an audio player with autoplay"""
-    audio_base64 = get_audio_base64(audio_data)
-    audio_html = f"""
-        <audio autoplay style="display:none">
-            <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-        </audio>
     """
-    st.markdown(audio_html, unsafe_allow_html=True)
+    Autoplay a clip. st.audio hands the bytes to Streamlit's media file
+    manager and sends the browser a short /media URL instead of inlining
+    base64; the file is released once a rerun no longer renders it.
+    """
+    st.audio(audio_data, format="audio/mpeg", autoplay=True)
+    # Let listen() wait until this clip should have finished playing
+    st.session_state.playback.started(audio_data)
+
+def add_assistant_message(content, audio_data):
+    """Append an assistant turn; only the newest clip is kept, so a stale one never plays over it"""
+    for message in st.session_state.messages:
+        message.pop("audio", None)
+    st.session_state.messages.append({
+        "role": "assistant", 
+        "content": content,
+        "audio": audio_data
+    })
+
+def speculate_next_reply():
+    """Start synthesizing the agent's likely next replies while the user talks or types"""
+    speculative_audio = st.session_state.speculative_audio
+    if speculative_audio:
+        with metering.session(st.session_state.agent.meter):
+            speculative_audio.speculate(st.session_state.agent.next_reply_candidates(speculative_audio.count))
+
+def reply_audio(response):
+    """Audio for a reply, from the speculative synthesis if it guessed right"""
+    speculative_audio = st.session_state.speculative_audio
+    audio_data = speculative_audio.take(response) if speculative_audio else None
+    with metering.session(st.session_state.agent.meter):
+        return audio_data or speak(response)
 
 def validate_phone(phone):
     # Remove any non-digit characters
@@ -77,14 +98,6 @@ st.markdown("""
         display: none !important;
     }
     </style>
-    <script>
-    function playAudio(audioData) {
-        const audio = new Audio('data:audio/mp3;base64,' + audioData);
-        audio.play().catch(function(error) {
-            console.log("Audio playback failed:", error);
-        });
-    }
-    </script>
 """, unsafe_allow_html=True)
 
 # Initialize session state
@@ -98,6 +111,10 @@ if 'last_played_index' not in st.session_state:
     st.session_state.last_played_index = -1
 if 'voice_enabled' not in st.session_state:
     st.session_state.voice_enabled = True  # Enable voice by default
+if 'speculative_audio' not in st.session_state:
+    st.session_state.speculative_audio = make_speculator()
+if 'playback' not in st.session_state:
+    st.session_state.playback = PlaybackPacer()
 if 'voice_settings' not in st.session_state:
     st.session_state.voice_settings = {
         "stability": 0.5,
@@ -164,20 +181,20 @@ else:
     # Add initial greeting if this is the first message
     if not st.session_state.messages:
         initial_message = st.session_state.agent.process_message("")
-        print("[DEBUG] Generating initial greeting audio...")
-        audio_data = speak(initial_message)
+        debug("[App] Generating initial greeting audio...")
+        audio_data = reply_audio(initial_message)
         if audio_data:
-            print(f"[DEBUG] Initial greeting audio size: {len(audio_data)} bytes")
+            debug(f"[App] Initial greeting audio size: {len(audio_data)} bytes")
+            # Played right away, so the clip isn't kept in session state
             st.session_state.messages.append({
                 "role": "assistant", 
-                "content": initial_message,
-                "audio": audio_data
+                "content": initial_message
             })
             # Play the initial greeting
             play_audio(audio_data)
             st.session_state.last_played_index = 0
         else:
-            print("[DEBUG] Failed to generate initial greeting audio")
+            debug("[App] Failed to generate initial greeting audio")
             st.session_state.messages.append({
                 "role": "assistant", 
                 "content": initial_message
@@ -187,9 +204,10 @@ else:
     for i, message in enumerate(st.session_state.messages):
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
-            # Only play new messages
-            if message["role"] == "assistant" and "audio" in message and i > st.session_state.last_played_index:
-                play_audio(message["audio"])
+            # Only play new messages; a clip is dropped from session state once
+            # it has been sent, so long calls don't hold every turn's audio
+            if message["role"] == "assistant" and message.get("audio") and i > st.session_state.last_played_index:
+                play_audio(message.pop("audio"))
                 st.session_state.last_played_index = i
 
     # Voice input button
@@ -197,7 +215,8 @@ else:
         col1, col2 = st.columns([3, 1])
         with col2:
             if st.button("🎤 Speak", use_container_width=True, key="voice_button"):
-                with st.spinner("Listening..."):
+                speculate_next_reply()
+                with st.spinner("Listening..."), metering.session(st.session_state.agent.meter):
                     user_input = listen()
                     if user_input and user_input not in ["Sorry, I didn't hear anything.", "Sorry, I didn't catch that.", "Sorry, speech recognition service failed."]:
                         # Add user message to chat
@@ -209,12 +228,7 @@ else:
                         response = st.session_state.agent.process_message(user_input)
                         
                         # Add assistant response to chat with audio
-                        audio_data = speak(response)
-                        st.session_state.messages.append({
-                            "role": "assistant", 
-                            "content": response,
-                            "audio": audio_data
-                        })
+                        add_assistant_message(response, reply_audio(response))
                         with st.chat_message("assistant"):
                             st.markdown(response)
                         
@@ -234,15 +248,11 @@ else:
             st.markdown(prompt)
         
         # Process message and get response
+        speculate_next_reply()
         response = st.session_state.agent.process_message(prompt)
         
         # Add assistant response to chat with audio
-        audio_data = speak(response)
-        st.session_state.messages.append({
-            "role": "assistant", 
-            "content": response,
-            "audio": audio_data
-        })
+        add_assistant_message(response, reply_audio(response))
         with st.chat_message("assistant"):
             st.markdown(response)
         
@@ -300,9 +310,18 @@ else:
                 st.warning(f"Still need: {', '.join(missing_essential)}")
             else:
                 st.success("All essential information gathered!")
+            
+            st.subheader("Call Usage")
+            usage = st.session_state.agent.usage()
+            st.text(f"LLM tokens: {usage['llm']['input_tokens']} in / {usage['llm']['output_tokens']} out")
+            st.text(f"TTS characters: {usage['tts']['characters']}")
+            st.text(f"STT audio: {usage['stt']['seconds']:.1f}s")
+            st.text(f"Sheets API calls: {usage['sheets']['calls']}")
+            st.text(f"Estimated cost: ${usage['cost_usd']['total']:.4f}")
         
         # Add a button to end call
         if st.button("End Call", type="primary"):
+            st.session_state.agent.dump_usage()
             st.session_state.phone_number = None
             st.session_state.agent = None
             st.session_state.messages = []
@@ -0,0 +1,196 @@
+# batch_extract.py
+"""
+Turn recorded call transcripts into lead rows.
+
+Reads JSONL, one call per line:
+    {"id": "call-1", "phone": "5551234567", "transcript": [["user", "..."], ["agent", "..."]]}
+The transcript may also be a list of {"role": ..., "content": ...} objects or
+a string of "User: ..." / "Agent: ..." lines.
+
+    python batch_extract.py calls.jsonl --workers 8 --output leads.jsonl
+    python batch_extract.py calls.jsonl --workers 4 --processes --sheets
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+BATCH_WORKERS = int(os.getenv("BATCH_EXTRACT_WORKERS", "8"))
+BATCH_LEAD_SOURCE = "Call Transcript"
+
+# One LLM client per worker process, shared by its threads
+_llm = None
+_llm_lock = threading.Lock()
+
+def _shared_llm():
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            from agents import create_llm
+            _llm = create_llm()
+        return _llm
+
+def parse_transcript(transcript):
+    """Normalize a transcript to a list of (role, content) pairs, role "user" or "agent" """
+    if isinstance(transcript, str):
+        messages = []
+        for line in transcript.splitlines():
+            speaker, _, content = line.partition(":")
+            if not content.strip():
+                continue
+            role = "user" if speaker.strip().lower() in ("user", "caller", "client", "customer") else "agent"
+            messages.append((role, content.strip()))
+        return messages
+
+    messages = []
+    for entry in transcript:
+        if isinstance(entry, dict):
+            role, content = entry.get("role", ""), entry.get("content", "")
+        else:
+            role, content = entry
+        role = "user" if role.lower() in ("user", "human", "caller", "client", "customer") else "agent"
+        messages.append((role, content))
+    return messages
+
+def read_transcripts(path):
+    """Stream records from a JSONL file without loading it all"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                _log(f"Skipping line {line_number}: {e}")
+                continue
+            if "transcript" not in record:
+                _log(f"Skipping line {line_number}: no transcript")
+                continue
+            record.setdefault("id", f"line-{line_number}")
+            yield record
+
+def extract_lead(record):
+    """
+    Run extraction, interest classification and follow-up planning for one
+    transcript. Returns {"id", "lead" (log_lead keyword arguments) or "error"}.
+    Runs in a pool worker, so it only takes and returns plain data.
+    """
+    from agents import RealEstateAgent
+
+    try:
+        agent = RealEstateAgent(initial_phone=record.get("phone"), llm=_shared_llm())
+        agent.required_fields["Lead Source"] = record.get("lead_source", BATCH_LEAD_SOURCE)
+        agent.process_transcript(parse_transcript(record["transcript"]))
+        return {"id": record["id"], "lead": agent.lead_record()}
+    except Exception as e:
+        return {"id": record["id"], "error": f"{e.__class__.__name__}: {e}"}
+
+class LeadSink:
+    """Where extracted leads go: the batched Sheets writer, a local JSONL file, or both"""
+
+    def __init__(self, output=None, sheets=False):
+        self.output = open(output, "w", encoding="utf-8") if output else None
+        self.sheets = sheets
+        self.written = 0
+
+    def write(self, result):
+        if self.output:
+            self.output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        if self.sheets and "lead" in result:
+            from sheets import log_lead
+            # Queued on the LeadWriter and written in bulk
+            log_lead(**result["lead"], batched=True)
+        self.written += 1
+
+    def close(self):
+        if self.output:
+            self.output.close()
+        if self.sheets:
+            from sheets import flush_leads
+            return flush_leads()
+        return True
+
+def _log(message):
+    # Progress goes to stderr so it survives when the agent's stdout is silenced
+    print(f"[Batch] {message}", file=sys.stderr)
+
+def _silence_worker():
+    """Process pool initializer: drop the agent's step-by-step output"""
+    sys.stdout = open(os.devnull, "w")
+
+def run_batch(path, workers=BATCH_WORKERS, processes=False, output=None, sheets=False, max_in_flight=None, quiet=True):
+    """
+    Extract every transcript in path with at most max_in_flight transcripts
+    queued at once (default 2 per worker), so memory stays flat for large files.
+    Returns a stats dict.
+    """
+    max_in_flight = max_in_flight or workers * 2
+    sink = LeadSink(output, sheets)
+    stats = {"transcripts": 0, "leads": 0, "errors": 0}
+    started = time.perf_counter()
+
+    def collect(done):
+        for future in done:
+            result = future.result()
+            stats["transcripts"] += 1
+            if "error" in result:
+                stats["errors"] += 1
+                _log(f"{result['id']} failed: {result['error']}")
+            else:
+                stats["leads"] += 1
+            sink.write(result)
+            if stats["transcripts"] % 50 == 0:
+                elapsed = time.perf_counter() - started
+                _log(f"{stats['transcripts']} transcripts in {elapsed:.1f}s ({stats['transcripts'] / elapsed:.2f}/s)")
+
+    if processes:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_silence_worker if quiet else None)
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+    # The agent narrates every step; threads share stdout, so silence it for the whole run
+    with pool, redirect_stdout(open(os.devnull, "w") if quiet else sys.stdout):
+        in_flight = set()
+        for record in read_transcripts(path):
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight.add(pool.submit(extract_lead, record))
+        collect(wait(in_flight).done)
+
+    stats["saved"] = sink.close()
+    stats["seconds"] = time.perf_counter() - started
+    stats["per_second"] = stats["transcripts"] / stats["seconds"] if stats["seconds"] else 0.0
+    _log(f"Done: {stats['transcripts']} transcripts, {stats['leads']} leads, {stats['errors']} errors "
+         f"in {stats['seconds']:.1f}s ({stats['per_second']:.2f} transcripts/s)")
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract leads from recorded call transcripts")
+    parser.add_argument("input", help="JSONL file of transcripts")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Concurrent transcripts")
+    parser.add_argument("--processes", action="store_true", help="Use a process pool instead of threads")
+    parser.add_argument("--max-in-flight", type=int, help="Transcripts queued at once (default 2 per worker)")
+    parser.add_argument("--output", help="Write results to this JSONL file")
+    parser.add_argument("--sheets", action="store_true", help="Write leads to Google Sheets in batches")
+    parser.add_argument("--verbose", action="store_true", help="Show the agent's own output")
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.sheets:
+        parser.error("choose --output, --sheets or both")
+
+    stats = run_batch(args.input, args.workers, args.processes, args.output, args.sheets, args.max_in_flight, quiet=not args.verbose)
+    return 0 if stats["saved"] and not stats["errors"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+# benchmarks/conversations.py
+
+# Scripted calls: (caller message, fields the model "extracts" from it).
+# The fake LLM returns the fields; messages the rule-based tier handles
+# never reach it. Each script ends with a saved lead.
+CONVERSATIONS = {
+    "residential_short_answers": [
+        ("yes", {}),
+        ("I'm looking for a house for my family", {"Property Type": "House", "Use Case": "Family home"}),
+        ("Sarah Johnson", {"Name": "Sarah Johnson"}),
+        ("sarah.johnson@example.com", {"Email": "sarah.johnson@example.com"}),
+        ("somewhere near downtown Austin", {"Location": "Downtown Austin"}),
+        ("around $450k", {"Budget Range": "$450k"}),
+        ("3 bedrooms", {"Property Size": "3 bedrooms"}),
+        ("within 3 months", {"Timeline": "within 3 months"}),
+        ("Saturday morning works for a viewing", {"Availability": "Saturday morning"}),
+    ],
+    "residential_chatty": [
+        ("sure, go ahead", {}),
+        ("we want a family home, it's getting crowded in our current apartment", {"Property Type": "House", "Use Case": "Family home"}),
+        ("My name is David Lee and you can email me at david.lee@example.com", {"Name": "David Lee", "Email": "david.lee@example.com"}),
+        ("We love the north side, close to good schools, maybe Round Rock", {"Location": "Round Rock"}),
+        ("We were thinking somewhere between 500 and 600 thousand, depending on the condition", {"Budget Range": "500k-600k"}),
+        ("At least four bedrooms and a big yard for the dog, ideally 2500 square feet", {"Property Size": "4 bedrooms, 2500 sq ft"}),
+        ("Our lease ends in the summer so we'd like to move before then", {"Timeline": "Before summer"}),
+        ("Weekday evenings are best, maybe Tuesday after 6", {"Availability": "Tuesday after 6pm"}),
+    ],
+    "commercial": [
+        ("yes", {}),
+        ("We need office space for our company", {"Property Type": "Office"}),
+        ("This is Priya Patel, priya@acme-example.com", {"Name": "Priya Patel", "Email": "priya@acme-example.com"}),
+        ("In the financial district", {"Location": "Financial District"}),
+        ("Our budget is $1.2 million", {"Budget Range": "$1.2 million"}),
+        ("5000 sq ft", {"Property Size": "5000 sq ft"}),
+        ("next quarter", {"Timeline": "next quarter"}),
+        ("Any Thursday afternoon", {"Availability": "Thursday afternoon"}),
+    ],
+}
@@ -0,0 +1,265 @@
+# benchmarks/fakes.py
+
+import os
+import json
+import time
+import tempfile
+import asyncio
+import threading
+from types import SimpleNamespace
+from langchain_core.messages import AIMessage
+from lead_store import LEAD_COLUMNS
+from prompt_render import PROMPT_PREFIX
+
+# Opening words of each agent prompt, mapped to the purpose tag used in agents.py
+PROMPT_PURPOSES = [
+    ("Extract relevant information", "extraction"),
+    ("Extract every lead detail from this recorded", "extraction"),
+    ("You are a real estate agent on a call", "turn"),
+    ("Based on this conversation, determine the client's interest level", "interest"),
+    ("Based on this conversation, infer", "inference"),
+    ("Based on this conversation, generate a natural question about scheduling", "scheduling"),
+    ("Based on this conversation with a", "follow-up"),
+    ("Generate a brief, friendly completion message", "completion"),
+    ("Generate a natural, conversational response", "conversation"),
+    ("Is this real estate inquiry residential or commercial", "classification"),
+    ("Summarize this simulated real estate conversation", "summary"),
+]
+
+def prompt_purpose(prompt):
+    text = prompt.strip()
+    if text.startswith(PROMPT_PREFIX):
+        text = text[len(PROMPT_PREFIX):].strip()
+    for prefix, purpose in PROMPT_PURPOSES:
+        if text.startswith(prefix):
+            return purpose
+    return "other"
+
+class FakeLLM:
+    """
+    Stand-in for ChatGoogleGenerativeAI. Answers each agent prompt with a
+    well-formed response after an injected latency. The fields "extracted"
+    from the caller's message come from the scripted conversation: set
+    script_fields before each turn.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.script_fields = {}
+        self.calls = []  # (purpose, prompt bytes)
+        self._lock = threading.Lock()
+
+    def _record(self, prompt):
+        purpose = prompt_purpose(prompt)
+        with self._lock:
+            self.calls.append((purpose, len(prompt.encode("utf-8"))))
+        return purpose
+
+    def _answer(self, purpose):
+        fields = self.script_fields
+        if purpose == "extraction":
+            return json.dumps(fields)
+        if purpose == "turn":
+            return json.dumps({
+                "extracted": fields,
+                "interest_level": "Warm",
+                "reply": "Got it. What else should I know about what you're looking for?",
+                "reply_field": None,
+            })
+        if purpose == "interest":
+            return "Warm"
+        if purpose == "inference":
+            return json.dumps({"Use Case": "Primary residence", "Contact Method": "Email"})
+        if purpose == "classification":
+            return "residential"
+        if purpose == "scheduling":
+            return "When would be a good time for a viewing?"
+        if purpose == "follow-up":
+            return json.dumps({"Follow-up Required": "Yes", "Next Follow-up": "2025-01-15", "Agent": "Rachel"})
+        if purpose == "completion":
+            return "Thanks so much! We'll be in touch soon with some options."
+        if purpose == "summary":
+            return "The caller is looking for a home and has shared some details."
+        return "Could you tell me a bit more about what you're looking for?"
+
+    def invoke(self, prompt, **kwargs):
+        purpose = self._record(str(prompt))
+        time.sleep(self.latency)
+        return AIMessage(content=self._answer(purpose))
+
+    async def ainvoke(self, prompt, **kwargs):
+        purpose = self._record(str(prompt))
+        await asyncio.sleep(self.latency)
+        return AIMessage(content=self._answer(purpose))
+
+class FakeTextToSpeech:
+    """Stand-in for client.text_to_speech: ~1 KB of "audio" per 10 characters"""
+
+    def __init__(self, latency=0.0, chunk_size=4096):
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.characters = 0
+        self.requests = 0
+
+    def _audio(self, text):
+        self.characters += len(text)
+        self.requests += 1
+        time.sleep(self.latency)
+        return b"\xff" * (len(text) * 100)
+
+    def convert(self, text, **kwargs):
+        audio = self._audio(text)
+        return iter([audio])
+
+    def stream(self, text, **kwargs):
+        audio = self._audio(text)
+        for i in range(0, len(audio), self.chunk_size):
+            yield audio[i:i + self.chunk_size]
+
+class FakeSpeechToText:
+    """Stand-in for client.speech_to_text: returns the text set in next_text"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.next_text = ""
+        self.requests = 0
+
+    def convert(self, file=None, **kwargs):
+        self.requests += 1
+        time.sleep(self.latency)
+        return SimpleNamespace(text=self.next_text, language_code="en", language_probability=1.0, words=[])
+
+class FakeElevenLabs:
+    def __init__(self, latency=0.0):
+        self.text_to_speech = FakeTextToSpeech(latency)
+        self.speech_to_text = FakeSpeechToText(latency)
+
+class FakeWorksheet:
+    """
+    In-memory stand-in for a gspread Worksheet covering the calls sheets.py
+    makes. Every call counts as one API request and sleeps for the latency.
+    """
+
+    def __init__(self, headers, latency=0.0):
+        self.rows = [list(headers)]
+        self.latency = latency
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        time.sleep(self.latency)
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def _append(self, rows):
+        with self._lock:
+            first = len(self.rows) + 1
+            self.rows.extend([list(row) for row in rows])
+        return {"updates": {"updatedRange": f"Sheet1!A{first}:Z{first + len(rows) - 1}"}}
+
+    def get_all_values(self):
+        self._call("get_all_values")
+        return [list(row) for row in self.rows]
+
+    def get_all_records(self):
+        self._call("get_all_records")
+        headers = self.rows[0]
+        return [dict(zip(headers, row)) for row in self.rows[1:]]
+
+    def get_values(self, cell_range):
+        self._call("get_values")
+        start = int(cell_range.split(":")[0][1:])
+        return [list(row) for row in self.rows[start - 1:]]
+
+    def batch_get(self, ranges, **kwargs):
+        self._call("batch_get")
+        result = []
+        for cell_range in ranges:
+            row = int(cell_range.split(":")[0][1:])
+            result.append([list(self.rows[row - 1])] if row <= len(self.rows) else [])
+        return result
+
+    def row_values(self, row):
+        self._call("row_values")
+        return list(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def append_row(self, values, **kwargs):
+        self._call("append_row")
+        return self._append([values])
+
+    def append_rows(self, values, **kwargs):
+        self._call("append_rows")
+        return self._append(values)
+
+    def _set_row(self, row, values):
+        with self._lock:
+            while len(self.rows) < row:
+                self.rows.append([])
+            self.rows[row - 1] = list(values)
+
+    def update(self, cell_range, values, **kwargs):
+        self._call("update")
+        self._set_row(int(cell_range.split(":")[0][1:]), values[0])
+
+    def batch_update(self, data, **kwargs):
+        self._call("batch_update")
+        for update in data:
+            self._set_row(int(update["range"].split(":")[0][1:]), update["values"][0])
+
+class FakeSheetsClient:
+    """Stand-in for the gspread client: open_by_key(...).worksheet(...) returns the fake sheet"""
+
+    def __init__(self, worksheet):
+        self.worksheet_handle = worksheet
+
+    def open_by_key(self, key):
+        self.worksheet_handle._call("open_by_key")
+        return SimpleNamespace(worksheet=lambda name: self.worksheet_handle)
+
+# Column headers in the order log_lead writes them
+SHEET_HEADERS = LEAD_COLUMNS
+
+_store_dir = None  # Throwaway directory of the benchmark's lead store
+
+def install_fake_sheets(latency=0.0):
+    """
+    Point sheets.py at a fresh in-memory worksheet and return it. The local
+    lead store, if enabled, moves to a throwaway file so benchmark leads
+    don't end up in the real one.
+    """
+    import sheets
+    import lead_store
+
+    global _store_dir
+    # The previous run's sync worker pushes what it still holds before its store goes away
+    if sheets._lead_sync is not None:
+        sheets._lead_sync.close()
+    worksheet = FakeWorksheet(SHEET_HEADERS, latency)
+    with sheets._client_lock:
+        sheets.sheets_available = True
+        sheets._credentials = SimpleNamespace(valid=True)
+        sheets._client = FakeSheetsClient(worksheet)
+        sheets._worksheet = None
+    sheets.invalidate_lead_index()
+    if lead_store.LEAD_STORE:
+        if _store_dir is not None:
+            _store_dir.cleanup()
+        # Removed on the next install or at exit
+        _store_dir = tempfile.TemporaryDirectory(prefix="bench-leads-")
+        lead_store._lead_store = lead_store.LeadStore(os.path.join(_store_dir.name, "leads.db"))
+        sheets._lead_sync = None
+    return worksheet
+
+def install_fake_elevenlabs(latency=0.0, use_cache=False):
+    """Point speech.py at a fake ElevenLabs client and return it"""
+    import speech
+
+    fake = FakeElevenLabs(latency)
+    speech.client = fake
+    if not use_cache:
+        speech.get_audio_cache = lambda: None
+    return fake
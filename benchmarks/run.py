@@ -0,0 +1,160 @@
+# benchmarks/run.py
+"""
+Offline benchmark: drives the scripted conversations through
+RealEstateAgent.process_message with fake Gemini, ElevenLabs and Sheets
+backends and reports per-turn latency, LLM calls and prompt bytes per turn,
+and Sheets API calls per completed lead.
+
+    python -m benchmarks.run --llm-latency 0.4 --sheets-latency 0.15
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from contextlib import redirect_stdout
+
+# The agent module creates no clients at import time, but the Gemini wrapper
+# still wants a key when constructed
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import tracing
+from benchmarks.fakes import FakeLLM, install_fake_sheets, install_fake_elevenlabs
+from benchmarks.conversations import CONVERSATIONS
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+def run_conversation(name, script, args, worksheet):
+    """Run one scripted call and return a list of per-turn records"""
+    from agents import RealEstateAgent
+    from speech import speak
+    from sheets import flush_leads
+    import metering
+
+    llm = FakeLLM(latency=args.llm_latency)
+    agent = RealEstateAgent(initial_phone="5551234567", single_call=args.single_call, llm=llm)
+    turns = []
+    sheet_calls_before = worksheet.total_calls
+
+    for index, (message, fields) in enumerate([("", {})] + script):
+        llm.script_fields = fields
+        calls_before = len(llm.calls)
+        log = io.StringIO()
+        start = time.perf_counter()
+        with redirect_stdout(log if not args.verbose else sys.stdout):
+            if args.use_async:
+                reply = asyncio.run(agent.aprocess_message(message))
+            else:
+                reply = agent.process_message(message)
+            if args.voice:
+                with metering.session(agent.meter):
+                    speak(reply)
+        elapsed = time.perf_counter() - start
+        calls = llm.calls[calls_before:]
+        turns.append({
+            "conversation": name,
+            "turn": index,
+            "latency": elapsed,
+            "llm_calls": len(calls),
+            "prompt_bytes": sum(size for _, size in calls),
+            "purposes": [purpose for purpose, _ in calls],
+        })
+
+    completed = agent.required_fields.get("Call Outcome") == "Information Gathered"
+    # Leads saved to the local store reach the sheet in the background; count that push here
+    with redirect_stdout(io.StringIO() if not args.verbose else sys.stdout):
+        flush_leads()
+    return turns, completed, worksheet.total_calls - sheet_calls_before, agent.usage()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline agent benchmark with fake backends")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds per LLM call")
+    parser.add_argument("--tts-latency", type=float, default=0.0, help="Seconds per ElevenLabs request")
+    parser.add_argument("--sheets-latency", type=float, default=0.0, help="Seconds per Sheets API call")
+    parser.add_argument("--voice", action="store_true", help="Also synthesize every reply with speak()")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use aprocess_message")
+    parser.add_argument("--multi-call", dest="single_call", action="store_false", default=None,
+                        help="Use the multi-call turn path instead of the single-call one")
+    parser.add_argument("--repeat", type=int, default=1, help="Times to run each conversation")
+    parser.add_argument("--json", help="Write per-turn records to this file")
+    parser.add_argument("--trace", help="Enable tracing and export span histograms to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the agent's own output")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        tracing.set_enabled(True)
+    worksheet = install_fake_sheets(args.sheets_latency)
+    tts = install_fake_elevenlabs(args.tts_latency)
+
+    records = []
+    leads = []
+    for _ in range(args.repeat):
+        for name, script in CONVERSATIONS.items():
+            turns, completed, sheet_calls, usage = run_conversation(name, script, args, worksheet)
+            records.extend(turns)
+            leads.append({"conversation": name, "completed": completed, "sheets_calls": sheet_calls, "usage": usage})
+
+    print(f"{'conversation':<28} {'turns':>5} {'p50 ms':>8} {'p95 ms':>8} {'llm/turn':>9} {'KB/turn':>8} {'sheets':>7} {'saved':>6}")
+    for name in CONVERSATIONS:
+        turns = [r for r in records if r["conversation"] == name]
+        runs = [lead for lead in leads if lead["conversation"] == name]
+        latencies = [r["latency"] * 1000 for r in turns]
+        print(
+            f"{name:<28} {len(turns) // len(runs):>5} {percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f}"
+            f" {statistics.mean(r['llm_calls'] for r in turns):>9.2f}"
+            f" {statistics.mean(r['prompt_bytes'] for r in turns) / 1024:>8.2f}"
+            f" {statistics.mean(lead['sheets_calls'] for lead in runs):>7.1f}"
+            f" {sum(lead['completed'] for lead in runs):>3}/{len(runs)}"
+        )
+
+    latencies = [r["latency"] * 1000 for r in records]
+    completed = [lead for lead in leads if lead["completed"]]
+    purposes = {}
+    for r in records:
+        for purpose in r["purposes"]:
+            purposes[purpose] = purposes.get(purpose, 0) + 1
+    print()
+    print(f"Turns: {len(records)}  p50 {percentile(latencies, 50):.1f} ms  p95 {percentile(latencies, 95):.1f} ms  max {max(latencies):.1f} ms")
+    print(f"LLM calls per turn: {statistics.mean(r['llm_calls'] for r in records):.2f}  by purpose: {purposes}")
+    print(f"Prompt bytes per turn: {statistics.mean(r['prompt_bytes'] for r in records):.0f}")
+    from prompt_render import prompt_stats
+    tokens = prompt_stats()
+    print(f"Prompt tokens by purpose (mean): {({purpose: round(entry['mean_tokens']) for purpose, entry in tokens['by_purpose'].items()})}"
+          f"  fields blocks: {tokens['fields']['tokens']} tokens vs {tokens['fields']['repr_tokens']} as a dict repr")
+    if completed:
+        print(f"Sheets API calls per completed lead: {statistics.mean(lead['sheets_calls'] for lead in completed):.1f}  ({worksheet.calls})")
+    print(f"Leads completed: {len(completed)}/{len(leads)}")
+    usages = [lead["usage"] for lead in leads]
+    print(f"Metered per call (mean): LLM {statistics.mean(u['llm']['input_tokens'] for u in usages):.0f} in / "
+          f"{statistics.mean(u['llm']['output_tokens'] for u in usages):.0f} out tokens, "
+          f"TTS {statistics.mean(u['tts']['characters'] for u in usages):.0f} chars, "
+          f"~${statistics.mean(u['cost_usd']['total'] for u in usages):.5f}")
+    from llm_cache import get_llm_cache
+    if get_llm_cache():
+        print(f"LLM cache: {get_llm_cache().stats()}")
+    if args.voice:
+        print(f"TTS requests: {tts.text_to_speech.requests}  characters: {tts.text_to_speech.characters}")
+
+    if args.trace:
+        print()
+        print(f"{'span':<30} {'count':>6} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for name, histogram in tracing.histograms().items():
+            print(f"{name:<30} {histogram['count']:>6} {histogram['mean_ms']:>8.1f} {histogram['p50_ms']:>8.1f} {histogram['p95_ms']:>8.1f} {histogram['max_ms']:>8.1f}")
+        tracing.export(args.trace)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"turns": records, "leads": leads}, f, indent=2)
+        print(f"Wrote {len(records)} turn records to {args.json}")
+
+if __name__ == "__main__":
+    main()
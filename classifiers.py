@@ -0,0 +1,299 @@
+# classifiers.py
+
+import os
+import re
+import sys
+import json
+import math
+import random
+import threading
+from dotenv import load_dotenv
+from tracing import debug
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+CLASSIFIER_MODEL_PATH = os.getenv("CLASSIFIER_MODEL_PATH", "classifier_model.json")
+# Below this confidence the decision is escalated to the LLM
+CLASSIFIER_THRESHOLD = float(os.getenv("CLASSIFIER_THRESHOLD", "0.65"))
+
+# Keyword and phrase lexicons, matched on whole tokens ("house" doesn't match "warehouse")
+LEAD_TYPE_LEXICON = {
+    "residential": [
+        "house", "houses", "home", "homes", "apartment", "apartments", "flat", "condo", "condos", "villa",
+        "townhouse", "townhome", "bungalow", "duplex", "residential", "live", "living", "family", "kids",
+        "bedroom", "bedrooms", "school", "schools", "backyard", "yard", "place to live", "move in",
+    ],
+    "commercial": [
+        "office", "offices", "business", "company", "commercial", "retail", "shop", "store", "storefront",
+        "warehouse", "industrial", "factory", "showroom", "clinic", "restaurant", "coworking", "employees",
+        "staff", "office space", "headquarters", "startup", "franchise", "lease for our",
+    ],
+}
+
+# Follows the criteria in the interest prompt: any timeline within the year is
+# Hot, engagement is Warm, Cold is reserved for callers who turn us down
+INTEREST_LEXICON = {
+    "Hot": [
+        "asap", "urgent", "urgently", "immediately", "right away", "as soon as possible", "this week",
+        "next week", "this month", "next month", "within a month", "in a few months", "this year",
+        "later this year", "ready to buy", "ready to move", "pre approved", "preapproved", "cash buyer",
+        "schedule a viewing", "when can we", "can we see", "need to move", "lease ends", "relocating",
+        "deadline", "can't wait",
+    ],
+    "Warm": [
+        "interested", "sounds good", "thinking about", "considering", "exploring", "would like",
+        "keep me posted", "send me", "open to", "maybe", "next year", "no rush", "not in a hurry",
+        "just looking", "just browsing",
+    ],
+    "Cold": [
+        "not interested", "no thanks", "no thank you", "not now", "call me later", "stop calling",
+        "don't call", "remove me", "wrong number", "not looking",
+    ],
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+def tokenize(text):
+    return _TOKEN.findall((text or "").lower())
+
+def _compile_lexicon(lexicon):
+    """Lexicon entries as token tuples, grouped by length for n-gram lookup"""
+    compiled = {}
+    for label, phrases in lexicon.items():
+        for phrase in phrases:
+            compiled.setdefault(tuple(tokenize(phrase)), set()).add(label)
+    return compiled
+
+def _ngrams(tokens, sizes):
+    for n in sizes:
+        for i in range(len(tokens) - n + 1):
+            yield tuple(tokens[i:i + n])
+
+class KeywordClassifier:
+    """Counts lexicon phrase hits per label"""
+
+    def __init__(self, lexicon):
+        self.labels = list(lexicon)
+        self.phrases = _compile_lexicon(lexicon)
+        self.sizes = sorted({len(phrase) for phrase in self.phrases})
+
+    def hits(self, tokens):
+        counts = dict.fromkeys(self.labels, 0)
+        matched = []
+        # Longest phrases first so "not interested" isn't also counted as "interested"
+        covered = set()
+        for n in reversed(self.sizes):
+            for i in range(len(tokens) - n + 1):
+                if any(position in covered for position in range(i, i + n)):
+                    continue
+                labels = self.phrases.get(tuple(tokens[i:i + n]))
+                if labels:
+                    for label in labels:
+                        counts[label] += 1
+                    covered.update(range(i, i + n))
+                    matched.append(" ".join(tokens[i:i + n]))
+        return counts, matched
+
+    def predict(self, tokens):
+        """(label, confidence); label is None when nothing matched"""
+        counts, _ = self.hits(tokens)
+        total = sum(counts.values())
+        if not total:
+            return None, 0.0
+        label = max(counts, key=counts.get)
+        # A single clear hit scores 0.67, conflicting hits score lower
+        return label, counts[label] / (total + 0.5)
+
+class LinearClassifier:
+    """
+    Multinomial logistic regression over unigram/bigram and lexicon-hit
+    features, trained with plain SGD. Weights are sparse dicts, so the model
+    stays small and prediction is a handful of dict lookups.
+    """
+
+    def __init__(self, labels, keywords, weights=None, bias=None):
+        self.labels = list(labels)
+        self.keywords = keywords
+        self.weights = weights or {label: {} for label in self.labels}
+        self.bias = bias or dict.fromkeys(self.labels, 0.0)
+
+    def features(self, tokens):
+        features = {}
+        for gram in _ngrams(tokens, (1, 2)):
+            key = " ".join(gram)
+            features[key] = features.get(key, 0) + 1
+        counts, _ = self.keywords.hits(tokens)
+        for label, count in counts.items():
+            if count:
+                features[f"kw:{label}"] = count
+        # Log-scaled counts keep long transcripts from dominating
+        return {key: 1 + math.log(count) for key, count in features.items()}
+
+    def _scores(self, features):
+        return {
+            label: self.bias[label] + sum(self.weights[label].get(key, 0.0) * value for key, value in features.items())
+            for label in self.labels
+        }
+
+    def predict_proba(self, tokens):
+        scores = self._scores(self.features(tokens))
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values())
+        return {label: value / total for label, value in exps.items()}
+
+    def predict(self, tokens):
+        probabilities = self.predict_proba(tokens)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    def train(self, examples, epochs=20, learning_rate=0.2, l2=1e-4, seed=0):
+        """examples: list of (tokens, label)"""
+        data = [(self.features(tokens), label) for tokens, label in examples if label in self.labels]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch * 0.1)
+            for features, label in data:
+                scores = self._scores(features)
+                top = max(scores.values())
+                exps = {l: math.exp(s - top) for l, s in scores.items()}
+                total = sum(exps.values())
+                for l in self.labels:
+                    gradient = exps[l] / total - (1.0 if l == label else 0.0)
+                    weights = self.weights[l]
+                    for key, value in features.items():
+                        weights[key] = weights.get(key, 0.0) * (1 - rate * l2) - rate * gradient * value
+                    self.bias[l] -= rate * gradient
+        # Drop near-zero weights to keep the model file small
+        for l in self.labels:
+            self.weights[l] = {key: round(w, 5) for key, w in self.weights[l].items() if abs(w) > 1e-4}
+
+    def to_dict(self):
+        return {"labels": self.labels, "weights": self.weights, "bias": self.bias}
+
+class Classifier:
+    """
+    One decision (lead type or interest level): the trained linear model when
+    one is available, otherwise the keyword lexicon. predict() returns
+    (label, confidence, confident); callers escalate to the LLM when
+    confident is False.
+    """
+
+    def __init__(self, lexicon, threshold=CLASSIFIER_THRESHOLD):
+        self.keywords = KeywordClassifier(lexicon)
+        self.threshold = threshold
+        self.model = None
+
+    def predict(self, text):
+        tokens = tokenize(text)
+        label, confidence = self.keywords.predict(tokens)
+        if self.model is not None and tokens:
+            label, confidence = self.model.predict(tokens)
+        return label, confidence, label is not None and confidence >= self.threshold
+
+    def new_model(self):
+        return LinearClassifier(self.keywords.labels, self.keywords)
+
+    def load_model(self, data):
+        self.model = LinearClassifier(data["labels"], self.keywords, data["weights"], data["bias"])
+
+_classifiers = None
+_classifiers_lock = threading.Lock()
+
+def get_classifiers():
+    """Lead-type and interest classifiers, with trained models loaded from CLASSIFIER_MODEL_PATH if present"""
+    global _classifiers
+    with _classifiers_lock:
+        if _classifiers is None:
+            classifiers = {
+                "lead_type": Classifier(LEAD_TYPE_LEXICON),
+                "interest": Classifier(INTEREST_LEXICON),
+            }
+            if os.path.exists(CLASSIFIER_MODEL_PATH):
+                try:
+                    with open(CLASSIFIER_MODEL_PATH, "r") as f:
+                        models = json.load(f)
+                    for name, data in models.items():
+                        if name in classifiers:
+                            classifiers[name].load_model(data)
+                    debug(f"[Classifiers] Loaded trained models from {CLASSIFIER_MODEL_PATH}")
+                except Exception as e:
+                    print(f"[Classifiers] Error loading {CLASSIFIER_MODEL_PATH}, using keywords only: {e}")
+            _classifiers = classifiers
+        return _classifiers
+
+def classify_lead_type(text):
+    """("residential" | "commercial" | None, confidence, confident)"""
+    return get_classifiers()["lead_type"].predict(text)
+
+def classify_interest(text):
+    """("Hot" | "Warm" | "Cold" | None, confidence, confident)"""
+    return get_classifiers()["interest"].predict(text)
+
+# Label keys in the training file, per classifier
+TRAINING_LABELS = {"lead_type": "lead_type", "interest": "interest_level"}
+
+def load_training_data(path):
+    """
+    Labeled transcripts, one JSON object per line: a "transcript" (any format
+    batch_extract accepts) or "text", plus "lead_type" and/or "interest_level".
+    Only the caller's side of a transcript is used.
+    """
+    from batch_extract import parse_transcript
+
+    examples = {name: [] for name in TRAINING_LABELS}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "transcript" in record:
+                text = " ".join(content for role, content in parse_transcript(record["transcript"]) if role == "user")
+            else:
+                text = record.get("text", "")
+            tokens = tokenize(text)
+            for name, key in TRAINING_LABELS.items():
+                if record.get(key):
+                    examples[name].append((tokens, record[key]))
+    return examples
+
+def train(path, out=CLASSIFIER_MODEL_PATH, holdout=0.2, seed=0):
+    """Train both models, report holdout accuracy against the keyword baseline, and save them"""
+    examples = load_training_data(path)
+    models = {}
+    for name, data in examples.items():
+        if not data:
+            continue
+        classifier = Classifier(LEAD_TYPE_LEXICON if name == "lead_type" else INTEREST_LEXICON)
+        random.Random(seed).shuffle(data)
+        split = int(len(data) * (1 - holdout)) if len(data) >= 10 else len(data)
+        train_set, test_set = data[:split], data[split:]
+
+        model = classifier.new_model()
+        model.train(train_set)
+        if test_set:
+            model_correct = sum(model.predict(tokens)[0] == label for tokens, label in test_set)
+            keyword_correct = sum(classifier.keywords.predict(tokens)[0] == label for tokens, label in test_set)
+            print(f"[Classifiers] {name}: {len(train_set)} train / {len(test_set)} test, "
+                  f"accuracy {model_correct / len(test_set):.2%} (keywords only {keyword_correct / len(test_set):.2%})")
+        # Final model uses every example
+        model = classifier.new_model()
+        model.train(data)
+        models[name] = model.to_dict()
+
+    with open(out, "w") as f:
+        json.dump(models, f)
+    print(f"[Classifiers] Saved {', '.join(models) or 'no'} model(s) to {out}")
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "train":
+        train(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else CLASSIFIER_MODEL_PATH)
+    elif len(sys.argv) >= 3 and sys.argv[1] == "predict":
+        text = " ".join(sys.argv[2:])
+        print("lead type:", classify_lead_type(text))
+        print("interest:", classify_interest(text))
+    else:
+        print("Usage: python classifiers.py train labeled.jsonl [model.json] | predict <text>")
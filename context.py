@@ -0,0 +1,154 @@
+# context.py
+
+import os
+import asyncio
+from dotenv import load_dotenv
+from tracing import debug
+from langchain_core.messages import HumanMessage
+from prompts import summary_prompt
+
+# Load environment variables
+load_dotenv()
+
+# Number of most recent messages kept verbatim in prompts
+CONTEXT_MAX_MESSAGES = int(os.getenv("AGENT_CONTEXT_MESSAGES", "12"))
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), cheap enough to run on every prompt"""
+    return (len(text) + 3) // 4
+
+def format_message(msg):
+    return f"{'User' if isinstance(msg, HumanMessage) else 'Agent'}: {msg.content}"
+
+class ConversationContext:
+    """
+    Bounded conversation transcript for prompts: the last max_messages
+    messages verbatim plus a rolling summary of everything older, built with
+    summary_prompt. Older messages are folded into the summary in chunks of
+    max_messages // 2, so summarization runs every few turns rather than every
+    turn. The rendered transcript is cached until a new message arrives; the
+    cache is keyed on the message count and the last message itself, so a
+    replaced history of the same length is rendered again.
+    """
+
+    def __init__(self, invoke=None, ainvoke=None, max_messages=CONTEXT_MAX_MESSAGES):
+        self.invoke = invoke  # Callable(prompt) -> LLM response, used for summaries
+        self.ainvoke = ainvoke
+        self.max_messages = max_messages
+        self.summary = ""
+        self.summarized_upto = 0  # Number of messages folded into the summary
+        self._rendered = None
+        self._rendered_for = None  # (len(memory), last message) the cached render was built for
+        self._prepared_for = None  # Same key, once aprepare has run for it
+        self.full_tokens = 0  # Tokens an unbounded transcript would have cost
+        self.rendered_tokens = 0  # Tokens actually rendered
+        self.renders = 0
+        self.summaries = 0
+
+    @staticmethod
+    def _key(memory):
+        return len(memory), memory[-1] if memory else None
+
+    @staticmethod
+    def _matches(key, memory):
+        """Whether key was taken for this memory; the last message is compared by identity"""
+        return key is not None and key[0] == len(memory) and key[1] is (memory[-1] if memory else None)
+
+    def _fold_range(self, memory):
+        """Messages that should be folded into the summary now, as (start, end)"""
+        if not self.invoke and not self.ainvoke:
+            return None
+        if len(memory) - self.summarized_upto <= self.max_messages:
+            return None
+        keep = max(self.max_messages // 2, 1)
+        return self.summarized_upto, len(memory) - keep
+
+    def _summary_prompt(self, memory, start, end):
+        convo_log = "\n".join(format_message(msg) for msg in memory[start:end])
+        if self.summary:
+            convo_log = f"(Earlier: {self.summary})\n{convo_log}"
+        return summary_prompt.format(convo_log=convo_log)
+
+    def _apply_summary(self, response, end):
+        self.summary = (response.content if hasattr(response, 'content') else str(response)).strip()
+        self.summarized_upto = end
+        self.summaries += 1
+        debug(f"[Context] Summarized conversation up to message {end}: {self.summary}")
+
+    def prepare(self, memory):
+        """Fold older messages into the summary if the verbatim window is full"""
+        fold = self._fold_range(memory)
+        if not fold:
+            return
+        start, end = fold
+        if not self.invoke:
+            return
+        try:
+            self._apply_summary(self.invoke(self._summary_prompt(memory, start, end)), end)
+        except Exception as e:
+            # Keep the messages verbatim and try again next turn
+            print(f"[Context] Error summarizing conversation: {e}")
+
+    async def aprepare(self, memory):
+        """
+        Async prepare, for use at the start of an async turn. The following
+        render() doesn't summarize again, even if this failed, so a blocking
+        LLM call never runs on the event loop.
+        """
+        fold = self._fold_range(memory)
+        self._prepared_for = self._key(memory)
+        if not fold:
+            return
+        start, end = fold
+        try:
+            if self.ainvoke:
+                response = await self.ainvoke(self._summary_prompt(memory, start, end))
+            else:
+                response = await asyncio.to_thread(self.invoke, self._summary_prompt(memory, start, end))
+            self._apply_summary(response, end)
+        except Exception as e:
+            # Keep the messages verbatim and try again next turn
+            print(f"[Context] Error summarizing conversation: {e}")
+
+    def render(self, memory):
+        """Transcript for prompts; rendered once per new message and cached"""
+        if self._rendered is not None and self._matches(self._rendered_for, memory):
+            return self._rendered
+
+        if not self._matches(self._prepared_for, memory):
+            self.prepare(memory)
+        lines = []
+        if self.summary:
+            lines.append(f"Summary of earlier conversation: {self.summary}")
+        lines.extend(format_message(msg) for msg in memory[self.summarized_upto:])
+        self._rendered = "\n".join(lines)
+        self._rendered_for = self._key(memory)
+
+        full = estimate_tokens(str([format_message(msg) for msg in memory]))
+        rendered = estimate_tokens(self._rendered)
+        self.full_tokens += full
+        self.rendered_tokens += rendered
+        self.renders += 1
+        debug(f"[Context] Transcript tokens: {full} full -> {rendered} rendered")
+        return self._rendered
+
+    def to_state(self):
+        """The rolling summary; the rendered transcript is rebuilt on demand"""
+        return {"summary": self.summary, "upto": self.summarized_upto}
+
+    def load_state(self, state):
+        self.summary = state.get("summary", "")
+        self.summarized_upto = state.get("upto", 0)
+        self._rendered = None
+        self._rendered_for = None
+        self._prepared_for = None
+
+    def stats(self):
+        """Prompt token counts for the transcript, before (full history) and after (bounded)"""
+        return {
+            "renders": self.renders,
+            "summaries": self.summaries,
+            "full_tokens": self.full_tokens,
+            "rendered_tokens": self.rendered_tokens,
+            "saved_tokens": self.full_tokens - self.rendered_tokens,
+        }
@@ -0,0 +1,347 @@
+# duplex.py
+"""
+Full-duplex voice calls on the local microphone and speakers.
+
+The microphone is read continuously, so the caller can talk over the agent:
+speech during playback stops the audio and cancels the remaining synthesis,
+and speech while a reply is still being generated cancels that turn (its
+text is answered together with what the caller says next). Turns run on a
+copy of the agent and are only adopted once they finish, so an interrupted
+turn never leaves half-applied state - a copy that completes the call only
+logs the lead once it is adopted. When a transcript segment lands during
+a pause, the turn is started on the partial text; if that turns out to be
+everything the caller said, its reply is used and the LLM time overlaps the
+endpointing silence. Audio for the canned replies most likely to come next
+is synthesized while the caller talks (TTS_SPECULATE).
+
+    python duplex.py 5551234567
+
+Use a headset: there is no echo cancellation, so the agent's own voice on
+the speakers can count as barge-in (DUPLEX_BARGE_IN_MS raises the bar while
+the agent is talking).
+"""
+
+import os
+import sys
+import time
+import queue
+import asyncio
+import threading
+import speech_recognition as sr
+from dotenv import load_dotenv
+from agents import RealEstateAgent
+from prompts import REPEAT_REQUEST_REPLY, SAVE_FAILED_REPLY
+from speech import speak_stream, stream_utterance, DEFAULT_VOICE_ID
+from speculative_tts import make_speculator
+from vad import make_vad, Endpointer, VAD_SAMPLE_RATE, VAD_FRAME_MS, VAD_START_MS
+from tracing import record, debug
+import metering
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+DUPLEX_BARGE_IN_MS = int(os.getenv("DUPLEX_BARGE_IN_MS", "300"))  # Speech needed to interrupt the agent
+DUPLEX_LISTEN_TIMEOUT = float(os.getenv("DUPLEX_LISTEN_TIMEOUT", "15"))  # Seconds of silence before giving up on a turn
+DUPLEX_SPECULATE = os.getenv("DUPLEX_SPECULATE", "true").lower() in ("1", "true", "yes")
+DUPLEX_MAX_SILENT_TURNS = 2
+DUPLEX_PHRASE_LIMIT = 30  # Seconds
+DUPLEX_OUTPUT_FORMAT = f"pcm_{VAD_SAMPLE_RATE}"
+PLAYBACK_CHUNK = VAD_SAMPLE_RATE * 2 // 50  # 20 ms of 16-bit mono, so stop() takes effect quickly
+
+class MicrophoneFrames:
+    """Reads the microphone on a background thread, so capture never pauses while the agent talks or thinks"""
+
+    def __init__(self, sample_rate=VAD_SAMPLE_RATE, frame_ms=VAD_FRAME_MS):
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.microphone = sr.Microphone(sample_rate=sample_rate, chunk_size=self.frame_samples)
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.frames = queue.Queue()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        source = self.microphone.__enter__()
+        self.sample_rate = source.SAMPLE_RATE
+        self.sample_width = source.SAMPLE_WIDTH
+        self._thread = threading.Thread(target=self._run, args=(source,), name="duplex-microphone", daemon=True)
+        self._thread.start()
+
+    def _run(self, source):
+        while not self._stopped.is_set():
+            self.frames.put(source.stream.read(self.frame_samples))
+
+    def read(self):
+        while not self._stopped.is_set():
+            try:
+                return self.frames.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        raise EOFError("Microphone stopped")
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+        self.microphone.__exit__(None, None, None)
+
+class SpeakerPlayer:
+    """Plays 16-bit mono PCM on the default output device"""
+
+    def __init__(self, sample_rate=VAD_SAMPLE_RATE):
+        import pyaudio
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, output=True)
+
+    def write(self, pcm):
+        self._stream.write(pcm)
+
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._audio.terminate()
+
+class DuplexCall:
+    """
+    One call with capture, generation and playback running concurrently.
+    microphone needs start()/read()/stop() and sample_rate/sample_width;
+    player needs write(pcm)/close().
+    """
+
+    def __init__(self, agent, microphone=None, player=None, voice_id=DEFAULT_VOICE_ID, speculate=DUPLEX_SPECULATE):
+        self.agent = agent
+        self.meter = agent.meter  # Shared by the turn copies, so interrupted turns are still billed
+        self.microphone = microphone or MicrophoneFrames()
+        self.player = player or SpeakerPlayer()
+        self.voice_id = voice_id
+        self.speculate = speculate
+        self.speculative_audio = make_speculator(voice_id=voice_id, output_format=DUPLEX_OUTPUT_FORMAT)
+        self.loop = None
+        self.speaking = False
+        self.barge_ins = 0
+        self.speculations_used = 0
+        self.dead_air = []  # Seconds from the end of the caller's speech to the agent's first audio
+        self._pending = ""  # Text of a turn that was interrupted before it was answered
+        self._endpointer = None
+        self._responding = None
+        self._speculation = None  # (text, task)
+        self._playback = None  # (thread, stop event)
+        self._speech_ended_at = None
+
+    # Playback
+
+    def _play(self, text):
+        """Start speaking text on a background thread"""
+        stop = threading.Event()
+        self.speaking = True
+        if self._endpointer and not self._endpointer.started:
+            # The caller has to mean it to talk over the agent (and not be our own echo)
+            self._endpointer.start_ms = DUPLEX_BARGE_IN_MS
+        thread = threading.Thread(target=metering.bind(self._run_playback), args=(text, stop, self._speech_ended_at), name="duplex-playback", daemon=True)
+        self._playback = (thread, stop)
+        thread.start()
+
+    def _run_playback(self, text, stop, speech_ended_at):
+        audio = self.speculative_audio.take(text) if self.speculative_audio else None
+        if audio:
+            chunks = (chunk for chunk in (audio,))
+        else:
+            chunks = speak_stream(text, self.voice_id, output_format=DUPLEX_OUTPUT_FORMAT)
+        buffer = b""
+        try:
+            for chunk in chunks:
+                buffer += chunk
+                # Whole 16-bit samples only; an odd byte waits for the next chunk
+                playable = len(buffer) // 2 * 2
+                for i in range(0, playable, PLAYBACK_CHUNK):
+                    if stop.is_set():
+                        return
+                    if speech_ended_at is not None:
+                        dead_air = time.perf_counter() - speech_ended_at
+                        self.dead_air.append(dead_air)
+                        record("duplex.dead_air", dead_air)
+                        debug(f"[Duplex] Dead air: {dead_air:.3f}s")
+                        speech_ended_at = None
+                    self.player.write(buffer[i:min(i + PLAYBACK_CHUNK, playable)])
+                buffer = buffer[playable:]
+        except Exception as e:
+            print(f"[Duplex] Playback failed: {e}")
+        finally:
+            # Closing the generator cancels synthesis of the remaining sentences
+            chunks.close()
+            self.speaking = False
+            endpointer = self._endpointer
+            if endpointer and not endpointer.started:
+                endpointer.start_ms = VAD_START_MS
+
+    def _stop_playback(self):
+        if self._playback and not self._playback[1].is_set() and self._playback[0].is_alive():
+            self._playback[1].set()
+            return True
+        return False
+
+    async def _wait_for_playback(self):
+        if self._playback:
+            await asyncio.to_thread(self._playback[0].join)
+
+    # Capture
+
+    def _listen(self):
+        """Start capturing the caller's next utterance; returns a task"""
+        endpointer = Endpointer(
+            make_vad(self.microphone.sample_rate), VAD_FRAME_MS, timeout=DUPLEX_LISTEN_TIMEOUT,
+            max_speech=DUPLEX_PHRASE_LIMIT, start_ms=DUPLEX_BARGE_IN_MS if self.speaking else VAD_START_MS
+        )
+        self._endpointer = endpointer
+        self._speculation = None
+        return asyncio.ensure_future(asyncio.to_thread(self._capture, endpointer))
+
+    def _capture(self, endpointer):
+        try:
+            return stream_utterance(
+                self.microphone.read, self.microphone.sample_rate, self.microphone.sample_width,
+                endpointer=endpointer,
+                on_speech_start=lambda: self.loop.call_soon_threadsafe(self._barge_in),
+                on_partial=lambda text: self.loop.call_soon_threadsafe(self._speculate, text, endpointer)
+            )
+        except (sr.WaitTimeoutError, EOFError):
+            return None
+
+    def _barge_in(self):
+        """The caller started talking: stop the agent mid-sentence and drop a reply still being generated"""
+        if self.speculative_audio:
+            # Synthesize the likely next replies while the caller talks
+            self.speculative_audio.speculate(self.agent.next_reply_candidates(self.speculative_audio.count))
+        interrupted = self._stop_playback()
+        if self._responding and not self._responding.done():
+            self._responding.cancel()
+            interrupted = True
+        if interrupted:
+            self.barge_ins += 1
+            debug("[Duplex] Caller barged in")
+
+    # Turns
+
+    async def _respond(self, text):
+        """Run a turn on a copy of the agent, so an interrupted turn leaves the real one untouched"""
+        planned = set(self.agent.planned_questions)
+        agent = RealEstateAgent.from_state(self.agent.to_state(), llm=self.agent.llm, single_call=self.agent.single_call)
+        agent.meter = self.meter
+        agent.defer_logging = True
+        reply = await agent.aprocess_message(text)
+        return agent, reply, planned
+
+    async def _adopt(self, agent, reply, planned):
+        """Make a finished turn's copy the real agent; returns the reply to speak"""
+        # Questions planned on the real agent while the turn ran (barge-in speculation) carry over
+        for field, question in self.agent.planned_questions.items():
+            if field not in planned:
+                agent.planned_questions.setdefault(field, question)
+        agent.defer_logging = False
+        self.agent = agent
+        if agent.log_pending:
+            agent.log_pending = False
+            if not await asyncio.to_thread(agent.log_to_sheet):
+                return SAVE_FAILED_REPLY
+        return reply
+
+    def _join(self, text):
+        return " ".join(part for part in (self._pending, text) if part)
+
+    def _speculate(self, text, endpointer):
+        """A segment landed during a pause: start answering what the caller has said so far"""
+        if not self.speculate or endpointer is not self._endpointer or endpointer.silence_ms == 0:
+            return
+        if self._speculation:
+            self._speculation[1].cancel()
+        text = self._join(text)
+        self._speculation = (text, asyncio.ensure_future(self._respond(text)))
+
+    def _take_speculation(self, text):
+        """The speculative turn for text, if one was started on exactly that text"""
+        speculation, self._speculation = self._speculation, None
+        if speculation and speculation[0] == text:
+            self.speculations_used += 1
+            debug("[Duplex] Using the reply started from the partial transcript")
+            return speculation[1]
+        if speculation:
+            speculation[1].cancel()
+        return None
+
+    def _finished(self):
+        return self.agent.required_fields.get("Call Outcome") == "Information Gathered"
+
+    async def run(self):
+        """Run the call until the lead is complete or the caller stays silent"""
+        # Everything started from here (turns, capture, playback) is billed to this call
+        with metering.session(self.meter):
+            await self._converse()
+        self.agent.dump_usage()
+
+    async def _converse(self):
+        self.loop = asyncio.get_running_loop()
+        self.microphone.start()
+        listening = None
+        try:
+            reply = await self.agent.aprocess_message("")
+            listening = self._listen()
+            silent_turns = 0
+            while True:
+                if reply:
+                    print(f"Agent: {reply}")
+                    self._play(reply)
+                if self._finished():
+                    await self._wait_for_playback()
+                    break
+
+                details = await listening
+                if not details:
+                    silent_turns += 1
+                    if silent_turns >= DUPLEX_MAX_SILENT_TURNS:
+                        debug("[Duplex] No response from the caller, ending the call")
+                        break
+                    listening, reply = self._listen(), None
+                    continue
+                silent_turns = 0
+                text = self._join(details["text"])
+                print(f"User: {text}")
+                self._speech_ended_at = time.perf_counter() - details["speech_to_text"]
+
+                self._responding = self._take_speculation(text) or asyncio.ensure_future(self._respond(text))
+                # Keep listening while the reply is generated and spoken
+                listening = self._listen()
+                await asyncio.wait({self._responding})
+                responding, self._responding = self._responding, None
+                if responding.cancelled():
+                    # Answered together with whatever the caller is saying now
+                    self._pending, reply = text, None
+                    continue
+                try:
+                    reply = await self._adopt(*responding.result())
+                except Exception as e:
+                    print(f"[Duplex] Turn failed: {e}")
+                    self._pending, reply = text, REPEAT_REQUEST_REPLY
+                    continue
+                self._pending = ""
+        finally:
+            self._stop_playback()
+            for task in (listening, self._speculation and self._speculation[1]):
+                if task:
+                    task.cancel()
+            self.microphone.stop()
+            self.player.close()
+            if self.speculative_audio:
+                self.speculative_audio.close()
+        if self.dead_air:
+            debug(f"[Duplex] Mean dead air {sum(self.dead_air) / len(self.dead_air):.3f}s over {len(self.dead_air)} turn(s), "
+                  f"{self.barge_ins} barge-in(s), {self.speculations_used} speculative reply(ies) used")
+        if self.speculative_audio:
+            debug(f"[Duplex] Speculative TTS: {self.speculative_audio.stats()}")
+
+if __name__ == "__main__":
+    phone = sys.argv[1] if len(sys.argv) > 1 else None
+    try:
+        asyncio.run(DuplexCall(RealEstateAgent(initial_phone=phone)).run())
+    except KeyboardInterrupt:
+        print("\nCall ended.")
@@ -0,0 +1,141 @@
+# fast_extract.py
+
+import re
+
+# Precompiled patterns for answers we can extract without the LLM
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+PHONE_PATTERN = re.compile(r'\+?\(?\d[\d\s\-\(\)]{5,}\d')
+AMOUNT = r'\$?\s?\d+(?:[.,]\d+)*\s?(?:k|m|mn|million|thousand|lakh|lac|crore|cr)?\b'
+BUDGET_PATTERN = re.compile(
+    rf'(?:(?:between|from)\s+)?{AMOUNT}(?:\s*(?:-|to|and)\s*{AMOUNT})?',
+    re.IGNORECASE
+)
+MONEY_HINT = re.compile(r'[$]|\d\s?(?:k|m|mn|million|thousand|lakh|lac|crore|cr)\b', re.IGNORECASE)
+NUMBER_WORDS = r'(?:\d+|one|two|three|four|five|six|seven|eight|nine|ten|a|an)'
+BEDROOM_PATTERN = re.compile(rf'\b{NUMBER_WORDS}[\s-]?(?:bed(?:room)?s?|br|bhk)\b', re.IGNORECASE)
+BATHROOM_PATTERN = re.compile(rf'\b{NUMBER_WORDS}[\s-]?(?:bath(?:room)?s?|ba)\b', re.IGNORECASE)
+AREA_PATTERN = re.compile(
+    r'\b\d[\d,]*(?:\.\d+)?\s?(?:sq\.?\s?ft|sqft|sq\.?\s?feet|square\s(?:feet|foot|ft)|sq\.?\s?m|square\s(?:meters?|metres?)|marlas?|kanals?|acres?)\b',
+    re.IGNORECASE
+)
+TIMELINE_PATTERN = re.compile(
+    rf'\b(?:(?:(?:within|in|over)\s+(?:the\s+)?)?(?:next\s+)?{NUMBER_WORDS}(?:\s?-\s?\d+)?\s+(?:days?|weeks?|months?|years?)'
+    r'|(?:next|this|coming)\s+(?:week|month|year|spring|summer|fall|autumn|winter|quarter)'
+    r'|(?:immediately|asap|as soon as possible|right away|right now|soon)'
+    r'|(?:by|before|in)\s+(?:january|february|march|april|may|june|july|august|september|october|november|december|the end of the year|year end)'
+    r'|(?:no rush|not in a hurry|just (?:looking|browsing|exploring)))\b',
+    re.IGNORECASE
+)
+# Only introductions that name a person; "it's ...", "this is ..." and "call me ..." answer other questions too
+NAME_PATTERN = re.compile(r"\b(?i:my name is|i am|i'm)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})")
+BARE_NAME_PATTERN = re.compile(r'^[A-Za-z]+(?:\s+[A-Za-z]+){0,2}$')
+YES_PATTERN = re.compile(r'^(?:yes|yeah|yep|yup|sure|correct|right|of course|absolutely|i am|that\'s me)\b', re.IGNORECASE)
+NO_PATTERN = re.compile(r'^(?:no|nope|not really|nah|not me)\b', re.IGNORECASE)
+
+# Words that carry no information on their own ("my budget is about 500k")
+FILLER_WORDS = {
+    "a", "an", "the", "my", "our", "its", "it's", "it", "is", "am", "are", "i", "i'm", "we", "we're",
+    "me", "to", "of", "for", "and", "or", "with", "at", "on", "about", "around", "roughly",
+    "approximately", "maybe", "probably", "like", "just", "so", "um", "uh", "well", "ok", "okay",
+    "yes", "yeah", "sure", "please", "thanks", "thank", "you", "budget", "range", "price",
+    "email", "e-mail", "address", "phone", "number", "contact", "looking", "want", "need",
+    "would", "be", "can", "could", "up", "max", "maximum", "minimum", "least",
+    "size", "space", "timeline", "move", "buy", "purchase", "planning", "plan", "hoping",
+    "name", "this", "call", "that's", "there", "here", "go", "ideally", "something",
+}
+
+# Property words that must never be taken for a name
+PROPERTY_WORDS = {
+    "residential", "commercial", "house", "home", "apartment", "flat", "condo", "villa", "plot",
+    "office", "retail", "shop", "industrial", "warehouse", "building", "land", "studio",
+}
+
+# Fields that can be answered with a bare yes/no
+YES_NO_FIELDS = {"Decision Maker", "Follow-up Required"}
+
+def _strip(message, spans):
+    """Remove matched spans and return the remaining informative words"""
+    remaining = message
+    for start, end in sorted(spans, reverse=True):
+        remaining = remaining[:start] + " " + remaining[end:]
+    words = re.findall(r"[a-zA-Z][a-zA-Z'\-]*", remaining.lower())
+    return [word for word in words if word not in FILLER_WORDS]
+
+def fast_extract(message, target_field=None, name_known=False):
+    """
+    Rule-based extraction for short, unambiguous answers.
+    Returns (fields, complete): the fields found and whether the rules
+    account for the whole message. Only when complete is True can the
+    caller skip the LLM extraction; otherwise the message has content the
+    rules don't understand, or doesn't answer target_field.
+    An introduction ("I'm Sarah") only counts as the name when we asked for
+    it, or when no other field was asked and the name is still unknown.
+    """
+    message = (message or "").strip()
+    if not message:
+        return {}, False
+
+    fields = {}
+    spans = []
+
+    for match in EMAIL_PATTERN.finditer(message):
+        fields.setdefault("Email", match.group(0))
+        spans.append(match.span())
+
+    for match in PHONE_PATTERN.finditer(message):
+        start, end = match.span()
+        if any(start < s_end and end > s_start for s_start, s_end in spans):
+            continue
+        digits = re.sub(r'\D', '', match.group(0))
+        if 7 <= len(digits) <= 15:
+            fields.setdefault("Phone", match.group(0).strip())
+            spans.append((start, end))
+
+    size_parts = []
+    for pattern in (BEDROOM_PATTERN, BATHROOM_PATTERN, AREA_PATTERN):
+        for match in pattern.finditer(message):
+            size_parts.append(match.group(0).strip())
+            spans.append(match.span())
+    if size_parts:
+        fields["Property Size"] = ", ".join(size_parts)
+
+    for match in TIMELINE_PATTERN.finditer(message):
+        fields.setdefault("Timeline", match.group(0).strip())
+        spans.append(match.span())
+
+    # Budget: amounts that look like money, or any amount when we asked for the budget
+    covered = list(spans)
+    for match in BUDGET_PATTERN.finditer(message):
+        start, end = match.span()
+        if any(start < c_end and end > c_start for c_start, c_end in covered):
+            continue
+        amount = match.group(0).strip()
+        if not re.search(r'\d', amount):
+            continue
+        if MONEY_HINT.search(amount) or target_field == "Budget Range" or "budget" in message.lower():
+            fields.setdefault("Budget Range", amount)
+            spans.append(match.span())
+
+    name_match = NAME_PATTERN.search(message)
+    if name_match and (target_field == "Name" or (target_field is None and not name_known)):
+        fields["Name"] = name_match.group(1)
+        spans.append(name_match.span())
+    elif target_field == "Name" and not fields and BARE_NAME_PATTERN.match(message):
+        words = message.lower().split()
+        if not any(word in FILLER_WORDS or word in PROPERTY_WORDS for word in words) and not YES_PATTERN.match(message) and not NO_PATTERN.match(message):
+            fields["Name"] = message
+            spans.append((0, len(message)))
+
+    if target_field in YES_NO_FIELDS and not fields:
+        if YES_PATTERN.match(message):
+            fields[target_field] = "Yes"
+            spans.append(YES_PATTERN.match(message).span())
+        elif NO_PATTERN.match(message):
+            fields[target_field] = "No"
+            spans.append(NO_PATTERN.match(message).span())
+
+    complete = bool(fields) and not _strip(message, spans)
+    # An answer that doesn't fill the field we asked about needs the LLM
+    if target_field and target_field not in fields:
+        complete = False
+    return fields, complete
@@ -0,0 +1,230 @@
+# lead_store.py
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+LEAD_STORE = os.getenv("LEAD_STORE", "true").lower() in ("1", "true", "yes")
+LEAD_STORE_PATH = os.getenv("LEAD_STORE_PATH", "leads.db")
+
+# Sheet columns, in the order log_lead writes them
+LEAD_COLUMNS = [
+    "UID", "Name", "Email", "Phone", "Location", "Budget", "Property Type", "Property Size",
+    "Timeline", "Interest", "Status", "Created Date", "Last Contact Date", "Lead Type", "Use Case",
+    "Company", "Position", "Industry", "Company Size", "Decision Maker", "Next Follow-up",
+    "Follow-up Required", "Call Outcome", "Notes", "Lead Source", "Competitors",
+]
+
+def normalize_email(email):
+    """Normalize an email address for index lookups"""
+    if not email or not isinstance(email, str) or email == "Not provided":
+        return None
+    return email.strip().lower() or None
+
+def normalize_phone(phone):
+    """Normalize a phone number to its digits for index lookups"""
+    if not phone or phone == "Not provided":
+        return None
+    digits = re.sub(r'\D', '', str(phone))
+    return digits or None
+
+def _sheet_value(value):
+    # What a value looks like once it has been through the sheet
+    return "" if value is None else str(value)
+
+class LeadStore:
+    """
+    SQLite system of record for leads. Saves are local and never fail because
+    Sheets is down; each row carries a version and the version last pushed to
+    the sheet, so anything not yet synced is one indexed query away.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or LEAD_STORE_PATH
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leads ("
+                "id INTEGER PRIMARY KEY, uid TEXT, email TEXT, phone TEXT, data TEXT NOT NULL, "
+                "version INTEGER NOT NULL DEFAULT 1, synced_version INTEGER NOT NULL DEFAULT 0, "
+                "sheet_row INTEGER, updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS leads_uid ON leads (uid)")
+            conn.execute("CREATE INDEX IF NOT EXISTS leads_email ON leads (email)")
+            conn.execute("CREATE INDEX IF NOT EXISTS leads_phone ON leads (phone)")
+            conn.execute("CREATE INDEX IF NOT EXISTS leads_pending ON leads (id) WHERE version != synced_version")
+            conn.execute("CREATE TABLE IF NOT EXISTS sync_lease (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)")
+
+    def _conn(self):
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so find-then-write is atomic across processes
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _find_id(self, conn, uid=None, email=None, phone=None):
+        for column, value in (("uid", uid and str(uid)), ("email", normalize_email(email)), ("phone", normalize_phone(phone))):
+            if value:
+                row = conn.execute(f"SELECT id FROM leads WHERE {column} = ? ORDER BY id LIMIT 1", (value,)).fetchone()
+                if row:
+                    return row[0]
+        return None
+
+    def _keys(self, data):
+        uid = str(data.get("UID") or "").strip() or None
+        return uid, normalize_email(data.get("Email")), normalize_phone(data.get("Phone"))
+
+    def save(self, data, match_email=True):
+        """
+        Insert or update a lead (a dict keyed by LEAD_COLUMNS), matched on UID
+        and, with match_email, on email. Marks it for the next sync; returns its id.
+        """
+        uid, email, phone = self._keys(data)
+        with self._transaction() as conn:
+            lead_id = self._find_id(conn, uid=uid, email=email if match_email else None)
+            if lead_id is None:
+                cursor = conn.execute(
+                    "INSERT INTO leads (uid, email, phone, data, updated) VALUES (?, ?, ?, ?, ?)",
+                    (uid, email, phone, json.dumps(data, ensure_ascii=False), time.time())
+                )
+                return cursor.lastrowid
+            conn.execute(
+                "UPDATE leads SET uid = ?, email = ?, phone = ?, data = ?, version = version + 1, updated = ? WHERE id = ?",
+                (uid, email, phone, json.dumps(data, ensure_ascii=False), time.time(), lead_id)
+            )
+            return lead_id
+
+    def find(self, uid=None, email=None, phone=None):
+        """The stored lead matching the UID, email or phone, with its sheet "row" if known"""
+        conn = self._conn()
+        lead_id = self._find_id(conn, uid, email, phone)
+        if lead_id is None:
+            return None
+        data, sheet_row = conn.execute("SELECT data, sheet_row FROM leads WHERE id = ?", (lead_id,)).fetchone()
+        record = json.loads(data)
+        if sheet_row:
+            record["row"] = sheet_row
+        return record
+
+    def all(self):
+        """Every stored lead, oldest first"""
+        return [json.loads(data) for (data,) in self._conn().execute("SELECT data FROM leads ORDER BY id")]
+
+    def pending(self, limit=100):
+        """Leads changed since they were last pushed: (id, version, data, sheet_row)"""
+        rows = self._conn().execute(
+            "SELECT id, version, data, sheet_row FROM leads WHERE version != synced_version ORDER BY id LIMIT ?", (limit,)
+        ).fetchall()
+        return [(lead_id, version, json.loads(data), sheet_row) for lead_id, version, data, sheet_row in rows]
+
+    def is_synced(self, lead_id):
+        """Whether the lead's latest version has been pushed to the sheet"""
+        row = self._conn().execute("SELECT version = synced_version FROM leads WHERE id = ?", (lead_id,)).fetchone()
+        return bool(row and row[0])
+
+    def mark_synced(self, results):
+        """
+        Record pushed leads: (id, version pushed, sheet row). A lead saved again
+        while the push was in flight keeps its newer version and stays pending.
+        """
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE leads SET synced_version = ?, sheet_row = COALESCE(?, sheet_row) WHERE id = ?",
+                [(version, sheet_row, lead_id) for lead_id, version, sheet_row in results]
+            )
+
+    def merge_remote(self, records):
+        """
+        Apply rows read from the sheet: (sheet row, record dict). New leads are
+        added and edits made in the sheet replace the local copy, unless the
+        local copy has unpushed changes - those win and overwrite the sheet on
+        the next push. Returns the number of leads added or changed.
+        """
+        changed = 0
+        now = time.time()
+        with self._transaction() as conn:
+            for sheet_row, record in records:
+                uid, email, phone = self._keys(record)
+                if not (uid or email or phone):
+                    continue
+                lead_id = self._find_id(conn, uid, email, phone)
+                data = {column: record.get(column, "") for column in LEAD_COLUMNS}
+                if lead_id is None:
+                    conn.execute(
+                        "INSERT INTO leads (uid, email, phone, data, version, synced_version, sheet_row, updated) "
+                        "VALUES (?, ?, ?, ?, 1, 1, ?, ?)",
+                        (uid, email, phone, json.dumps(data, ensure_ascii=False), sheet_row, now)
+                    )
+                    changed += 1
+                    continue
+
+                local, version, synced_version = conn.execute(
+                    "SELECT data, version, synced_version FROM leads WHERE id = ?", (lead_id,)
+                ).fetchone()
+                if version != synced_version:
+                    conn.execute("UPDATE leads SET sheet_row = ? WHERE id = ?", (sheet_row, lead_id))
+                    continue
+                local = json.loads(local)
+                if all(_sheet_value(local.get(column)) == _sheet_value(data[column]) for column in LEAD_COLUMNS):
+                    conn.execute("UPDATE leads SET sheet_row = ? WHERE id = ?", (sheet_row, lead_id))
+                    continue
+                conn.execute(
+                    "UPDATE leads SET uid = ?, email = ?, phone = ?, data = ?, version = version + 1, "
+                    "synced_version = synced_version + 1, sheet_row = ?, updated = ? WHERE id = ?",
+                    (uid, email, phone, json.dumps(data, ensure_ascii=False), sheet_row, now, lead_id)
+                )
+                changed += 1
+        return changed
+
+    def acquire_lease(self, owner, ttl, name="sheets"):
+        """Take or renew a named lease so only one process syncs a shared store at a time"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT owner, expires FROM sync_lease WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                return False
+            conn.execute("INSERT OR REPLACE INTO sync_lease (name, owner, expires) VALUES (?, ?, ?)", (name, owner, now + ttl))
+            return True
+
+    def stats(self):
+        conn = self._conn()
+        leads = conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+        pending = conn.execute("SELECT COUNT(*) FROM leads WHERE version != synced_version").fetchone()[0]
+        return {"leads": leads, "pending": pending}
+
+_lead_store = None
+_lead_store_lock = threading.Lock()
+
+def get_lead_store():
+    """Get the process-wide lead store, or None if LEAD_STORE is off"""
+    global _lead_store
+    if not LEAD_STORE:
+        return None
+    with _lead_store_lock:
+        if _lead_store is None:
+            _lead_store = LeadStore()
+        return _lead_store
@@ -0,0 +1,206 @@
+# llm_cache.py
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from tracing import debug
+from langchain_core.messages import AIMessage
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory").lower()  # memory, disk or off
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))  # Seconds
+# Purposes whose answers depend only on the prompt. Creative replies (turn,
+# conversation, scheduling, completion) are left uncached so they stay varied.
+LLM_CACHE_PURPOSES = {
+    purpose.strip()
+    for purpose in os.getenv("LLM_CACHE_PURPOSES", "extraction,interest,inference,classification").split(",")
+    if purpose.strip()
+}
+
+# Values that change on every turn but don't change the answer
+_TIMESTAMP = re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?')
+_UUID = re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_prompt(prompt):
+    """Collapse whitespace and mask timestamps and UUIDs so equivalent prompts share a key"""
+    prompt = _TIMESTAMP.sub("<timestamp>", str(prompt))
+    prompt = _UUID.sub("<uuid>", prompt)
+    return _WHITESPACE.sub(" ", prompt).strip()
+
+def llm_cache_key(prompt, model, temperature):
+    payload = json.dumps({
+        "prompt": normalize_prompt(prompt),
+        "model": model,
+        "temperature": temperature,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class MemoryBackend:
+    """In-process LRU of (content, stored_at)"""
+
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, content):
+        with self._lock:
+            self._entries[key] = (content, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+class DiskBackend:
+    """One JSON file per response, so cached answers survive restarts and test replays"""
+
+    def __init__(self, directory=LLM_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry["content"], entry["stored_at"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def put(self, key, content):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"content": content, "stored_at": time.time()}, f)
+        os.replace(tmp_path, path)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+
+class LLMCache:
+    """
+    Memoizes LLM responses by normalized prompt, model and temperature.
+    Only purposes in self.purposes are cached; other calls go straight to
+    the model. Entries older than ttl seconds are treated as misses.
+    """
+
+    def __init__(self, backend, ttl=LLM_CACHE_TTL, purposes=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.purposes = set(LLM_CACHE_PURPOSES if purposes is None else purposes)
+        self._lock = threading.Lock()
+        self._stats = {}  # purpose -> {"hits": n, "misses": n}
+
+    def _count(self, purpose, outcome):
+        with self._lock:
+            counts = self._stats.setdefault(purpose, {"hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+    def _key(self, llm, prompt):
+        model = getattr(llm, "model", None) or type(llm).__name__
+        return llm_cache_key(prompt, model, getattr(llm, "temperature", None))
+
+    def _lookup(self, key, purpose):
+        entry = self.backend.get(key)
+        if entry is not None:
+            content, stored_at = entry
+            if time.time() - stored_at <= self.ttl:
+                self._count(purpose, "hits")
+                debug(f"[LLM Cache] Hit for {purpose}")
+                # Marked so usage metering doesn't bill it
+                return AIMessage(content=content, response_metadata={"cached": True})
+            self.backend.delete(key)
+        self._count(purpose, "misses")
+        return None
+
+    def _store(self, key, response):
+        content = response.content if hasattr(response, 'content') else str(response)
+        if isinstance(content, str) and content.strip():
+            self.backend.put(key, content)
+
+    def invoke(self, llm, prompt, purpose):
+        """llm.invoke(prompt), answered from the cache when possible"""
+        if purpose not in self.purposes:
+            return llm.invoke(prompt)
+        key = self._key(llm, prompt)
+        cached = self._lookup(key, purpose)
+        if cached is not None:
+            return cached
+        response = llm.invoke(prompt)
+        self._store(key, response)
+        return response
+
+    async def ainvoke(self, llm, prompt, purpose):
+        """Async counterpart of invoke"""
+        if purpose not in self.purposes:
+            return await llm.ainvoke(prompt)
+        key = self._key(llm, prompt)
+        cached = self._lookup(key, purpose)
+        if cached is not None:
+            return cached
+        response = await llm.ainvoke(prompt)
+        self._store(key, response)
+        return response
+
+    def stats(self):
+        """Hit/miss counts and hit rate, overall and per purpose"""
+        with self._lock:
+            by_purpose = {purpose: dict(counts) for purpose, counts in self._stats.items()}
+        hits = sum(counts["hits"] for counts in by_purpose.values())
+        misses = sum(counts["misses"] for counts in by_purpose.values())
+        for counts in by_purpose.values():
+            lookups = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = counts["hits"] / lookups if lookups else 0.0
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": len(self.backend),
+            "by_purpose": by_purpose,
+        }
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    """Get the process-wide LLM cache, or None if LLM_CACHE_BACKEND is off"""
+    global _llm_cache
+    if LLM_CACHE_BACKEND in ("off", "none", "false", "0"):
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            backend = DiskBackend() if LLM_CACHE_BACKEND == "disk" else MemoryBackend()
+            _llm_cache = LLMCache(backend)
+        return _llm_cache
@@ -0,0 +1,200 @@
+# metering.py
+"""
+Usage meters: LLM input/output tokens by purpose, TTS characters, STT audio
+seconds and Sheets API calls, for each session and for the whole process.
+Usage is always charged to the process meter, and also to the session meter
+that is current - RealEstateAgent enters its own for every turn, front ends
+enter it around speak()/listen(). Work handed to other threads is charged
+to the session that started it when the callable goes through bind().
+"""
+
+import io
+import os
+import json
+import time
+import wave
+import threading
+import contextvars
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from tracing import debug
+from context import estimate_tokens
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+METER_LOG_PATH = os.getenv("METER_LOG_PATH", "")  # Append each finished call's usage here as a JSON line
+# Prices for the cost estimate, in USD
+METER_LLM_INPUT_PRICE = float(os.getenv("METER_LLM_INPUT_PRICE", "0.10"))  # Per million input tokens
+METER_LLM_OUTPUT_PRICE = float(os.getenv("METER_LLM_OUTPUT_PRICE", "0.40"))  # Per million output tokens
+METER_TTS_PRICE = float(os.getenv("METER_TTS_PRICE", "0.30"))  # Per thousand characters
+METER_STT_PRICE = float(os.getenv("METER_STT_PRICE", "0.40"))  # Per hour of audio
+
+_current = contextvars.ContextVar("meter", default=None)
+
+class Meter:
+    """Usage counters for one session (or the whole process)"""
+
+    def __init__(self, state=None):
+        self._lock = threading.Lock()
+        self.llm = {}  # purpose -> {"calls", "cached", "input_tokens", "output_tokens"}
+        self.tts_requests = 0
+        self.tts_characters = 0
+        self.stt_requests = 0
+        self.stt_seconds = 0.0
+        self.sheets = {}  # API method -> calls
+        if state:
+            self.load_state(state)
+
+    def add_llm(self, purpose, input_tokens, output_tokens, cached=False):
+        with self._lock:
+            entry = self.llm.setdefault(purpose, {"calls": 0, "cached": 0, "input_tokens": 0, "output_tokens": 0})
+            entry["calls"] += 1
+            entry["cached"] += int(cached)
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+
+    def add_tts(self, characters):
+        with self._lock:
+            self.tts_requests += 1
+            self.tts_characters += characters
+
+    def add_stt(self, seconds):
+        with self._lock:
+            self.stt_requests += 1
+            self.stt_seconds += seconds
+
+    def add_sheets(self, method):
+        with self._lock:
+            self.sheets[method] = self.sheets.get(method, 0) + 1
+
+    def to_state(self):
+        """JSON-serializable counters, for RealEstateAgent.to_state()"""
+        with self._lock:
+            return {
+                "llm": {purpose: dict(entry) for purpose, entry in self.llm.items()},
+                "tts": [self.tts_requests, self.tts_characters],
+                "stt": [self.stt_requests, round(self.stt_seconds, 3)],
+                "sheets": dict(self.sheets),
+            }
+
+    def load_state(self, state):
+        with self._lock:
+            self.llm = {purpose: dict(entry) for purpose, entry in state.get("llm", {}).items()}
+            self.tts_requests, self.tts_characters = state.get("tts", [0, 0])
+            self.stt_requests, self.stt_seconds = state.get("stt", [0, 0.0])
+            self.sheets = dict(state.get("sheets", {}))
+
+    def usage(self):
+        """Totals, breakdowns and an estimated cost"""
+        state = self.to_state()
+        llm = state["llm"]
+        input_tokens = sum(entry["input_tokens"] for entry in llm.values())
+        output_tokens = sum(entry["output_tokens"] for entry in llm.values())
+        tts_requests, tts_characters = state["tts"]
+        stt_requests, stt_seconds = state["stt"]
+        cost = {
+            "llm": input_tokens / 1e6 * METER_LLM_INPUT_PRICE + output_tokens / 1e6 * METER_LLM_OUTPUT_PRICE,
+            "tts": tts_characters / 1000 * METER_TTS_PRICE,
+            "stt": stt_seconds / 3600 * METER_STT_PRICE,
+        }
+        cost["total"] = sum(cost.values())
+        return {
+            "llm": {
+                "calls": sum(entry["calls"] for entry in llm.values()),
+                "cached": sum(entry["cached"] for entry in llm.values()),
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "by_purpose": llm,
+            },
+            "tts": {"requests": tts_requests, "characters": tts_characters},
+            "stt": {"requests": stt_requests, "seconds": stt_seconds},
+            "sheets": {"calls": sum(state["sheets"].values()), "by_method": state["sheets"]},
+            "cost_usd": {name: round(value, 6) for name, value in cost.items()},
+        }
+
+_process_meter = Meter()
+
+def process_meter():
+    """Usage of every session in this process, plus background work no session started"""
+    return _process_meter
+
+def current():
+    """The session meter usage is being charged to, or None"""
+    return _current.get()
+
+@contextmanager
+def session(meter):
+    """Charge usage in this block (and in tasks and to_thread calls started from it) to meter"""
+    token = _current.set(meter)
+    try:
+        yield meter
+    finally:
+        _current.reset(token)
+
+def bind(func):
+    """func, set to run in the caller's context - for plain threads and executors, which don't carry it over"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+def _meters(meter=None):
+    meter = meter or _current.get()
+    return (_process_meter, meter) if meter is not None and meter is not _process_meter else (_process_meter,)
+
+def record_llm(purpose, prompt, response, meter=None):
+    """
+    Charge one LLM response to meter (default: the current session). Tokens
+    come from the response's usage metadata, or are estimated from the text
+    when the model didn't report them; answers from the LLM cache cost nothing.
+    """
+    if (getattr(response, "response_metadata", None) or {}).get("cached"):
+        input_tokens, output_tokens, cached = 0, 0, True
+    else:
+        usage = getattr(response, "usage_metadata", None) or {}
+        content = response.content if hasattr(response, 'content') else str(response)
+        input_tokens = usage.get("input_tokens") or estimate_tokens(str(prompt))
+        output_tokens = usage.get("output_tokens") or estimate_tokens(str(content))
+        cached = False
+    for meter in _meters(meter):
+        meter.add_llm(purpose, input_tokens, output_tokens, cached)
+
+def record_tts(text):
+    """Charge one synthesis request (cache hits aren't billed, so don't record them)"""
+    for meter in _meters():
+        meter.add_tts(len(text))
+
+def record_stt(seconds):
+    for meter in _meters():
+        meter.add_stt(seconds)
+
+def record_sheets(method):
+    for meter in _meters():
+        meter.add_sheets(method)
+
+def audio_seconds(audio_bytes):
+    """Length of a WAV clip in seconds, or 0.0 if it isn't one"""
+    try:
+        with wave.open(io.BytesIO(audio_bytes), "rb") as clip:
+            return clip.getnframes() / clip.getframerate()
+    except Exception:
+        return 0.0
+
+def dump(meter, label, path=None):
+    """Log a meter's usage at the end of a call (printed with AGENT_DEBUG, appended to METER_LOG_PATH if set)"""
+    usage = meter.usage()
+    llm, cost = usage["llm"], usage["cost_usd"]
+    debug(f"[Usage] {label}: LLM {llm['calls']} calls ({llm['cached']} cached), "
+          f"{llm['input_tokens']} in / {llm['output_tokens']} out tokens; "
+          f"TTS {usage['tts']['characters']} chars; STT {usage['stt']['seconds']:.1f}s; "
+          f"Sheets {usage['sheets']['calls']} calls; ~${cost['total']:.4f}")
+    for purpose, entry in sorted(llm["by_purpose"].items(), key=lambda item: -item[1]["input_tokens"]):
+        debug(f"[Usage]   {purpose}: {entry['calls']} calls, {entry['input_tokens']} in / {entry['output_tokens']} out")
+    path = path or METER_LOG_PATH
+    if path:
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"session": label, "time": time.time(), **usage}) + "\n")
+        except Exception as e:
+            print(f"[Usage] Error writing {path}: {e}")
+    return usage
@@ -0,0 +1,144 @@
+# prompt_render.py
+"""
+Compact prompt rendering. Lead state goes into prompts as "Field: value"
+lines for the fields we know plus a comma-separated list of the ones still
+missing, instead of the repr of the whole required_fields dict (about 30
+keys, most of them None). Prompts that answer in JSON start with the same
+static PROMPT_PREFIX so the provider can reuse it across calls, and prompt
+sizes are tallied per purpose for prompt_stats().
+
+    python prompt_render.py    # Token counts for sample prompts, old vs compact
+"""
+
+import os
+import threading
+from dotenv import load_dotenv
+from tracing import debug
+from context import estimate_tokens
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+COMPACT_PROMPTS = os.getenv("AGENT_COMPACT_PROMPTS", "true").lower() in ("1", "true", "yes")
+# Bookkeeping the model never needs: the lead id and timestamps
+HIDDEN_FIELDS = ("UID", "Created Date", "Last Updated", "Last Contact Date", "Call Duration")
+EMPTY_VALUES = (None, "", "-")
+
+# Purposes whose prompts answer with a JSON object of lead fields
+JSON_PURPOSES = ("extraction", "turn", "inference", "follow-up")
+
+# Identical for every JSON prompt, so it has to stay free of per-call details
+PROMPT_PREFIX = """You are assisting Rachel, a real estate agent qualifying a caller over the phone.
+Lead details are given as "Field: value" lines for the fields we know; any field not listed is still unknown.
+Fields still to gather are listed by name. Use these exact field names as JSON keys."""
+
+def render_fields(fields):
+    """Known lead fields as "Field: value" lines"""
+    if not COMPACT_PROMPTS:
+        return str(fields)
+    rendered = "\n".join(
+        f"{field}: {' '.join(str(value).split())}" for field, value in fields.items()
+        if field not in HIDDEN_FIELDS and value not in EMPTY_VALUES
+    ) or "Nothing yet"
+    _stats.record_fields(estimate_tokens(str(fields)), estimate_tokens(rendered))
+    return rendered
+
+def render_missing(fields):
+    """Field names as a comma-separated list"""
+    if not COMPACT_PROMPTS:
+        return str(fields)
+    return ", ".join(fields) or "None"
+
+def compact(prompt, prefix=True):
+    """The prompt without its source-code indentation and blank-line runs, after PROMPT_PREFIX if prefix"""
+    if not COMPACT_PROMPTS:
+        return prompt
+    lines = []
+    for line in str(prompt).strip().splitlines():
+        line = line.strip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return (PROMPT_PREFIX + "\n\n" if prefix else "") + "\n".join(lines)
+
+class PromptStats:
+    """Prompt tokens per purpose, and what the fields blocks would have cost as a dict repr"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._purposes = {}
+        self._fields = {"renders": 0, "repr_tokens": 0, "tokens": 0}
+
+    def record(self, purpose, prompt):
+        tokens = estimate_tokens(prompt)
+        with self._lock:
+            entry = self._purposes.setdefault(purpose, {"prompts": 0, "tokens": 0, "max_tokens": 0})
+            entry["prompts"] += 1
+            entry["tokens"] += tokens
+            entry["max_tokens"] = max(entry["max_tokens"], tokens)
+        return tokens
+
+    def record_fields(self, repr_tokens, tokens):
+        with self._lock:
+            self._fields["renders"] += 1
+            self._fields["repr_tokens"] += repr_tokens
+            self._fields["tokens"] += tokens
+
+    def stats(self):
+        with self._lock:
+            purposes = {purpose: dict(entry) for purpose, entry in self._purposes.items()}
+            fields = dict(self._fields)
+        for entry in purposes.values():
+            entry["mean_tokens"] = entry["tokens"] / entry["prompts"]
+        fields["saved_tokens"] = fields["repr_tokens"] - fields["tokens"]
+        return {"by_purpose": purposes, "fields": fields}
+
+    def reset(self):
+        with self._lock:
+            self._purposes.clear()
+            self._fields = {"renders": 0, "repr_tokens": 0, "tokens": 0}
+
+_stats = PromptStats()
+
+def render_prompt(prompt, purpose):
+    """The prompt as sent to the LLM; its token count is tallied under purpose (and printed with AGENT_DEBUG)"""
+    prompt = compact(prompt, prefix=purpose in JSON_PURPOSES)
+    tokens = _stats.record(purpose, prompt)
+    debug(f"[Prompt] {purpose}: ~{tokens} tokens")
+    return prompt
+
+def prompt_stats():
+    """Per-purpose prompt token counts since start-up (or the last reset_prompt_stats)"""
+    return _stats.stats()
+
+def reset_prompt_stats():
+    _stats.reset()
+
+if __name__ == "__main__":
+    # Sample mid-call state: a few fields known, most still None
+    import prompt_render  # The copy agents.py uses, not this __main__ one
+    from agents import RealEstateAgent
+
+    agent = RealEstateAgent(initial_phone="5551234567")
+    agent.required_fields.update({
+        "Name": "Sarah Johnson", "Email": "sarah.johnson@example.com",
+        "Location": "Downtown Austin", "Property Type": "House",
+    })
+    agent.required_fields["UID"] = agent.generate_uid()
+    agent.update_timestamps()
+    agent.lead_type = "residential"
+    remaining = [f for f in agent.get_remaining_fields() if f not in agent.skipped_fields]
+    builders = {
+        "conversation": lambda: agent._build_conversation_prompt(remaining),
+        "inference": agent._build_inference_prompt,
+        "scheduling": agent._build_scheduling_prompt,
+        "completion": agent._build_completion_prompt,
+    }
+    print(f"{'prompt':<14} {'dict repr':>10} {'compact':>8}")
+    for purpose, build in builders.items():
+        prefix = purpose in JSON_PURPOSES
+        prompt_render.COMPACT_PROMPTS = False
+        before = estimate_tokens(prompt_render.compact(build(), prefix))
+        prompt_render.COMPACT_PROMPTS = True
+        after = estimate_tokens(prompt_render.compact(build(), prefix))
+        print(f"{purpose:<14} {before:>10} {after:>8}")
@@ -44,6 +44,118 @@ Is there anything else you'd like to know before we wrap up?"""
 # Error handling prompt
 ERROR_PROMPT = """I'm sorry, I didn't quite catch that. Could you please clarify?"""
 
+# Fixed replies used by the agent (kept here so the TTS cache can pre-warm them)
+AVAILABLE_REPLY = "Great! I'd love to understand what kind of property you're looking for. Are you interested in residential or commercial property?"
+BUSY_REPLY = "I completely understand. We all have busy schedules. Would there be a better time for us to chat? I'm here whenever works best for you."
+UNSURE_REPLY = "I hope I didn't catch you at a bad time. Would you like to chat about your property needs now, or would you prefer I reach out later?"
+SCHEDULING_FALLBACK = "When would be a good time for you to view some properties?"
+COMPLETION_FALLBACK = "Thank you for your time. I'll be in touch with property options that match your requirements."
+SAVE_FAILED_REPLY = "I've gathered your information. However, I'm having trouble saving it at the moment. Please try again later."
+ANYTHING_ELSE_FALLBACK = "Is there anything else you'd like to tell me about your property needs?"
+REPEAT_REQUEST_REPLY = "Sorry, could you say that again?"
+
+# Questions for each field, used when the LLM can't generate a reply
+FIELD_QUESTIONS = {
+    "Name": [
+        "Could you tell me your name?", 
+        "What's your name?", 
+        "Who am I speaking with today?",
+        "I'd love to know who I'm chatting with. Your name?"
+    ],
+    "Email": [
+        "What's the best email address to reach you?",
+        "Could I get your email address?",
+        "Where should I email you some listings?"
+    ],
+    "Company": [
+        "What's your company name?", 
+        "Which company are you with?", 
+        "What's the name of your business?",
+        "Do you work with a particular company?"
+    ],
+    "Position": [
+        "What's your role at the company?", 
+        "What's your position there?", 
+        "What do you do at your company?",
+        "May I ask what your role is?"
+    ],
+    "Industry": [
+        "What industry is your company in?", 
+        "What sector does your business operate in?", 
+        "What type of business are you in?",
+        "What field does your company specialize in?"
+    ],
+    "Location": [
+        "Where are you looking for property?", 
+        "What area are you interested in?", 
+        "Do you have a specific location in mind?",
+        "Which neighborhoods are you considering?",
+        "Is there a particular part of town you prefer?"
+    ],
+    "Budget Range": [
+        "What's your budget range?", 
+        "How much are you looking to spend?", 
+        "What price range works for you?",
+        "Do you have a budget in mind for this property?",
+        "What's your comfort level in terms of price?"
+    ],
+    "Company Size": [
+        "How large is your company?", 
+        "How many employees does your company have?", 
+        "What's the size of your organization?",
+        "Roughly how many people work at your company?"
+    ],
+    "Decision Maker": [
+        "Who will be making the final decision?", 
+        "Are you the decision maker for this?", 
+        "Who else is involved in the decision process?",
+        "Will you be deciding on this yourself or with others?"
+    ],
+    "Property Type": [
+        "What type of property are you looking for?", 
+        "Are you interested in a specific property type like house, apartment, or condo?", 
+        "What kind of property would best suit your needs?",
+        "Do you have a preference between houses, apartments, or other property types?",
+        "What style of property do you have in mind?"
+    ],
+    "Property Size": [
+        "What size property do you need?", 
+        "How many bedrooms or square feet are you looking for?", 
+        "Could you tell me about your space requirements?",
+        "How much space would be ideal for you?",
+        "Are you looking for something cozy or more spacious?"
+    ],
+    "Timeline": [
+        "When are you looking to buy or move?", 
+        "What's your timeline for this purchase?", 
+        "How soon do you want to complete this transaction?",
+        "Do you have a particular moving date in mind?",
+        "Is this something you're looking to do soon or are you just exploring options?"
+    ],
+    "Use Case": [
+        "How will you be using the property?", 
+        "What will the space be used for?", 
+        "What's your intended use for the property?",
+        "Will this be for living, investment, or something else?"
+    ],
+    "Competitors": [
+        "Are you considering other properties or agents?", 
+        "Have you seen any other properties that caught your interest?", 
+        "Are you working with other agents?",
+        "Have you visited any properties yet that you liked or consulted another agent?"
+    ],
+    "Contact Method": [
+        "How do you prefer we contact you, phone or email?",
+        "What's the best way to get in touch with you?"
+    ],
+    "Availability": [
+        "When would be a good time for viewings?", 
+        "What days work best for you to see properties?", 
+        "When are you available to tour some options?",
+        "If we find some good matches, when might you be free to take a look?"
+    ]
+}
+
 # Below are additional prompt templates that can be used with PromptTemplate
 
 from langchain.prompts import PromptTemplate
@@ -84,6 +196,28 @@ lead_status_prompt = PromptTemplate.from_template(
     "Respond with one word: Hot, Warm, or Cold."
 )
 
+# Prompt to extract a whole lead from a recorded call transcript (batch_extract.py)
+transcript_extraction_prompt = PromptTemplate.from_template(
+    "Extract every lead detail from this recorded real estate call transcript.\n"
+    "\"\"\"\n{transcript}\n\"\"\"\n\n"
+    "Lead type: {lead_type}\n"
+    "Fields to extract: {fields}\n\n"
+    "Rules:\n"
+    "1. Only use what the caller (User) said; the Agent lines are context.\n"
+    "2. For \"Name\", only extract a person's name, not a property type or other preference.\n"
+    "3. If the caller corrected an answer, use the latest value.\n\n"
+    "Return a JSON object with only the fields that were given, e.g. "
+    "{{\"Name\": \"John Smith\", \"Budget Range\": \"500k-700k\", \"Timeline\": \"within 2 months\"}}. "
+    "If nothing is found, return {{}}."
+)
+
+# Prompt to settle a lead type the local classifier was unsure about (agents.py)
+lead_type_prompt = PromptTemplate.from_template(
+    "Is this real estate inquiry residential or commercial?\n"
+    "Caller: \"{message}\"\n\n"
+    "Respond with one word: residential, commercial, or unknown."
+)
+
 # Prompt to summarize the conversation log
 summary_prompt = PromptTemplate.from_template(
     "Summarize this simulated real estate conversation in one sentence to save as a note:\n"
@@ -0,0 +1,253 @@
+# rate_limit.py
+
+import os
+import time
+import random
+import asyncio
+import threading
+from google.api_core import exceptions as google_exceptions
+from dotenv import load_dotenv
+from context import estimate_tokens
+import tracing
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+LLM_RATE_LIMIT = os.getenv("LLM_RATE_LIMIT", "true").lower() in ("1", "true", "yes")
+LLM_RPM = float(os.getenv("LLM_RPM", "1000"))  # Requests per minute
+LLM_TPM = float(os.getenv("LLM_TPM", "1000000"))  # Tokens per minute (prompt + expected output)
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "200"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))  # Seconds
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30.0"))  # Seconds
+
+# Errors worth retrying, by HTTP status: rate limits first, then transient server-side failures
+_RATE_LIMIT_STATUSES = (429,)
+_TRANSIENT_STATUSES = (500, 502, 503, 504)
+_RATE_LIMIT_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+_TRANSIENT_ERRORS = (
+    google_exceptions.InternalServerError, google_exceptions.BadGateway, google_exceptions.ServiceUnavailable,
+    google_exceptions.GatewayTimeout, google_exceptions.DeadlineExceeded, TimeoutError, ConnectionError,
+)
+# httpx.TimeoutException and requests.Timeout, matched by name so neither library is required
+_TIMEOUT_BASES = ("TimeoutException", "Timeout")
+
+def _causes(error):
+    # The error and whatever it wraps: LangChain re-raises API errors "from" the original
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+def _status_code(error):
+    """The HTTP status an API error carries, if any"""
+    for value in (getattr(error, "code", None), getattr(error, "status_code", None),
+                  getattr(getattr(error, "response", None), "status_code", None)):
+        if isinstance(value, int):
+            return value
+    return None
+
+def is_rate_limit_error(error):
+    return any(
+        isinstance(cause, _RATE_LIMIT_ERRORS) or _status_code(cause) in _RATE_LIMIT_STATUSES
+        for cause in _causes(error)
+    )
+
+def is_retryable_error(error):
+    if is_rate_limit_error(error):
+        return True
+    return any(
+        isinstance(cause, _TRANSIENT_ERRORS) or _status_code(cause) in _TRANSIENT_STATUSES
+        or any(base.__name__ in _TIMEOUT_BASES for base in type(cause).__mro__)
+        for cause in _causes(error)
+    )
+
+class TokenBucket:
+    """Refills at rate_per_minute, holds up to one minute's worth"""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.tokens = rate_per_minute
+        self.updated = time.monotonic()
+
+    def reserve(self, amount):
+        """
+        Take amount from the bucket (caller holds the limiter lock) and return
+        how long to wait before it is actually available. Reserving ahead keeps
+        waiters in arrival order.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        amount = min(amount, self.capacity)
+        self.tokens -= amount
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+class RateLimiter:
+    """
+    Process-wide pacing for LLM calls, shared by every agent and session:
+    token buckets on requests and tokens per minute, a concurrency cap that
+    halves when the API pushes back (429) and creeps back up on success
+    (AIMD), and jittered exponential backoff between retries.
+    """
+
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM, max_concurrency=LLM_MAX_CONCURRENCY,
+                 max_retries=LLM_MAX_RETRIES, backoff_base=LLM_BACKOFF_BASE, backoff_max=LLM_BACKOFF_MAX):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "attempts": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "queue_seconds": 0.0,
+            "max_queue_seconds": 0.0,
+        }
+
+    def _reserve(self, prompt):
+        """Reserve request and token budget; returns seconds to wait for it"""
+        cost = estimate_tokens(str(prompt)) + LLM_EXPECTED_OUTPUT_TOKENS
+        with self._lock:
+            return max(self.requests.reserve(1), self.tokens.reserve(cost))
+
+    def _try_enter(self):
+        with self._lock:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def _leave(self, error=None):
+        with self._lock:
+            self.in_flight -= 1
+            if error is None:
+                # Additive increase: about +1 per `limit` successful calls
+                self.limit = min(self.max_concurrency, self.limit + 1 / max(self.limit, 1))
+            elif is_rate_limit_error(error):
+                self._stats["rate_limited"] += 1
+                # Multiplicative decrease, once per burst of 429s rather than once per failed call
+                now = time.monotonic()
+                if now - self._last_decrease >= self.backoff_base:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._last_decrease = now
+
+    def _backoff(self, attempt):
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _record_queue(self, started):
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._stats["attempts"] += 1
+            self._stats["queue_seconds"] += waited
+            self._stats["max_queue_seconds"] = max(self._stats["max_queue_seconds"], waited)
+        tracing.record("llm.queue", waited)
+
+    def _give_up(self, error, attempt):
+        if attempt >= self.max_retries or not is_retryable_error(error):
+            with self._lock:
+                self._stats["failures"] += 1
+            return True
+        with self._lock:
+            self._stats["retries"] += 1
+        print(f"[Rate Limit] LLM call failed ({error.__class__.__name__}), retry {attempt + 1}/{self.max_retries}")
+        return False
+
+    def call(self, func, prompt):
+        """Run func() (a blocking LLM call for prompt) under the limits, retrying transient errors"""
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            time.sleep(self._reserve(prompt))
+            delay = 0.005
+            while not self._try_enter():
+                time.sleep(delay)
+                delay = min(delay * 2, 0.1)
+            self._record_queue(started)
+            try:
+                result = func()
+            except Exception as e:
+                self._leave(e)
+                if self._give_up(e, attempt):
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            self._leave()
+            return result
+
+    async def acall(self, func, prompt):
+        """Async counterpart of call; func() returns an awaitable"""
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            await asyncio.sleep(self._reserve(prompt))
+            delay = 0.005
+            while not self._try_enter():
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.1)
+            self._record_queue(started)
+            try:
+                result = await func()
+            except Exception as e:
+                self._leave(e)
+                if self._give_up(e, attempt):
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            self._leave()
+            return result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["concurrency_limit"] = int(self.limit)
+            stats["in_flight"] = self.in_flight
+        stats["mean_queue_seconds"] = stats["queue_seconds"] / stats["attempts"] if stats["attempts"] else 0.0
+        return stats
+
+class RateLimitedLLM:
+    """Wraps a chat model so invoke/ainvoke go through the shared RateLimiter"""
+
+    def __init__(self, llm, limiter):
+        self.llm = llm
+        self.limiter = limiter
+
+    def invoke(self, prompt, **kwargs):
+        return self.limiter.call(lambda: self.llm.invoke(prompt, **kwargs), prompt)
+
+    async def ainvoke(self, prompt, **kwargs):
+        return await self.limiter.acall(lambda: self.llm.ainvoke(prompt, **kwargs), prompt)
+
+    def __getattr__(self, name):
+        # model, temperature, ... come from the wrapped model
+        return getattr(self.llm, name)
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Get the process-wide rate limiter, or None if LLM_RATE_LIMIT is off"""
+    global _rate_limiter
+    if not LLM_RATE_LIMIT:
+        return None
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
+
+def rate_limited(llm):
+    """Wrap llm with the shared rate limiter (once)"""
+    limiter = get_rate_limiter()
+    if limiter is None or isinstance(llm, RateLimitedLLM):
+        return llm
+    return RateLimitedLLM(llm, limiter)
@@ -0,0 +1,283 @@
+# server.py
+
+import os
+import re
+import time
+import uuid
+import base64
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+from dotenv import load_dotenv
+from agents import RealEstateAgent, create_llm
+from speech import speak
+from speculative_tts import make_speculator
+import metering
+from session_store import get_session_store
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+SERVER_MAX_SESSIONS = int(os.getenv("SERVER_MAX_SESSIONS", "500"))
+SERVER_SESSION_TTL = float(os.getenv("SERVER_SESSION_TTL", "1800"))  # Seconds of inactivity before a session is dropped
+# Set SESSION_STORE=sqlite or file to share sessions between worker processes
+SHARED_SESSIONS = "SESSION_STORE" in os.environ
+
+# Essential fields, in the same order as the Streamlit sidebar
+ESSENTIAL_FIELDS = ["Name", "Email", "Phone", "Location", "Budget Range", "Property Type", "Property Size", "Timeline"]
+
+class Session:
+    """One call: an agent plus the lock that serializes its turns"""
+
+    def __init__(self, session_id, agent):
+        self.id = session_id
+        self.agent = agent
+        self.lock = asyncio.Lock()
+        self.created = time.time()
+        self.last_active = self.created
+        self.turns = 0
+        self.speculative_audio = None  # Created on the first voice turn
+
+    def speak(self, reply):
+        """Audio for a reply, from the speculative synthesis if it guessed right"""
+        audio = self.speculative_audio.take(reply) if self.speculative_audio else None
+        return audio or speak(reply)
+
+    def close(self):
+        if self.speculative_audio:
+            self.speculative_audio.close()
+
+    def touch(self):
+        self.last_active = time.time()
+
+    def state(self):
+        fields = self.agent.required_fields
+        return {
+            "session_id": self.id,
+            "lead_type": self.agent.lead_type,
+            "fields": {field: value for field, value in fields.items() if value is not None},
+            "missing": [field for field in ESSENTIAL_FIELDS if not fields.get(field)],
+            "completed": fields.get("Call Outcome") == "Information Gathered",
+            "turns": self.turns,
+        }
+
+class SessionManager:
+    """
+    Hosts many concurrent agent sessions in one process. All agents share a
+    single LLM client; turns on the same session are serialized by the
+    session's lock while different sessions run concurrently.
+
+    With a session store, the agent state is saved after every turn and
+    reloaded before the next one, so any worker can serve any turn.
+    """
+
+    def __init__(self, max_sessions=SERVER_MAX_SESSIONS, ttl=SERVER_SESSION_TTL, store=None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.store = store
+        self.sessions = {}
+        self.llm = None
+
+    def _shared_llm(self):
+        if self.llm is None:
+            self.llm = create_llm()
+        return self.llm
+
+    def create(self, phone):
+        if len(self.sessions) >= self.max_sessions:
+            self.expire_idle()
+            if len(self.sessions) >= self.max_sessions:
+                raise HTTPException(status_code=503, detail="Too many active sessions")
+        session_id = str(uuid.uuid4())
+        agent = RealEstateAgent(initial_phone=phone, llm=self._shared_llm())
+        session = Session(session_id, agent)
+        self.sessions[session_id] = session
+        print(f"[Server] Started session {session_id} ({len(self.sessions)} active)")
+        return session
+
+    def get(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None and self.store:
+            # Started (or last served) by another worker
+            state = self.store.get(session_id)
+            if state is not None:
+                session = Session(session_id, RealEstateAgent.from_state(state, llm=self._shared_llm()))
+                self.sessions[session_id] = session
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return session
+
+    def end(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if self.store:
+            self.store.delete(session_id)
+        session.close()
+        session.agent.dump_usage()
+        print(f"[Server] Ended session {session_id} after {session.turns} turns ({len(self.sessions)} active)")
+        return session
+
+    def expire_idle(self):
+        """
+        End sessions that have been inactive for longer than the TTL: delete
+        them from the store and flush their usage, as end() does. With a
+        store, a session another worker served recently is only dropped from
+        memory, and sessions abandoned by other workers are ended here too.
+        """
+        cutoff = time.time() - self.ttl
+        idle = [sid for sid, session in self.sessions.items() if session.last_active < cutoff and not session.lock.locked()]
+        expired = self.store.expire(cutoff) if self.store else dict.fromkeys(idle)
+        for sid in idle:
+            session = self.sessions.pop(sid)
+            session.close()
+            if sid in expired:
+                session.agent.dump_usage()
+        for sid, state in expired.items():
+            if sid not in idle and state is not None:
+                # Abandoned by another worker: its usage is only in the stored state
+                RealEstateAgent.from_state(state, llm=self._shared_llm()).dump_usage()
+        if expired or idle:
+            print(f"[Server] Expired {len(expired)} idle sessions ({len(self.sessions)} active)")
+        return len(expired)
+
+    async def turn(self, session, message, voice=False):
+        """Run one conversation turn without blocking the event loop"""
+        async with session.lock:
+            session.touch()
+            if self.store and session.turns:
+                # Another worker may have served the previous turn
+                state = await asyncio.to_thread(self.store.get, session.id)
+                if state is None:
+                    # Ended or expired by another worker
+                    self.sessions.pop(session.id, None)
+                    session.close()
+                    raise HTTPException(status_code=404, detail="Session not found")
+                session.agent = RealEstateAgent.from_state(state, llm=self._shared_llm())
+            with metering.session(session.agent.meter):
+                if voice:
+                    # Synthesize the likely next replies while this one is generated
+                    if session.speculative_audio is None:
+                        session.speculative_audio = make_speculator()
+                    if session.speculative_audio:
+                        session.speculative_audio.speculate(session.agent.next_reply_candidates(session.speculative_audio.count))
+                reply = await session.agent.aprocess_message(message)
+                session.turns += 1
+                audio = None
+                if voice:
+                    # speak() is a blocking HTTP call - keep it off the event loop
+                    audio = await asyncio.to_thread(session.speak, reply)
+            if self.store:
+                # Saved after speaking, so the stored usage includes this turn's audio
+                await asyncio.to_thread(self.store.put, session.id, session.agent.to_state())
+            session.touch()
+
+        result = {"reply": reply, **session.state()}
+        if audio:
+            result["audio"] = base64.b64encode(audio).decode()
+        return result
+
+sessions = SessionManager(store=get_session_store() if SHARED_SESSIONS else None)
+
+async def _expire_loop():
+    while True:
+        await asyncio.sleep(60)
+        sessions.expire_idle()
+
+@asynccontextmanager
+async def lifespan(app):
+    task = asyncio.create_task(_expire_loop())
+    yield
+    task.cancel()
+
+app = FastAPI(title="Real Estate Assistant", lifespan=lifespan)
+
+class StartRequest(BaseModel):
+    phone: str
+    voice: bool = False
+
+class TurnRequest(BaseModel):
+    message: str
+    voice: bool = False
+
+def validate_phone(phone):
+    # Same rule as the Streamlit app: 7-15 digits
+    phone = re.sub(r'\D', '', phone)
+    if len(phone) < 7 or len(phone) > 15:
+        return False
+    return phone
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "sessions": len(sessions.sessions)}
+
+@app.post("/sessions")
+async def start_session(request: StartRequest):
+    """Start a call and return the greeting"""
+    phone = validate_phone(request.phone)
+    if not phone:
+        raise HTTPException(status_code=400, detail="Please enter a valid phone number (7-15 digits)")
+    session = sessions.create(phone)
+    return await sessions.turn(session, "", voice=request.voice)
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    return sessions.get(session_id).state()
+
+@app.get("/sessions/{session_id}/usage")
+async def get_session_usage(session_id: str):
+    """LLM tokens by purpose, TTS characters, STT seconds, Sheets calls and estimated cost of one call"""
+    return sessions.get(session_id).agent.usage()
+
+@app.get("/usage")
+async def get_process_usage():
+    """The same totals for every call this worker has served"""
+    return metering.process_meter().usage()
+
+@app.post("/sessions/{session_id}/turn")
+async def session_turn(session_id: str, request: TurnRequest):
+    """Send a user message and get the agent's reply"""
+    session = sessions.get(session_id)
+    return await sessions.turn(session, request.message, voice=request.voice)
+
+@app.delete("/sessions/{session_id}")
+async def end_session(session_id: str):
+    """End a call and return the final lead state"""
+    session = sessions.get(session_id)
+    # Let an in-flight turn finish before dropping the session
+    async with session.lock:
+        sessions.end(session_id)
+    return session.state()
+
+@app.websocket("/sessions/{session_id}/ws")
+async def session_socket(websocket: WebSocket, session_id: str):
+    """
+    Turn-by-turn conversation over a WebSocket. Each incoming JSON message
+    {"message": ..., "voice": false} gets a reply in the same shape as the
+    turn endpoint.
+    """
+    try:
+        sessions.get(session_id)
+    except HTTPException:
+        await websocket.close(code=4404)
+        return
+    await websocket.accept()
+    try:
+        while True:
+            data = await websocket.receive_json()
+            # Same load/save path as the turn endpoint, so any worker's changes are picked up
+            try:
+                session = sessions.get(session_id)
+                result = await sessions.turn(session, data.get("message", ""), voice=data.get("voice", False))
+            except HTTPException:
+                await websocket.send_json({"error": "Session ended"})
+                break
+            await websocket.send_json(result)
+    except WebSocketDisconnect:
+        print(f"[Server] WebSocket closed for session {session_id}")
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.getenv("SERVER_HOST", "0.0.0.0"), port=int(os.getenv("SERVER_PORT", "8000")))
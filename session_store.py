@@ -0,0 +1,241 @@
+# session_store.py
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")  # memory, sqlite or file
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "")  # Database file (sqlite) or directory (file)
+
+def dump_state(state):
+    return json.dumps(state, separators=(",", ":"), ensure_ascii=False)
+
+def load_state(data):
+    return json.loads(data)
+
+class SessionStore:
+    """
+    Where agent states (RealEstateAgent.to_state()) live between turns.
+    Subclasses store the serialized JSON under the session id.
+    """
+
+    def get(self, session_id):
+        """Return the stored state dict, or None if there is none"""
+        data = self._get(session_id)
+        return load_state(data) if data is not None else None
+
+    def put(self, session_id, state):
+        self._put(session_id, dump_state(state))
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    def expire(self, cutoff):
+        """
+        Delete states last saved before cutoff (a time.time()) and return them
+        by session id. Each expired state is returned by exactly one caller, so
+        several workers can expire the same store.
+        """
+        return {session_id: load_state(data) for session_id, data in self._expire(cutoff).items()}
+
+    def _get(self, session_id):
+        raise NotImplementedError
+
+    def _put(self, session_id, data):
+        raise NotImplementedError
+
+    def _expire(self, cutoff):
+        raise NotImplementedError
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store; states are still serialized so behaviour matches the shared stores"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _get(self, session_id):
+        with self._lock:
+            entry = self._data.get(session_id)
+            return entry[0] if entry else None
+
+    def _put(self, session_id, data):
+        with self._lock:
+            self._data[session_id] = (data, time.time())
+
+    def delete(self, session_id):
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def _expire(self, cutoff):
+        with self._lock:
+            expired = [session_id for session_id, (_, updated) in self._data.items() if updated < cutoff]
+            return {session_id: self._data.pop(session_id)[0] for session_id in expired}
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed store that several worker processes on one host can share"""
+
+    def __init__(self, path=None):
+        self.path = path or SESSION_STORE_PATH or "sessions.db"
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL)")
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, session_id):
+        row = self._conn().execute("SELECT state FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
+
+    def _put(self, session_id, data):
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO sessions (id, state, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET state = excluded.state, updated = excluded.updated",
+            (session_id, data, time.time())
+        )
+        conn.commit()
+
+    def delete(self, session_id):
+        conn = self._conn()
+        conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        conn.commit()
+
+    def _expire(self, cutoff):
+        conn = self._conn()
+        expired = {}
+        for session_id, data in conn.execute("SELECT id, state FROM sessions WHERE updated < ?", (cutoff,)).fetchall():
+            # Only the worker whose delete goes through reports it, and a state saved since the select survives
+            if conn.execute("DELETE FROM sessions WHERE id = ? AND updated < ?", (session_id, cutoff)).rowcount:
+                expired[session_id] = data
+            conn.commit()
+        return expired
+
+class FileSessionStore(SessionStore):
+    """One JSON file per session, e.g. on a shared volume"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or SESSION_STORE_PATH or ".sessions"
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, session_id):
+        # Session ids are uuids; strip anything that could escape the directory
+        safe_id = "".join(c for c in session_id if c.isalnum() or c == "-")
+        return os.path.join(self.directory, f"{safe_id}.json")
+
+    def _get(self, session_id):
+        try:
+            with open(self._path(session_id), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _put(self, session_id, data):
+        path = self._path(session_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def delete(self, session_id):
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def _expire(self, cutoff):
+        expired = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            claimed = f"{path}.{os.getpid()}.{threading.get_ident()}.expired"
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                # Renaming claims the file, so only one worker expires it
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue
+            with open(claimed, "r", encoding="utf-8") as f:
+                expired[name[:-len(".json")]] = f.read()
+            os.remove(claimed)
+        return expired
+
+def get_session_store(kind=None):
+    """Create the session store selected by SESSION_STORE"""
+    kind = (kind or SESSION_STORE).lower()
+    if kind == "sqlite":
+        return SQLiteSessionStore()
+    if kind == "file":
+        return FileSessionStore()
+    if kind == "memory":
+        return InMemorySessionStore()
+    raise ValueError(f"Unknown session store: {kind}")
+
+def benchmark(turns=30, repeat=200):
+    """
+    Time serialize/deserialize of an agent's state as the conversation grows,
+    plus a round trip through each store.
+    """
+    import tempfile
+    from agents import RealEstateAgent
+    from langchain_core.messages import HumanMessage, AIMessage
+
+    # No LLM calls are made - the agent is only used as a state container
+    agent = RealEstateAgent(initial_phone="5551234567", llm=object())
+    agent.process_message("")
+    agent.process_message("yes")
+
+    print(f"{'turn':>5} {'bytes':>7} {'dump ms':>8} {'load ms':>8}")
+    for turn in range(1, turns + 1):
+        agent.memory.append(HumanMessage(content=f"Turn {turn}: I'm looking for a 3 bedroom house downtown around 500k."))
+        agent.memory.append(AIMessage(content="Great, and when are you hoping to move? Is it within the next few months?"))
+        if turn % 5 and turn != turns:
+            continue
+        start = time.perf_counter()
+        for _ in range(repeat):
+            data = dump_state(agent.to_state())
+        dump_ms = (time.perf_counter() - start) * 1000 / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            RealEstateAgent.from_state(load_state(data), llm=agent.llm)
+        load_ms = (time.perf_counter() - start) * 1000 / repeat
+        print(f"{turn:>5} {len(data.encode('utf-8')):>7} {dump_ms:>8.3f} {load_ms:>8.3f}")
+
+    state = agent.to_state()
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "memory": InMemorySessionStore(),
+            "sqlite": SQLiteSessionStore(os.path.join(tmp, "sessions.db")),
+            "file": FileSessionStore(os.path.join(tmp, "sessions")),
+        }
+        for name, store in stores.items():
+            start = time.perf_counter()
+            for i in range(repeat):
+                store.put("bench", state)
+                store.get("bench")
+            print(f"{name} store put+get: {(time.perf_counter() - start) * 1000 / repeat:.3f} ms")
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    else:
+        print("Usage: python session_store.py --bench")
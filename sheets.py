@@ -1,13 +1,24 @@
 # sheets.py
 
 import os
+import re
 import json
+import time
+import atexit
+import threading
+import uuid
+from collections import OrderedDict
 from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from dotenv import load_dotenv
 from datetime import datetime
 import gspread
+import requests
+from tracing import traced, debug
+import metering
+from lead_store import get_lead_store, normalize_email, normalize_phone, LEAD_COLUMNS
 
 # Load environment variables
 load_dotenv()
@@ -18,12 +29,44 @@ SHEET_NAME = os.getenv("GOOGLE_SHEETS_SHEET_NAME", "AI Voice Leads")
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 SERVICE_ACCOUNT_FILE = os.getenv("GOOGLE_SHEETS_CREDENTIALS_PATH")
 
+# Batched writes: queue lead upserts and flush them in one API call
+BATCH_WRITES = os.getenv("GOOGLE_SHEETS_BATCH_WRITES", "false").lower() in ("1", "true", "yes")
+BATCH_MAX_SIZE = int(os.getenv("GOOGLE_SHEETS_BATCH_SIZE", "20"))
+BATCH_MAX_DELAY = float(os.getenv("GOOGLE_SHEETS_BATCH_DELAY", "5"))
+
+# Background sync between the local lead store and the sheet
+LEAD_SYNC_DELAY = float(os.getenv("LEAD_SYNC_DELAY", "2"))  # Seconds to gather saves into one push
+LEAD_SYNC_PULL_INTERVAL = float(os.getenv("LEAD_SYNC_PULL_INTERVAL", "60"))  # Seconds between pulls of remote edits
+LEAD_SYNC_BATCH_SIZE = int(os.getenv("LEAD_SYNC_BATCH_SIZE", "100"))
+LEAD_SYNC_PULL_TIMEOUT = float(os.getenv("LEAD_SYNC_PULL_TIMEOUT", "10"))  # Seconds a lookup waits for the first pull
+
 # Flag to track if sheets integration is available
 sheets_available = True if SERVICE_ACCOUNT_FILE and SPREADSHEET_ID else False
 
+# Shared client and worksheet handle, created lazily and reused across calls
+_client_lock = threading.RLock()
+_credentials = None
+_client = None
+_worksheet = None
+
+# Process-wide lead index (UID/email/phone -> sheet row) so dedup lookups
+# don't have to download the whole sheet on every save
+_index_lock = threading.RLock()
+_lead_index = {
+    "built": False,
+    "headers": [],
+    "last_row": 1,  # Last row known to hold data (row 1 is the header row)
+    "uid": {},
+    "email": {},
+    "phone": {},
+}
+
 def get_credentials():
-    """Get Google Sheets API credentials from service account file"""
-    global sheets_available
+    """Get Google Sheets API credentials from service account file (read once per process)"""
+    global sheets_available, _credentials
+    
+    if _credentials is not None:
+        return _credentials
     
     if not SERVICE_ACCOUNT_FILE:
         print("Warning: Google Sheets credentials path not set in environment variables")
@@ -31,40 +74,611 @@ def get_credentials():
         return None
         
     try:
-        credentials = Credentials.from_service_account_file(
+        _credentials = Credentials.from_service_account_file(
             SERVICE_ACCOUNT_FILE, scopes=SCOPES
         )
-        return credentials
+        return _credentials
     except Exception as e:
         print(f"Error getting credentials: {e}")
         sheets_available = False
         return None
 
+def _ensure_token(credentials):
+    """Refresh the access token up front (under _client_lock) so threads don't race to refresh it"""
+    if not credentials.valid:
+        credentials.refresh(Request())
+
 def get_sheets_client():
-    """Get gspread client for easier spreadsheet handling"""
-    global sheets_available
+    """
+    Get the shared gspread client for easier spreadsheet handling.
+    The client is created once per process; its session keeps connections
+    alive and the service-account token is reused until it expires.
+    """
+    global sheets_available, _client
     
     if not sheets_available:
         print("Google Sheets integration is not available - skipping")
         return None
         
-    try:
-        credentials = get_credentials()
-        if not credentials:
-            return None
+    with _client_lock:
+        try:
+            credentials = get_credentials()
+            if not credentials:
+                return None
             
-        client = gspread.authorize(credentials)
-        return client
-    except Exception as e:
-        print(f"Error getting gspread client: {e}")
-        sheets_available = False
+            if _client is None:
+                _client = gspread.authorize(credentials)
+        except Exception as e:
+            print(f"Error getting gspread client: {e}")
+            sheets_available = False
+            return None
+        
+        try:
+            _ensure_token(credentials)
+        except Exception as e:
+            # Transient - keep the integration enabled and retry on the next call
+            print(f"Error refreshing Google Sheets token: {e}")
+            return None
+        return _client
+
+class MeteredWorksheet:
+    """Wraps a worksheet so each API method call is counted by metering"""
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+
+    def __getattr__(self, name):
+        attr = getattr(self.worksheet, name)
+        if not callable(attr):
+            return attr
+        def call(*args, **kwargs):
+            metering.record_sheets(name)
+            return attr(*args, **kwargs)
+        return call
+
+def get_worksheet():
+    """Get the shared lead worksheet handle, opening it on first use"""
+    global _worksheet
+    
+    client = get_sheets_client()
+    if not client:
+        return None
+    
+    with _client_lock:
+        if _worksheet is None:
+            metering.record_sheets("open_by_key")
+            spreadsheet = client.open_by_key(SPREADSHEET_ID)
+            metering.record_sheets("worksheet")
+            _worksheet = MeteredWorksheet(spreadsheet.worksheet(SHEET_NAME))
+        return _worksheet
+
+def reset_sheets_client():
+    """Drop the cached client and worksheet so the next call reconnects"""
+    global _client, _worksheet
+    with _client_lock:
+        _client = None
+        _worksheet = None
+
+def _handle_sheets_error(error):
+    """Reconnect on the next call if the error means the cached handle went bad"""
+    if isinstance(error, gspread.exceptions.APIError):
+        # Auth problems or a renamed/deleted sheet - quota errors keep the handle
+        if error.code in (401, 403, 404):
+            reset_sheets_client()
+            invalidate_lead_index()
+    elif isinstance(error, requests.exceptions.RequestException):
+        # Connection-level failures
+        reset_sheets_client()
+
+def _index_row(row, values):
+    """Add a single sheet row to the lead index (caller holds _index_lock)"""
+    record = dict(zip(_lead_index["headers"], values))
+    uid = str(record.get("UID", "")).strip()
+    email = normalize_email(record.get("Email"))
+    phone = normalize_phone(record.get("Phone"))
+    if uid:
+        _lead_index["uid"][uid] = row
+    if email:
+        _lead_index["email"][email] = row
+    if phone:
+        _lead_index["phone"][phone] = row
+
+@traced("sheets.refresh_index")
+def refresh_lead_index(sheet, full=False):
+    """
+    Bring the lead index up to date with the sheet.
+    The first call (or full=True) reads the whole sheet once; after that only
+    rows past the last known row are read, so rows appended by other
+    processes are picked up without a full download.
+    """
+    with _index_lock:
+        if full or not _lead_index["built"]:
+            _rebuild_lead_index(sheet.get_all_values())
+            return
+        start = _lead_index["last_row"] + 1
+        _index_rows(start, sheet.get_values(f"A{start}:Z"))
+
+def _rebuild_lead_index(values):
+    """Rebuild the lead index from a full read of the sheet (header row included)"""
+    with _index_lock:
+        _lead_index["headers"] = values[0] if values else []
+        _lead_index["uid"].clear()
+        _lead_index["email"].clear()
+        _lead_index["phone"].clear()
+        _lead_index["built"] = False
+        _index_rows(2, values[1:])
+
+def _index_rows(start, rows):
+    # Caller holds _index_lock
+    for offset, values in enumerate(rows):
+        _index_row(start + offset, values)
+
+    if rows:
+        _lead_index["last_row"] = start + len(rows) - 1
+    elif not _lead_index["built"]:
+        _lead_index["last_row"] = 1
+    _lead_index["built"] = True
+    debug(f"[Lead Index] Indexed {len(rows)} row(s), last row is {_lead_index['last_row']}")
+
+def invalidate_lead_index():
+    """Drop the lead index so the next lookup rebuilds it from the sheet"""
+    with _index_lock:
+        _lead_index["built"] = False
+
+def _lookup_lead_row(uid=None, email=None, phone=None):
+    """Look up a row in the index without touching the sheet"""
+    with _index_lock:
+        if uid and str(uid) in _lead_index["uid"]:
+            return _lead_index["uid"][str(uid)]
+        email = normalize_email(email)
+        if email and email in _lead_index["email"]:
+            return _lead_index["email"][email]
+        phone = normalize_phone(phone)
+        if phone and phone in _lead_index["phone"]:
+            return _lead_index["phone"][phone]
+        return None
+
+def find_lead_row(sheet, uid=None, email=None, phone=None):
+    """
+    Return the sheet row of an existing lead matching the UID, email or phone.
+    Hits are answered from the index; a miss triggers an incremental refresh
+    (only rows added since the last refresh are read) before giving up.
+    """
+    with _index_lock:
+        if not _lead_index["built"]:
+            refresh_lead_index(sheet)
+            return _lookup_lead_row(uid, email, phone)
+
+        row = _lookup_lead_row(uid, email, phone)
+        if row:
+            return row
+
+        refresh_lead_index(sheet)
+        return _lookup_lead_row(uid, email, phone)
+
+def _row_holds_lead(values, uid=None, email=None):
+    """Whether row values read from the sheet still belong to the lead with this UID or email"""
+    with _index_lock:
+        record = dict(zip(_lead_index["headers"], values or []))
+    if uid and str(record.get("UID", "")).strip() == str(uid):
+        return True
+    email = normalize_email(email)
+    return bool(email) and normalize_email(record.get("Email")) == email
+
+def find_verified_lead_row(sheet, uid=None, email=None):
+    """
+    find_lead_row, then read that row back to make sure it still holds the
+    lead. If the sheet was edited or re-sorted since the index was built, the
+    index is rebuilt once and the lookup repeated. Returns (row, row values),
+    or (None, None) if the lead isn't in the sheet.
+    """
+    for attempt in range(2):
+        row = find_lead_row(sheet, uid=uid, email=email)
+        if not row:
+            break
+        values = sheet.row_values(row)
+        if _row_holds_lead(values, uid, email):
+            return row, values
+        # Rows were moved or deleted remotely - rebuild the index once
+        print(f"[Lead Index] Row {row} no longer holds {uid or email}, rebuilding index")
+        refresh_lead_index(sheet, full=True)
+    return None, None
+
+def _parse_updated_row(response):
+    """Get the first row number from an append response's updatedRange"""
+    try:
+        updated_range = response["updates"]["updatedRange"]
+    except (KeyError, TypeError):
+        return None
+    match = re.search(r'![A-Z]+(\d+)', updated_range)
+    return int(match.group(1)) if match else None
+
+def _record_lead_row(row, data):
+    """Keep the index current after a row has been written"""
+    if not row:
+        return
+    with _index_lock:
+        if not _lead_index["built"]:
+            return
+        _index_row(row, data)
+        # Only advance past rows we have actually seen, so rows appended by
+        # other processes in between are still picked up by the next refresh
+        if row == _lead_index["last_row"] + 1:
+            _lead_index["last_row"] = row
+
+class LeadWriter:
+    """
+    Background writer that queues lead upserts and writes them to the sheet
+    in batches. Repeated upserts for the same UID are coalesced, and a flush
+    happens once max_batch_size leads are queued or the oldest queued lead
+    has waited max_delay seconds.
+    """
+
+    def __init__(self, max_batch_size=BATCH_MAX_SIZE, max_delay=BATCH_MAX_DELAY):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._pending = OrderedDict()  # key -> (data, check_existing)
+        self._oldest = None  # Time the oldest pending lead was queued
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+
+    def enqueue(self, uid, email, data, check_existing=True):
+        """Queue a lead row; a newer row for the same lead replaces the queued one"""
+        key = uid or normalize_email(email) or id(data)
+        with self._condition:
+            self._pending.pop(key, None)
+            self._pending[key] = (data, check_existing)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._start()
+            self._condition.notify()
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+
+    def flush(self):
+        """Synchronously write every queued lead. Returns False if the write failed."""
+        with self._flush_lock:
+            with self._condition:
+                if not self._pending:
+                    return True
+                batch = self._pending
+                self._pending = OrderedDict()
+                self._oldest = None
+
+            try:
+                self._write(batch)
+                return True
+            except Exception as e:
+                print(f"[Google Sheets] Failed to flush {len(batch)} lead(s): {e}")
+                _handle_sheets_error(e)
+                # Put the batch back, keeping anything queued since
+                with self._condition:
+                    for key, entry in batch.items():
+                        if key not in self._pending:
+                            self._pending[key] = entry
+                    if self._pending and self._oldest is None:
+                        self._oldest = time.monotonic()
+                return False
+
+    def close(self):
+        """Stop the background thread and write anything still queued"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=self.max_delay + 5)
+        return self.flush()
+
+    def _start(self):
+        # Caller holds self._condition
+        if self._thread is None and not self._stopped:
+            self._thread = threading.Thread(target=self._run, name="sheets-lead-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if not self._pending:
+                        self._condition.wait()
+                        continue
+                    remaining = self._oldest + self.max_delay - time.monotonic()
+                    if len(self._pending) >= self.max_batch_size or remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._stopped:
+                    return
+            if not self.flush():
+                # Back off before retrying a failed batch
+                time.sleep(self.max_delay)
+
+    @traced("sheets.batch_write")
+    def _write(self, batch):
+        sheet = get_worksheet()
+        if not sheet:
+            raise RuntimeError("Sheets client not available")
+        write_lead_rows(sheet, list(batch.values()))
+
+def write_lead_rows(sheet, entries):
+    """
+    Upsert (data, check_existing) entries with at most one batch_update and
+    one append_rows call. Returns the sheet row of each entry, in order
+    (None if the append response didn't say where the rows landed).
+    """
+    # One incremental index refresh covers every lookup in the batch
+    refresh_lead_index(sheet)
+
+    for attempt in range(2):
+        rows, updates, appends = _plan_lead_rows(entries)
+        if not updates or attempt or _rows_hold_leads(sheet, updates):
+            break
+        # Rows were moved or deleted remotely - rebuild the index and plan again
+        print("[Lead Index] Indexed rows no longer hold their leads, rebuilding index")
+        refresh_lead_index(sheet, full=True)
+
+    if updates:
+        sheet.batch_update([
+            {"range": f"A{row}:Z{row}", "values": [data]} for row, data in updates
+        ])
+        for row, data in updates:
+            _record_lead_row(row, data)
+        debug(f"Updated {len(updates)} existing lead(s) in one batch")
+
+    if appends:
+        response = sheet.append_rows([data for data, _ in appends])
+        first_row = _parse_updated_row(response)
+        if first_row:
+            for offset, (data, indexes) in enumerate(appends):
+                _record_lead_row(first_row + offset, data)
+                for index in indexes:
+                    rows[index] = first_row + offset
+        debug(f"Appended {len(appends)} new lead(s) in one batch")
+    return rows
+
+def _plan_lead_rows(entries):
+    """Split entries into updates of indexed rows and appends; returns (rows, updates, appends)"""
+    rows = [None] * len(entries)
+    updates = []
+    appends = []  # (data, entry indexes)
+    append_emails = {}
+    for index, (data, check_existing) in enumerate(entries):
+        uid, email = data[0], data[2]
+        row = _lookup_lead_row(uid=uid, email=email) if check_existing else None
+        if row:
+            updates.append((row, data))
+            rows[index] = row
+            continue
+
+        # Two new leads in the same batch with the same email become one row
+        email_key = normalize_email(email) if check_existing else None
+        if email_key and email_key in append_emails:
+            position = append_emails[email_key]
+            appends[position] = (data, appends[position][1] + [index])
+            continue
+        if email_key:
+            append_emails[email_key] = len(appends)
+        appends.append((data, [index]))
+    return rows, updates, appends
+
+def _rows_hold_leads(sheet, updates):
+    """Read the rows about to be updated (one API call) and check they still hold their leads"""
+    current = sheet.batch_get([f"A{row}:Z{row}" for row, _ in updates])
+    return all(
+        _row_holds_lead(values[0] if values else [], uid=data[0], email=data[2])
+        for (row, data), values in zip(updates, current)
+    )
+
+_lead_writer = None
+_lead_writer_lock = threading.Lock()
+
+def get_lead_writer():
+    """Get the process-wide batched lead writer, creating it on first use"""
+    global _lead_writer
+    with _lead_writer_lock:
+        if _lead_writer is None:
+            _lead_writer = LeadWriter()
+            atexit.register(_lead_writer.close)
+        return _lead_writer
+
+class LeadSync:
+    """
+    Background worker that keeps the sheet in step with the local lead store.
+    Saves are pushed in batches a moment after they happen (LEAD_SYNC_DELAY),
+    and the whole sheet is pulled every LEAD_SYNC_PULL_INTERVAL seconds so
+    edits made directly in the sheet reach the store. When several processes
+    share one store file, a lease in the store lets only one of them sync.
+    """
+
+    def __init__(self, store, delay=LEAD_SYNC_DELAY, pull_interval=LEAD_SYNC_PULL_INTERVAL, batch_size=LEAD_SYNC_BATCH_SIZE):
+        self.store = store
+        self.delay = delay
+        self.pull_interval = pull_interval
+        self.batch_size = batch_size
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.pulled = False  # Whether the store has seen the sheet at least once
+        self._first_pull = threading.Event()  # Set once the first pull has succeeded or failed
+        self._next_pull = time.monotonic()
+        self._notified = False
+        self._condition = threading.Condition()
+        self._sync_lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+
+    def notify(self):
+        """A lead was saved locally; push it with the next batch"""
+        with self._condition:
+            self._notified = True
+            self._start()
+            self._condition.notify()
+
+    def _start(self):
+        # Caller holds self._condition
+        if self._thread is None and not self._stopped and sheets_available:
+            self._thread = threading.Thread(target=self._run, name="sheets-lead-sync", daemon=True)
+            self._thread.start()
+
+    def _lease(self):
+        return self.store.acquire_lease(self.owner, max(self.pull_interval, self.delay) * 2)
+
+    @traced("sheets.sync_push")
+    def push(self, lead_id=None):
+        """
+        Write every pending lead to the sheet. Returns False if a write failed,
+        or, given a lead_id, unless that lead's row is now in the sheet - it
+        isn't when another process holds the sync lease.
+        """
+        with self._sync_lock:
+            try:
+                if not self._lease():
+                    return lead_id is None
+                sheet = get_worksheet()
+                if not sheet:
+                    return False
+                while True:
+                    pending = self.store.pending(self.batch_size)
+                    if not pending:
+                        return lead_id is None or self.store.is_synced(lead_id)
+                    entries = [([data.get(column) for column in LEAD_COLUMNS], True) for _, _, data, _ in pending]
+                    rows = write_lead_rows(sheet, entries)
+                    self.store.mark_synced([
+                        (lead_id, version, row) for (lead_id, version, _, _), row in zip(pending, rows)
+                    ])
+                    debug(f"[Lead Sync] Pushed {len(pending)} lead(s) to the sheet")
+            except Exception as e:
+                print(f"[Lead Sync] Push failed, leads stay queued locally: {e}")
+                _handle_sheets_error(e)
+                return False
+
+    @traced("sheets.sync_pull")
+    def pull(self):
+        """Read the whole sheet into the store. Returns False if the read failed."""
+        with self._sync_lock:
+            self._next_pull = time.monotonic() + self.pull_interval
+            try:
+                if not self._lease():
+                    # Another process keeps the shared store current
+                    self.pulled = True
+                    return True
+                sheet = get_worksheet()
+                if not sheet:
+                    return False
+                values = sheet.get_all_values()
+                _rebuild_lead_index(values)
+                headers = values[0] if values else []
+                changed = self.store.merge_remote(
+                    (row, dict(zip(headers, record))) for row, record in enumerate(values[1:], 2)
+                )
+                self.pulled = True
+                if changed:
+                    debug(f"[Lead Sync] Pulled {changed} new or edited lead(s) from the sheet")
+                return True
+            except Exception as e:
+                print(f"[Lead Sync] Pull failed: {e}")
+                _handle_sheets_error(e)
+                return False
+            finally:
+                self._first_pull.set()
+
+    def ensure_pulled(self):
+        """Start the worker, whose first pass pulls the sheet into the store, without waiting for it"""
+        with self._condition:
+            self._start()
+
+    def wait_pulled(self, timeout=None):
+        """
+        Start the worker and wait up to timeout for its first pull, so lookups
+        see leads that only exist in the sheet. Returns whether the store has
+        seen the sheet (always True when there is no sheet to pull from).
+        """
+        if not sheets_available:
+            return True
+        self.ensure_pulled()
+        self._first_pull.wait(LEAD_SYNC_PULL_TIMEOUT if timeout is None else timeout)
+        return self.pulled
+
+    def close(self):
+        """Stop the background thread and push anything still pending"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=self.delay + 5)
+        return self.push() if sheets_available else True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped and not self._notified and time.monotonic() < self._next_pull:
+                    self._condition.wait(self._next_pull - time.monotonic())
+                if self._stopped:
+                    return
+                if self._notified:
+                    # Let a burst of saves land in the same batch
+                    deadline = time.monotonic() + self.delay
+                    while not self._stopped and time.monotonic() < deadline:
+                        self._condition.wait(deadline - time.monotonic())
+                    self._notified = False
+                if self._stopped:
+                    return
+            pushed = self.push()
+            if time.monotonic() >= self._next_pull:
+                self.pull()
+            if not pushed:
+                # Back off before retrying; the leads are safe in the store
+                with self._condition:
+                    self._notified = True
+                    self._condition.wait(self.delay * 5)
+
+_lead_sync = None
+_lead_sync_lock = threading.Lock()
+
+def get_lead_sync():
+    """Get the process-wide lead sync worker, or None if the local lead store is off"""
+    global _lead_sync
+    store = get_lead_store()
+    if store is None:
         return None
+    with _lead_sync_lock:
+        if _lead_sync is None:
+            _lead_sync = LeadSync(store)
+            atexit.register(_lead_sync.close)
+        return _lead_sync
 
+def start_lead_sync():
+    """Start the background sync at the start of a call, so its first pull lands before the first lookup"""
+    try:
+        sync = get_lead_sync()
+        if sync is not None:
+            sync.ensure_pulled()
+    except Exception as e:
+        print(f"[Lead Sync] Could not start: {e}")
+
+def flush_leads():
+    """Synchronously write any queued leads (e.g. in tests or before shutdown)"""
+    success = True
+    if _lead_writer is not None:
+        success = _lead_writer.flush()
+    if _lead_sync is not None:
+        success = _lead_sync.push() and success
+    return success
+
+@traced("sheets.log_lead")
 def log_lead(uid, name, email, phone, location, budget, property_type, property_size, timeline, 
              interest, status, created_date, last_contact_date, lead_type, use_case, company, 
              position, industry, company_size, decision_maker, next_followup, followup_required, 
-             call_outcome, notes, lead_source, competitors):
-    """Attempt to log to Google Sheets only. No fallback to local save."""
+             call_outcome, notes, lead_source, competitors, batched=None):
+    """
+    Save the lead to the local lead store first, so a Sheets outage no longer
+    loses it. With batched=True (or GOOGLE_SHEETS_BATCH_WRITES set) it is
+    left for the LeadSync worker to push with its next batch; otherwise the
+    pending leads are pushed before returning, as a direct write would be.
+    With LEAD_STORE off the sheet is written directly, or the lead is queued
+    on the background LeadWriter when batched.
+    """
 
     # Prepare lead data for Sheets only
     lead_data = {
@@ -98,76 +712,125 @@ def log_lead(uid, name, email, phone, location, budget, property_type, property_
 
     # Data to log in same order as column headers
     data = list(lead_data.values())
+    check_existing = bool(email and len(email) > 0 and email != "Not provided")
+    batched = BATCH_WRITES if batched is None else batched
+
+    store = get_lead_store()
+    if store is not None:
+        try:
+            lead_id = store.save(lead_data, match_email=check_existing)
+        except Exception as e:
+            # Fall back to writing the sheet directly
+            print(f"[Lead Store] Failed to save lead locally: {e}")
+        else:
+            sync = get_lead_sync()
+            if batched or not sheets_available:
+                sync.notify()
+                debug(f"Saved lead locally, queued for sync: {name}")
+            elif sync.push(lead_id):
+                debug(f"Saved lead locally and wrote it to the sheet: {name}")
+            else:
+                # Safe in the store; the worker (or the process holding the lease) pushes it
+                sync.notify()
+                debug(f"Saved lead locally, sync pending: {name}")
+            return True
+
+    if batched:
+        get_lead_writer().enqueue(uid, email, data, check_existing)
+        debug(f"Queued lead for batched write: {name}")
+        return True
 
     try:
-        client = get_sheets_client()
-        if not client:
+        sheet = get_worksheet()
+        if not sheet:
             raise RuntimeError("Sheets client not available")
 
-        spreadsheet = client.open_by_key(SPREADSHEET_ID)
-        sheet = spreadsheet.worksheet(SHEET_NAME)
-
-        # Look for existing record
-        existing_lead = None
-        if email and len(email) > 0 and email != "Not provided":
-            records = sheet.get_all_records()
-            for i, record in enumerate(records):
-                if record.get("UID") == uid or record.get("Email") == email:
-                    existing_lead = record
-                    existing_lead["row"] = i + 2
-                    break
-
-        if existing_lead:
-            row = existing_lead["row"]
+        # Look for existing record in the lead index, checking the row still holds it
+        row = None
+        if check_existing:
+            row, _ = find_verified_lead_row(sheet, uid=uid, email=email)
+
+        if row:
             cell_range = f"A{row}:Z{row}"
             sheet.update(cell_range, [data])
-            print(f"Updated existing lead: {name} at row {row}")
+            _record_lead_row(row, data)
+            debug(f"Updated existing lead: {name} at row {row}")
         else:
-            sheet.append_row(data)
-            print(f"Appended new lead: {name}")
+            response = sheet.append_row(data)
+            _record_lead_row(_parse_updated_row(response), data)
+            debug(f"Appended new lead: {name}")
 
         return True
 
     except Exception as e:
         print(f"[Google Sheets] Failed to log lead: {e}")
+        _handle_sheets_error(e)
         return False
 
 
 
+@traced("sheets.get_all_leads")
 def get_all_leads():
-    """Retrieve all leads from the sheet"""
+    """Retrieve all leads, from the local store once it has pulled the sheet"""
+    store = get_lead_store()
+    if store is not None:
+        try:
+            if get_lead_sync().wait_pulled():
+                return store.all()
+            print("[Lead Store] Sheet not pulled yet, reading leads from the sheet")
+        except Exception as e:
+            print(f"[Lead Store] Error reading leads, falling back to the sheet: {e}")
+
     try:
-        client = get_sheets_client()
-        spreadsheet = client.open_by_key(SPREADSHEET_ID)
-        sheet = spreadsheet.worksheet(SHEET_NAME)
+        sheet = get_worksheet()
+        if not sheet:
+            raise RuntimeError("Sheets client not available")
         
         return sheet.get_all_records()
     except Exception as err:
         print(f"Error retrieving leads from Google Sheets: {err}")
+        _handle_sheets_error(err)
         return None
 
+@traced("sheets.check_existing_lead")
 def check_existing_lead(email):
     """Check if a lead already exists with the given email and return their data if found"""
+    store = get_lead_store()
+    if store is not None:
+        try:
+            record = store.find(email=email)
+            # Not in the store yet: it may only be in the sheet, which the first pull brings in
+            pulled = record is not None or get_lead_sync().wait_pulled()
+            if pulled:
+                record = record or store.find(email=email)
+                if record:
+                    debug(f"Found existing lead with email {email} in the lead store")
+                else:
+                    debug(f"No existing lead found with email {email}")
+                return record
+            print("[Lead Store] Sheet not pulled yet, checking the sheet")
+        except Exception as e:
+            print(f"[Lead Store] Error checking for existing lead, falling back to the sheet: {e}")
+
     try:
         # Open the sheet
-        client = get_sheets_client()
-        spreadsheet = client.open_by_key(SPREADSHEET_ID)
-        sheet = spreadsheet.worksheet(SHEET_NAME)
-        
-        # Get all records
-        records = sheet.get_all_records()
+        sheet = get_worksheet()
+        if not sheet:
+            raise RuntimeError("Sheets client not available")
         
-        # Look for a matching email
-        for i, record in enumerate(records):
-            if record.get('Email') == email:
-                print(f"Found existing lead with email {email} at row {i+2}")
-                # Add row number for later updates
-                record['row'] = i + 2
-                return record
-                
-        print(f"No existing lead found with email {email}")
+        # Look up the row in the lead index and read only that row
+        row, values = find_verified_lead_row(sheet, email=email)
+        if row:
+            record = dict(zip(_lead_index["headers"], values))
+            debug(f"Found existing lead with email {email} at row {row}")
+            # Add row number for later updates
+            record['row'] = row
+            return record
+
+        debug(f"No existing lead found with email {email}")
         return None
         
     except Exception as e:
         print(f"Error checking for existing lead: {e}")
+        _handle_sheets_error(e)
         return None
@@ -0,0 +1,161 @@
+# speculative_tts.py
+"""
+Speculative text-to-speech. While the caller is talking, and while the reply
+is being generated, the canned replies the agent is most likely to say next
+(RealEstateAgent.next_reply_candidates) are synthesized in the background.
+When the reply it settles on is one of them, its audio is ready as soon as
+the turn ends; guesses that are never served are counted as wasted synthesis.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from tracing import debug
+from speech import speak, DEFAULT_VOICE_ID, DEFAULT_VOICE_SETTINGS, TTS_MODEL_ID, TTS_OUTPUT_FORMAT
+from tts_cache import get_audio_cache, audio_cache_key
+import metering
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+TTS_SPECULATE = os.getenv("TTS_SPECULATE", "true").lower() in ("1", "true", "yes")
+TTS_SPECULATE_COUNT = int(os.getenv("TTS_SPECULATE_COUNT", "2"))  # Replies synthesized ahead per turn
+TTS_SPECULATE_WORKERS = int(os.getenv("TTS_SPECULATE_WORKERS", "2"))
+
+class SpeculativeSynthesizer:
+    """
+    Audio synthesized ahead for one conversation. speculate() is called with
+    the likely next replies, take() with the reply actually chosen. Guesses
+    still in the running carry over to the next speculate(); the rest are
+    dropped, and cancelled if they haven't started yet.
+    """
+
+    def __init__(self, voice_id=DEFAULT_VOICE_ID, voice_settings=None, output_format=TTS_OUTPUT_FORMAT,
+                 count=TTS_SPECULATE_COUNT, workers=TTS_SPECULATE_WORKERS):
+        self.voice_id = voice_id
+        self.voice_settings = voice_settings or DEFAULT_VOICE_SETTINGS
+        self.output_format = output_format
+        self.count = count
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-speculate")
+        self._clips = {}  # Cache key -> (text, future of the audio, or None if it is already cached)
+        self._open = False  # A guess has been made that no take() has settled yet
+        self._lock = threading.Lock()
+        self._stats = {
+            "rounds": 0,
+            "hits": 0,
+            "cached_hits": 0,
+            "misses": 0,
+            "synthesized": 0,
+            "synthesized_chars": 0,
+            "wasted": 0,
+            "wasted_chars": 0,
+            "wasted_bytes": 0,
+        }
+
+    def _key(self, text):
+        return audio_cache_key(text, self.voice_id, TTS_MODEL_ID, self.output_format, self.voice_settings)
+
+    def speculate(self, texts):
+        """Start synthesizing the likely next replies, best guess first"""
+        cache = get_audio_cache()
+        wanted = {self._key(text): text for text in texts[:self.count]}
+
+        synthesizing = []
+        with self._lock:
+            self._stats["rounds"] += 1
+            self._open = True
+            dropped = [self._clips.pop(key) for key in list(self._clips) if key not in wanted]
+            for key, text in wanted.items():
+                if key in self._clips:
+                    continue
+                # Already on disk: nothing to get ahead of, but take() still serves it whole
+                if cache and cache.contains(key):
+                    self._clips[key] = (text, None)
+                    continue
+                future = self._executor.submit(metering.bind(speak), text, self.voice_id, self.voice_settings, self.output_format)
+                self._clips[key] = (text, future)
+                synthesizing.append(text)
+                self._stats["synthesized"] += 1
+                self._stats["synthesized_chars"] += len(text)
+        for text, future in dropped:
+            self._discard(text, future)
+        if synthesizing:
+            debug(f"[TTS Speculate] Synthesizing ahead: {[text[:40] for text in synthesizing]}")
+
+    def _discard(self, text, future):
+        if future is None:
+            return
+        if future.cancel():
+            # Never started, so it cost nothing
+            with self._lock:
+                self._stats["synthesized"] -= 1
+                self._stats["synthesized_chars"] -= len(text)
+            return
+        with self._lock:
+            self._stats["wasted"] += 1
+            self._stats["wasted_chars"] += len(text)
+        future.add_done_callback(self._count_wasted_bytes)
+
+    def _count_wasted_bytes(self, future):
+        try:
+            audio = future.result()
+        except Exception:
+            return
+        with self._lock:
+            self._stats["wasted_bytes"] += len(audio or b"")
+
+    def take(self, text):
+        """
+        The audio for text if it was synthesized ahead (waiting for it if it is
+        still in flight) or is in the audio cache, or None - the caller then
+        synthesizes it as usual
+        """
+        key = self._key(text)
+        with self._lock:
+            entry = self._clips.pop(key, None)
+            guessed, self._open = self._open, False
+        if entry is None or entry[1] is None:
+            # Whole replies are cached under their own key, which speak_stream's per-sentence lookups never find
+            cache = get_audio_cache()
+            audio = cache.get(key) if cache and cache.contains(key) else None
+            if guessed:
+                with self._lock:
+                    self._stats["cached_hits" if audio else "misses"] += 1
+            return audio
+        try:
+            audio = entry[1].result()
+        except Exception as e:
+            print(f"[TTS Speculate] Synthesis failed: {e}")
+            audio = None
+        with self._lock:
+            self._stats["hits" if audio else "misses"] += 1
+        if audio:
+            debug(f"[TTS Speculate] Hit, serving pre-synthesized audio for: {text[:50]}")
+        return audio
+
+    def close(self):
+        """Drop every outstanding guess and stop the workers"""
+        with self._lock:
+            dropped = list(self._clips.values())
+            self._clips.clear()
+        for text, future in dropped:
+            self._discard(text, future)
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        """Hit rate and the synthesis spent on guesses that were never served"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._clips)
+        guesses = stats["hits"] + stats["cached_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["cached_hits"]) / guesses if guesses else 0.0
+        stats["wasted_ratio"] = stats["wasted_chars"] / stats["synthesized_chars"] if stats["synthesized_chars"] else 0.0
+        return stats
+
+def make_speculator(**kwargs):
+    """A SpeculativeSynthesizer for one conversation, or None if TTS_SPECULATE is off"""
+    if not TTS_SPECULATE or TTS_SPECULATE_COUNT <= 0:
+        return None
+    return SpeculativeSynthesizer(**kwargs)
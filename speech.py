@@ -2,8 +2,17 @@
 
 import speech_recognition as sr
 import os
+import re
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from elevenlabs import ElevenLabs
+from tts_cache import get_audio_cache, audio_cache_key
+from tracing import traced, span, record, debug
+import metering
+from vad import make_vad, Endpointer, VAD_SAMPLE_RATE, VAD_FRAME_MS
 
 # Load API key from .env file
 load_dotenv()
@@ -18,42 +27,77 @@ last_recognition_result = None
 # Store success state in a global variable
 _last_speak_success = None
 
-__all__ = ['speak', 'listen']
+# Time from calling speak_stream until its first audio chunk, in seconds
+_last_time_to_first_audio = None
 
-def speak(text, voice_id="21m00Tcm4TlvDq8ikWAM"):  # Default to Rachel voice
+# Time from the caller's last voiced frame until their text was ready, in seconds
+_last_speech_to_text = None
+
+# Text-to-speech settings shared by speak and speak_stream
+DEFAULT_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"  # Rachel voice
+TTS_MODEL_ID = "eleven_multilingual_v2"
+TTS_OUTPUT_FORMAT = "mp3_44100_128"
+DEFAULT_VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.75,
+    "style": 0.0,
+    "use_speaker_boost": True
+}
+# Latency optimization used when streaming (0 = best quality, 4 = fastest)
+STREAMING_LATENCY = int(os.getenv("ELEVENLABS_STREAMING_LATENCY", "3"))
+# Capture with voice activity detection and transcribe segments while the caller is still talking
+STT_VAD = os.getenv("STT_VAD", "true").lower() in ("1", "true", "yes")
+STT_SEGMENT_WORKERS = int(os.getenv("STT_SEGMENT_WORKERS", "2"))
+
+# Sentence boundary: end punctuation followed by whitespace
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+__all__ = ['speak', 'speak_stream', 'listen', 'PlaybackPacer', 'transcribe', 'stream_utterance']
+
+@traced("tts.speak")
+def speak(text, voice_id=DEFAULT_VOICE_ID, voice_settings=None, output_format=TTS_OUTPUT_FORMAT):
     """
     Convert text to speech using ElevenLabs API and return audio data for Streamlit.
     Uses the latest API parameters for optimal quality and performance.
     """
     global _last_speak_success
     try:
-        print(f"[TTS] Starting text-to-speech conversion for text: {text[:50]}...")
-        print(f"[TTS] Using voice ID: {voice_id}")
+        debug(f"[TTS] Starting text-to-speech conversion for text: {text[:50]}...")
+        debug(f"[TTS] Using voice ID: {voice_id}")
+        
+        # Serve repeated utterances from the audio cache
+        voice_settings = voice_settings or DEFAULT_VOICE_SETTINGS
+        cache = get_audio_cache()
+        cache_key = audio_cache_key(text, voice_id, TTS_MODEL_ID, output_format, voice_settings)
+        if cache:
+            audio_data = cache.get(cache_key)
+            if audio_data:
+                debug(f"[TTS] Cache hit ({len(audio_data)} bytes)")
+                _last_speak_success = True
+                return audio_data
         
         # Convert text to speech using ElevenLabs client
-        print("[TTS] Calling ElevenLabs API...")
+        debug("[TTS] Calling ElevenLabs API...")
+        metering.record_tts(text)
         audio_generator = client.text_to_speech.convert(
             voice_id=voice_id,
             text=text,
-            model_id="eleven_multilingual_v2",
-            output_format="mp3_44100_128",
+            model_id=TTS_MODEL_ID,
+            output_format=output_format,
             optimize_streaming_latency=0,  # No latency optimization for best quality
             apply_text_normalization="auto",  # Auto text normalization
             apply_language_text_normalization=False,  # No language-specific normalization
             use_pvc_as_ivc=False,  # Use PVC version for better quality
-            voice_settings={
-                "stability": 0.5,
-                "similarity_boost": 0.75,
-                "style": 0.0,
-                "use_speaker_boost": True
-            }
+            voice_settings=voice_settings
         )
-        print("[TTS] Received audio generator from API")
+        debug("[TTS] Received audio generator from API")
         
         # Convert generator to bytes
-        print("[TTS] Converting audio generator to bytes...")
+        debug("[TTS] Converting audio generator to bytes...")
         audio_data = b"".join(chunk for chunk in audio_generator)
-        print(f"[TTS] Generated audio data size: {len(audio_data)} bytes")
+        debug(f"[TTS] Generated audio data size: {len(audio_data)} bytes")
+        if cache:
+            cache.put(cache_key, audio_data)
         
         # For testing outside of Streamlit
         if __name__ == "__main__":
@@ -66,7 +110,7 @@ def speak(text, voice_id="21m00Tcm4TlvDq8ikWAM"):  # Default to Rachel voice
             os.remove("temp_audio.mp3")
             print("[TTS] Cleaned up temporary file")
         
-        print("[TTS] Successfully generated audio data")
+        debug("[TTS] Successfully generated audio data")
         _last_speak_success = True
         return audio_data
             
@@ -78,6 +122,127 @@ def speak(text, voice_id="21m00Tcm4TlvDq8ikWAM"):  # Default to Rachel voice
         _last_speak_success = False
         return None
 
+def split_sentences(text):
+    """Split a reply at sentence boundaries so each sentence can be synthesized on its own"""
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+def _iter_sentences(text_chunks):
+    """Yield complete sentences from a stream of text chunks (e.g. LLM tokens)"""
+    buffer = ""
+    for chunk in text_chunks:
+        buffer += chunk
+        parts = _SENTENCE_END.split(buffer)
+        # Everything but the last part ends in a sentence boundary
+        for sentence in parts[:-1]:
+            if sentence.strip():
+                yield sentence.strip()
+        buffer = parts[-1]
+    if buffer.strip():
+        yield buffer.strip()
+
+def speak_stream(text, voice_id=DEFAULT_VOICE_ID, voice_settings=None, output_format=TTS_OUTPUT_FORMAT):
+    """
+    Stream text-to-speech audio, yielding MP3 chunks (or output_format, e.g.
+    "pcm_16000" for local playback) as ElevenLabs returns them.
+    text can be a string or an iterable of text chunks (e.g. a streamed LLM
+    reply). It is split at sentence boundaries and each sentence is synthesized
+    in a background thread as soon as it is complete, so synthesis of one
+    sentence overlaps generation of the next and playback can start after
+    the first sentence. Time to first audio is stored for
+    get_last_time_to_first_audio().
+    """
+    global _last_speak_success, _last_time_to_first_audio
+    started = time.perf_counter()
+    _last_time_to_first_audio = None
+    text_chunks = [text] if isinstance(text, str) else text
+    voice_settings = voice_settings or DEFAULT_VOICE_SETTINGS
+    cache = get_audio_cache()
+    
+    sentences = queue.Queue()
+    audio_chunks = queue.Queue()
+    done = object()
+    # Set when the caller stops consuming (e.g. closes the generator early)
+    cancelled = threading.Event()
+    
+    def split_text():
+        try:
+            for sentence in _iter_sentences(text_chunks):
+                if cancelled.is_set():
+                    break
+                sentences.put(sentence)
+        except Exception as e:
+            audio_chunks.put(e)
+        finally:
+            sentences.put(done)
+    
+    def synthesize():
+        try:
+            while True:
+                sentence = sentences.get()
+                if sentence is done or cancelled.is_set():
+                    break
+                # Whole sentences are cached, so repeated ones skip the API
+                cache_key = audio_cache_key(sentence, voice_id, TTS_MODEL_ID, output_format, voice_settings)
+                cached = cache.get(cache_key) if cache else None
+                if cached:
+                    audio_chunks.put(cached)
+                    continue
+                
+                debug(f"[TTS] Streaming sentence: {sentence[:50]}...")
+                metering.record_tts(sentence)
+                sentence_audio = []
+                for chunk in client.text_to_speech.stream(
+                    voice_id=voice_id,
+                    text=sentence,
+                    model_id=TTS_MODEL_ID,
+                    output_format=output_format,
+                    optimize_streaming_latency=STREAMING_LATENCY,
+                    voice_settings=voice_settings
+                ):
+                    if cancelled.is_set():
+                        return
+                    if chunk:
+                        sentence_audio.append(chunk)
+                        audio_chunks.put(chunk)
+                if cache:
+                    cache.put(cache_key, b"".join(sentence_audio))
+        except Exception as e:
+            audio_chunks.put(e)
+        finally:
+            audio_chunks.put(done)
+    
+    threading.Thread(target=split_text, name="tts-split", daemon=True).start()
+    threading.Thread(target=metering.bind(synthesize), name="tts-stream", daemon=True).start()
+    
+    total_bytes = 0
+    try:
+        while True:
+            chunk = audio_chunks.get()
+            if chunk is done:
+                break
+            if isinstance(chunk, Exception):
+                print(f"[TTS ERROR] {str(chunk)}")
+                _last_speak_success = False
+                return
+            if _last_time_to_first_audio is None:
+                _last_time_to_first_audio = time.perf_counter() - started
+                record("tts.first_audio", _last_time_to_first_audio)
+                debug(f"[TTS] Time to first audio: {_last_time_to_first_audio:.3f}s")
+            total_bytes += len(chunk)
+            yield chunk
+    finally:
+        cancelled.set()
+    
+    debug(f"[TTS] Streamed {total_bytes} bytes in {time.perf_counter() - started:.3f}s")
+    _last_speak_success = True
+
+def get_last_time_to_first_audio():
+    """
+    Returns the time to first audio (seconds) of the last speak_stream call,
+    or None if no audio has been produced yet.
+    """
+    return _last_time_to_first_audio
+
 def get_last_speak_status():
     """
     Returns the success status of the last speak operation.
@@ -85,71 +250,251 @@ def get_last_speak_status():
     global _last_speak_success
     return _last_speak_success if '_last_speak_success' in globals() else False
 
-def listen(timeout=5, phrase_time_limit=10, wait_for_audio=True):
+def _audio_duration(audio_data):
+    """Estimate playback length (seconds) of an MP3 clip from its size and bitrate"""
+    bitrate_kbps = int(TTS_OUTPUT_FORMAT.rsplit("_", 1)[-1])
+    return len(audio_data) * 8 / (bitrate_kbps * 1000)
+
+class PlaybackPacer:
+    """
+    Estimated end of one session's current clip, so listen() waits about as
+    long as it plays instead of sleeping a fixed amount. Browsers don't report
+    when playback actually ends, so this is paced on the clip's length. Keep
+    one per session: a clip playing to one caller never delays another.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ends_at = 0.0
+
+    def started(self, audio_data):
+        """Record that a clip was handed to the player"""
+        with self._lock:
+            self._ends_at = time.monotonic() + _audio_duration(audio_data)
+
+    def wait(self, max_wait=30):
+        """Block until the current clip should have finished playing, at most max_wait seconds"""
+        with self._lock:
+            remaining = self._ends_at - time.monotonic()
+        if remaining > 0:
+            time.sleep(min(remaining, max_wait))
+
+@traced("stt.transcribe")
+def transcribe(audio_bytes, filename="speech.wav", detailed=True):
+    """
+    Convert recorded audio bytes (WAV, MP3, ...) to text using ElevenLabs,
+    straight from memory. Returns the recognition details dict (text,
+    language, words) or None if no text was detected. detailed=False skips
+    word timestamps, audio-event tags and diarization for a faster answer.
+    """
+    metering.record_stt(metering.audio_seconds(audio_bytes))
+    result = client.speech_to_text.convert(
+        model_id="scribe_v1",  # Using Scribe model
+        file=(filename, audio_bytes),
+        language_code="en",  # Force English language
+        timestamps_granularity="word" if detailed else "none",  # Get word-level timestamps
+        tag_audio_events=detailed,  # Tag audio events like laughter
+        diarize=detailed  # Annotate speaker information
+    )
+    
+    if result and result.text:
+        return {
+            "text": result.text,
+            "language_code": result.language_code,
+            "language_probability": result.language_probability,
+            "words": result.words if hasattr(result, 'words') else None
+        }
+    return None
+
+class StreamingTranscriber:
+    """
+    Takes captured frames as they arrive and transcribes each finished speech
+    segment in the background while capture continues, so once the caller
+    stops talking only the last segment is still being transcribed.
+    """
+
+    def __init__(self, sample_rate, sample_width, max_workers=STT_SEGMENT_WORKERS, on_partial=None):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.max_workers = max_workers
+        # Called (from a worker thread) with the text so far each time a segment lands
+        self.on_partial = on_partial
+        self._frames = []
+        self._futures = []
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def feed(self, frame):
+        self._frames.append(frame)
+
+    def segment_done(self):
+        """Send the frames gathered since the last segment off for transcription"""
+        if not self._frames:
+            return
+        audio = sr.AudioData(b"".join(self._frames), self.sample_rate, self.sample_width).get_wav_data()
+        self._frames = []
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stt-segment")
+        future = self._pool.submit(metering.bind(transcribe), audio, f"segment-{len(self._futures)}.wav", False)
+        with self._lock:
+            self._futures.append(future)
+        if self.on_partial:
+            future.add_done_callback(self._segment_landed)
+
+    def partial_text(self):
+        """Text of the segments transcribed so far, up to the first one still in flight"""
+        with self._lock:
+            futures = list(self._futures)
+        texts = []
+        for future in futures:
+            if not future.done() or future.exception() is not None:
+                break
+            result = future.result()
+            if result and result["text"].strip():
+                texts.append(result["text"].strip())
+        return " ".join(texts)
+
+    def _segment_landed(self, future):
+        text = self.partial_text()
+        if text:
+            self.on_partial(text)
+
+    def finish(self, discard_tail=False):
+        """Transcribe what's left (unless it's only silence) and return the joined details, or None"""
+        if discard_tail:
+            self._frames = []
+        self.segment_done()
+        try:
+            results = [future.result() for future in self._futures]
+        finally:
+            self.close()
+        results = [result for result in results if result and result["text"].strip()]
+        if not results:
+            return None
+        return {
+            "text": " ".join(result["text"].strip() for result in results),
+            "language_code": results[0]["language_code"],
+            "language_probability": min(result["language_probability"] for result in results),
+            "words": None,
+            "segments": len(self._futures)
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+def stream_utterance(read_frame, sample_rate=VAD_SAMPLE_RATE, sample_width=2, timeout=5, phrase_time_limit=10,
+                     endpointer=None, on_speech_start=None, on_partial=None):
+    """
+    Capture one turn from read_frame() (returns the next VAD_FRAME_MS of
+    16-bit mono PCM), end it on trailing silence and transcribe it while it
+    is being captured. Returns the recognition details dict with
+    "speech_to_text" (seconds from the last voiced frame to the text) or
+    None; raises sr.WaitTimeoutError if the caller never starts talking.
+    on_speech_start() is called when speech begins and on_partial(text)
+    whenever more of the transcript is known (both from worker threads).
+    """
+    global _last_speech_to_text
+    endpointer = endpointer or Endpointer(make_vad(sample_rate), VAD_FRAME_MS, timeout=timeout, max_speech=phrase_time_limit)
+    transcriber = StreamingTranscriber(sample_rate, sample_width, on_partial=on_partial)
+    try:
+        with span("stt.record"):
+            while True:
+                frame = read_frame()
+                event = endpointer.push(frame)
+                if event == "timeout":
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                if event == "start":
+                    if on_speech_start:
+                        on_speech_start()
+                    for pre_roll_frame in endpointer.pre_roll():
+                        transcriber.feed(pre_roll_frame)
+                elif endpointer.started:
+                    transcriber.feed(frame)
+                if event == "segment":
+                    transcriber.segment_done()
+                elif event == "end":
+                    break
+        details = transcriber.finish(discard_tail=not endpointer.segment_has_speech)
+    finally:
+        transcriber.close()
+    
+    _last_speech_to_text = time.perf_counter() - endpointer.last_voiced_at
+    record("stt.speech_to_text", _last_speech_to_text)
+    debug(f"[STT] End of speech to text: {_last_speech_to_text:.3f}s "
+          f"({endpointer.silence_ms} ms endpointing, {len(transcriber._futures)} segment(s))")
+    if details:
+        details["speech_to_text"] = _last_speech_to_text
+    return details
+
+def get_last_speech_to_text():
+    """
+    Returns the time (seconds) from the end of the caller's speech until the
+    text was ready for the last VAD listen() call, or None.
+    """
+    return _last_speech_to_text
+
+@traced("stt.listen")
+def listen(timeout=5, phrase_time_limit=10, wait_for_audio=True, audio_bytes=None, playback=None):
     """
     Listen to the user's speech using microphone and convert to text using ElevenLabs.
+    Pass audio_bytes to transcribe pre-recorded audio instead of the microphone,
+    and the session's PlaybackPacer as playback to wait for its clip first.
     Returns the transcribed text as a string, while storing additional information in last_recognition_result.
     """
     global last_recognition_result
-    recognizer = sr.Recognizer()
     
-    # Wait for audio to finish if requested
-    if wait_for_audio:
-        import time
-        time.sleep(2)  # Give a small buffer for audio to finish
-        
-    with sr.Microphone() as source:
-        print("🎤 Listening... (Speak now)")
-        try:
-            # Record audio
-            audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
-            
-            # Save audio to temporary file
-            with open("temp_speech.wav", "wb") as f:
-                f.write(audio.get_wav_data())
-            
-            # Convert speech to text using ElevenLabs
-            with open("temp_speech.wav", "rb") as audio_file:
-                result = client.speech_to_text.convert(
-                    model_id="scribe_v1",  # Using Scribe model
-                    file=audio_file,
-                    language_code="en",  # Force English language
-                    timestamps_granularity="word",  # Get word-level timestamps
-                    tag_audio_events=True,  # Tag audio events like laughter
-                    diarize=True  # Annotate speaker information
-                )
-            
-            # Clean up temporary file
-            os.remove("temp_speech.wav")
+    try:
+        if audio_bytes is None:
+            # Wait for the agent's audio to finish playing if requested
+            if wait_for_audio and playback is not None:
+                with span("stt.wait_for_playback"):
+                    playback.wait()
             
-            if result and result.text:
-                print(f"User: {result.text}")
-                # Store the full result for later access
-                last_recognition_result = {
-                    "text": result.text,
-                    "language_code": result.language_code,
-                    "language_probability": result.language_probability,
-                    "words": result.words if hasattr(result, 'words') else None
-                }
-                # Return just the text content
-                return result.text
+            if STT_VAD:
+                frame_samples = VAD_SAMPLE_RATE * VAD_FRAME_MS // 1000
+                with sr.Microphone(sample_rate=VAD_SAMPLE_RATE, chunk_size=frame_samples) as source:
+                    print("🎤 Listening... (Speak now)")
+                    details = stream_utterance(
+                        lambda: source.stream.read(frame_samples), source.SAMPLE_RATE, source.SAMPLE_WIDTH,
+                        timeout=timeout, phrase_time_limit=phrase_time_limit
+                    )
             else:
-                print("[STT] No text detected.")
-                last_recognition_result = None
-                return "Sorry, I didn't catch that."
-                
-        except sr.WaitTimeoutError:
-            print("[STT] Listening timed out.")
-            last_recognition_result = None
-            return "Sorry, I didn't hear anything."
-        except sr.UnknownValueError:
-            print("[STT] Could not understand audio.")
+                recognizer = sr.Recognizer()
+                with sr.Microphone() as source, span("stt.record"):
+                    print("🎤 Listening... (Speak now)")
+                    # Record audio
+                    audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+                audio_bytes = audio.get_wav_data()
+        
+        if audio_bytes is not None:
+            # Convert speech to text using ElevenLabs, straight from memory
+            details = transcribe(audio_bytes)
+        
+        if details:
+            print(f"User: {details['text']}")
+            # Store the full result for later access
+            last_recognition_result = details
+            # Return just the text content
+            return details["text"]
+        else:
+            debug("[STT] No text detected.")
             last_recognition_result = None
             return "Sorry, I didn't catch that."
-        except Exception as e:
-            print(f"[STT ERROR] {e}")
-            last_recognition_result = None
-            return "Sorry, speech recognition service failed."
+            
+    except sr.WaitTimeoutError:
+        debug("[STT] Listening timed out.")
+        last_recognition_result = None
+        return "Sorry, I didn't hear anything."
+    except sr.UnknownValueError:
+        debug("[STT] Could not understand audio.")
+        last_recognition_result = None
+        return "Sorry, I didn't catch that."
+    except Exception as e:
+        print(f"[STT ERROR] {e}")
+        last_recognition_result = None
+        return "Sorry, speech recognition service failed."
 
 def get_last_recognition_details():
     """
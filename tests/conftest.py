@@ -0,0 +1,20 @@
+# tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+# Modules read their settings at import time, so pin them before any import:
+# no real API calls, and nothing written next to the real lead store or caches
+_scratch_dir = tempfile.TemporaryDirectory(prefix="agent-tests-")
+_scratch = _scratch_dir.name
+os.environ["GOOGLE_API_KEY"] = "test"
+os.environ["LLM_CACHE_BACKEND"] = "memory"
+os.environ["LEAD_STORE_PATH"] = os.path.join(_scratch, "leads.db")
+os.environ["TTS_CACHE_DIR"] = os.path.join(_scratch, "tts")
+os.environ["METER_LOG_PATH"] = ""
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def pytest_unconfigure(config):
+    _scratch_dir.cleanup()
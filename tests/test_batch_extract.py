@@ -0,0 +1,88 @@
+# tests/test_batch_extract.py
+
+import json
+import time
+import threading
+import pytest
+import batch_extract
+from batch_extract import parse_transcript, run_batch, main
+from benchmarks.fakes import FakeLLM
+
+EXPECTED = [("user", "Hi, I'm Alice"), ("agent", "What's your email?"), ("user", "alice@example.com")]
+
+def test_parses_role_pairs():
+    assert parse_transcript([["user", "Hi, I'm Alice"], ["agent", "What's your email?"], ["caller", "alice@example.com"]]) == EXPECTED
+
+def test_parses_role_content_objects():
+    transcript = [
+        {"role": "human", "content": "Hi, I'm Alice"},
+        {"role": "assistant", "content": "What's your email?"},
+        {"role": "customer", "content": "alice@example.com"},
+    ]
+    assert parse_transcript(transcript) == EXPECTED
+
+def test_parses_speaker_lines():
+    transcript = "User: Hi, I'm Alice\nAgent: What's your email?\n\nCaller: alice@example.com\nAgent:"
+    assert parse_transcript(transcript) == EXPECTED
+
+def _write_calls(path, count, bad_lines=()):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": f"call-{i}", "phone": "5551234567", "transcript": [["user", "Hi, I'm Alice"]]}) + "\n")
+        for line in bad_lines:
+            f.write(line + "\n")
+
+def test_cli_writes_one_result_per_transcript(tmp_path, monkeypatch):
+    llm = FakeLLM()
+    llm.script_fields = {"Name": "Alice", "Email": "alice@example.com"}
+    monkeypatch.setattr(batch_extract, "_llm", llm)
+    calls, output = tmp_path / "calls.jsonl", tmp_path / "leads.jsonl"
+    _write_calls(calls, 3, bad_lines=["not json", json.dumps({"id": "no-transcript"})])
+
+    assert main([str(calls), "--workers", "2", "--output", str(output)]) == 0
+    results = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert sorted(result["id"] for result in results) == ["call-0", "call-1", "call-2"]
+    assert all(result["lead"]["name"] == "Alice" for result in results)
+
+def test_errors_are_counted_and_written(tmp_path, monkeypatch):
+    def extract_lead(record):
+        if record["id"] == "call-1":
+            return {"id": record["id"], "error": "ValueError: bad transcript"}
+        return {"id": record["id"], "lead": {"name": "Alice"}}
+
+    monkeypatch.setattr(batch_extract, "extract_lead", extract_lead)
+    calls, output = tmp_path / "calls.jsonl", tmp_path / "leads.jsonl"
+    _write_calls(calls, 3)
+
+    stats = run_batch(str(calls), workers=2, output=str(output))
+    assert (stats["transcripts"], stats["leads"], stats["errors"]) == (3, 2, 1)
+    assert len(output.read_text(encoding="utf-8").splitlines()) == 3
+    assert main([str(calls), "--output", str(output)]) == 1
+
+def test_in_flight_transcripts_are_bounded(tmp_path, monkeypatch):
+    lock = threading.Lock()
+    counts = {"read": 0, "finished": 0, "most_ahead": 0}
+    read_transcripts = batch_extract.read_transcripts
+
+    def counting_reader(path):
+        for record in read_transcripts(path):
+            with lock:
+                counts["read"] += 1
+                counts["most_ahead"] = max(counts["most_ahead"], counts["read"] - counts["finished"])
+            yield record
+
+    def slow_extract(record):
+        time.sleep(0.01)
+        with lock:
+            counts["finished"] += 1
+        return {"id": record["id"], "lead": {}}
+
+    monkeypatch.setattr(batch_extract, "read_transcripts", counting_reader)
+    monkeypatch.setattr(batch_extract, "extract_lead", slow_extract)
+    calls = tmp_path / "calls.jsonl"
+    _write_calls(calls, 20)
+
+    stats = run_batch(str(calls), workers=2, output=str(tmp_path / "leads.jsonl"), max_in_flight=3)
+    assert stats["transcripts"] == 20
+    # The reader is at most one record ahead of the queued ones
+    assert counts["most_ahead"] <= 4
@@ -0,0 +1,11 @@
+# tests/test_benchmarks.py
+
+import pytest
+from benchmarks.run import main
+from benchmarks.conversations import CONVERSATIONS
+
+@pytest.mark.parametrize("flags", [[], ["--async"], ["--multi-call"], ["--async", "--multi-call"]])
+def test_every_scripted_call_completes(flags, tmp_path, capsys):
+    out = tmp_path / "run.json"
+    main(flags + ["--json", str(out)])
+    assert f"Leads completed: {len(CONVERSATIONS)}/{len(CONVERSATIONS)}" in capsys.readouterr().out
@@ -0,0 +1,48 @@
+# tests/test_classifiers.py
+
+import asyncio
+from classifiers import classify_lead_type, classify_interest
+from benchmarks.fakes import FakeLLM
+from agents import RealEstateAgent
+
+def test_clear_lead_types():
+    assert classify_lead_type("I want a house for my family")[::2] == ("residential", True)
+    assert classify_lead_type("We need office space for our company")[::2] == ("commercial", True)
+
+def test_mixed_signals_are_not_confident():
+    lead_type, confidence, confident = classify_lead_type("a home office")
+    assert not confident
+
+def test_no_signal():
+    assert classify_lead_type("hello") == (None, 0.0, False)
+
+def test_interest_levels():
+    assert classify_interest("not interested")[::2] == ("Cold", True)
+    assert classify_interest("need to move next month asap")[::2] == ("Hot", True)
+
+class AsyncOnlyLLM(FakeLLM):
+    """Fails the test if a blocking call is made"""
+
+    def invoke(self, prompt, **kwargs):
+        raise AssertionError(f"blocking LLM call in the async path: {str(prompt)[:80]}")
+
+def _agent(llm, single_call):
+    agent = RealEstateAgent(initial_phone="5551234567", single_call=single_call, llm=llm)
+    agent.llm_cache = None  # Every call reaches the fake
+    agent.conversation_started = True
+    agent.call_in_progress = True
+    return agent
+
+def test_unclear_lead_type_is_settled_without_blocking():
+    for single_call in (True, False):
+        llm = AsyncOnlyLLM()
+        agent = _agent(llm, single_call)
+        asyncio.run(agent.aprocess_message("a home office"))
+        assert agent.lead_type == "residential"
+        assert "classification" in [purpose for purpose, _ in llm.calls]
+
+def test_sync_path_still_asks_the_llm():
+    llm = FakeLLM()
+    agent = _agent(llm, True)
+    agent.process_message("a home office")
+    assert agent.lead_type == "residential"
@@ -0,0 +1,34 @@
+# tests/test_completion.py
+
+import asyncio
+import pytest
+from benchmarks.fakes import FakeLLM
+from agents import RealEstateAgent
+
+class PromptRecordingLLM(FakeLLM):
+    def __init__(self):
+        super().__init__()
+        self.prompts = {}
+
+    def _record(self, prompt):
+        purpose = super()._record(prompt)
+        self.prompts[purpose] = prompt
+        return purpose
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_completion_message_describes_the_logged_lead(use_async, monkeypatch):
+    logged = []
+    monkeypatch.setattr(RealEstateAgent, "log_to_sheet", lambda self, batched=None: logged.append(dict(self.required_fields)) or True)
+    llm = PromptRecordingLLM()
+    agent = RealEstateAgent(initial_phone="5551234567", single_call=False, llm=llm)
+    agent.llm_cache = None
+    agent.required_fields.update({"Name": "Sarah Lee", "Interest Level": "Hot"})
+    agent._needs_scheduling = lambda: False
+
+    reply = asyncio.run(agent._acomplete_call()) if use_async else agent._complete_call()
+    assert reply == "Thanks so much! We'll be in touch soon with some options."
+    completion = llm.prompts["completion"]
+    # Follow-up plan and final status are in place before the message is written
+    assert logged[0]["Next Follow-up"] == "2025-01-15"
+    assert "Next Follow-up: 2025-01-15" in completion
+    assert "Call Outcome: Information Gathered" in completion
@@ -0,0 +1,75 @@
+# tests/test_context.py
+
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from context import ConversationContext
+
+
+def _memory(count):
+    return [HumanMessage(content=f"user {i}") if i % 2 == 0 else AIMessage(content=f"agent {i}") for i in range(count)]
+
+
+def _summarizer(prompts):
+    def invoke(prompt):
+        prompts.append(prompt)
+        return AIMessage(content=f"summary {len(prompts)}")
+    return invoke
+
+
+def test_no_summary_until_the_window_is_full():
+    prompts = []
+    context = ConversationContext(invoke=_summarizer(prompts), max_messages=4)
+    context.render(_memory(4))
+    assert prompts == [] and context.summarized_upto == 0
+
+
+def test_summary_folds_all_but_half_the_window():
+    prompts = []
+    context = ConversationContext(invoke=_summarizer(prompts), max_messages=4)
+    rendered = context.render(_memory(5))
+    assert len(prompts) == 1
+    assert context.summarized_upto == 3
+    assert rendered.startswith("Summary of earlier conversation: summary 1")
+    assert "user 0" not in rendered and "user 4" in rendered
+    # The next message fits in the window again
+    context.render(_memory(6))
+    assert len(prompts) == 1
+
+
+def test_render_is_cached_until_a_new_message_arrives():
+    context = ConversationContext(max_messages=4)
+    memory = _memory(3)
+    context.render(memory)
+    context.render(memory)
+    assert context.renders == 1
+    memory.append(AIMessage(content="agent 3"))
+    assert "agent 3" in context.render(memory)
+    assert context.renders == 2
+
+
+def test_replaced_history_of_the_same_length_is_rendered_again():
+    context = ConversationContext(max_messages=4)
+    memory = _memory(3)
+    context.render(memory)
+    memory[-1] = HumanMessage(content="a different answer")
+    assert "a different answer" in context.render(memory)
+
+
+def test_failed_async_summary_does_not_block_in_render():
+    blocking = []
+
+    def invoke(prompt):
+        blocking.append(prompt)
+        return AIMessage(content="summary")
+
+    async def ainvoke(prompt):
+        raise RuntimeError("rate limited")
+
+    context = ConversationContext(invoke=invoke, ainvoke=ainvoke, max_messages=4)
+    memory = _memory(5)
+    asyncio.run(context.aprepare(memory))
+    rendered = context.render(memory)
+    assert blocking == []
+    assert "user 0" in rendered and context.summarized_upto == 0
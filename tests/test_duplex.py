@@ -0,0 +1,121 @@
+# tests/test_duplex.py
+
+import asyncio
+import pytest
+import speech
+import speculative_tts
+from agents import RealEstateAgent
+from duplex import DuplexCall
+from vad import Endpointer
+from benchmarks.fakes import FakeLLM, FakeElevenLabs
+
+class SpeechVAD:
+    """b"v" frames are speech, anything else is silence"""
+
+    def is_speech(self, frame):
+        return frame == b"v"
+
+def test_endpointer_events():
+    endpointer = Endpointer(SpeechVAD(), frame_ms=30, timeout=1, start_ms=60, segment_pause_ms=60,
+                            min_segment_ms=90, end_silence_ms=150)
+    assert [endpointer.push(b"v"), endpointer.push(b"v")] == [None, "start"]
+    assert len(endpointer.pre_roll()) == 2
+    # A pause after enough speech closes a segment; trailing silence ends the turn
+    assert [endpointer.push(frame) for frame in [b"v", b"-", b"-"]] == [None, None, "segment"]
+    assert [endpointer.push(b"-") for _ in range(3)] == [None, None, "end"]
+    assert not endpointer.segment_has_speech
+
+def test_endpointer_timeout():
+    endpointer = Endpointer(SpeechVAD(), frame_ms=30, timeout=0.09)
+    assert [endpointer.push(b"-") for _ in range(3)] == [None, None, "timeout"]
+
+class NullMicrophone:
+    sample_rate = 16000
+    sample_width = 2
+
+class NullPlayer:
+    def write(self, pcm):
+        pass
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def call(monkeypatch):
+    monkeypatch.setattr(speech, "client", FakeElevenLabs())
+    monkeypatch.setattr(speculative_tts, "get_audio_cache", lambda: None)
+    monkeypatch.setattr(speech, "get_audio_cache", lambda: None)
+    logged = []
+    monkeypatch.setattr(RealEstateAgent, "log_to_sheet", lambda self, batched=None: logged.append(self.required_fields["Name"]) or True)
+    agent = RealEstateAgent(initial_phone="5551234567", llm=FakeLLM())
+    agent.conversation_started = agent.call_in_progress = True
+    call = DuplexCall(agent, microphone=NullMicrophone(), player=NullPlayer())
+    call.logged = logged
+    yield call
+    call.speculative_audio.close()
+
+def _completing_turns(monkeypatch, release=None):
+    """Every turn completes the call, after release is set if given"""
+    async def aprocess_message(self, message):
+        if release:
+            await release.wait()
+        self.required_fields["Name"] = message
+        self.required_fields["Call Outcome"] = "Information Gathered"
+        return "Thanks" if await asyncio.to_thread(self._log_lead) else "Failed"
+    monkeypatch.setattr(RealEstateAgent, "aprocess_message", aprocess_message)
+
+def test_discarded_speculation_never_logs_the_lead(call, monkeypatch):
+    _completing_turns(monkeypatch)
+
+    async def scenario():
+        call.loop = asyncio.get_running_loop()
+        endpointer = Endpointer(SpeechVAD())
+        endpointer.silence_ms = 240
+        call._endpointer = endpointer
+        call._speculate("Sarah", endpointer)
+        speculation = call._speculation[1]
+        await asyncio.wait({speculation})
+        # The caller kept talking, so the speculative turn is thrown away
+        assert call._take_speculation("Sarah Lee") is None
+        assert call.logged == []
+        assert call.agent.required_fields["Name"] is None
+
+        reply = await call._adopt(*await call._respond("Sarah Lee"))
+        assert reply == "Thanks"
+        assert call.logged == ["Sarah Lee"]
+        assert call._finished()
+
+    asyncio.run(scenario())
+
+def test_barge_in_cancels_the_turn_and_keeps_planned_questions(call, monkeypatch):
+    _completing_turns(monkeypatch)
+
+    async def scenario():
+        call.loop = asyncio.get_running_loop()
+        call._responding = asyncio.ensure_future(call._respond("Sarah"))
+        await asyncio.sleep(0)
+        call._barge_in()
+        assert call.barge_ins == 1
+        await asyncio.wait({call._responding})
+        assert call._responding.cancelled()
+        assert call.logged == []
+        assert call.agent.planned_questions
+
+    asyncio.run(scenario())
+
+def test_questions_planned_during_a_turn_survive_its_adoption(call, monkeypatch):
+    async def scenario():
+        release = asyncio.Event()
+        _completing_turns(monkeypatch, release)
+        call.loop = asyncio.get_running_loop()
+        speculation = asyncio.ensure_future(call._respond("Sarah"))
+        await asyncio.sleep(0)  # The copy is taken
+        call._barge_in()  # Nothing to interrupt, but the next questions get planned
+        planned = dict(call.agent.planned_questions)
+        assert planned
+        release.set()
+        await call._adopt(*await speculation)
+        assert planned.items() <= call.agent.planned_questions.items()
+        assert call.logged == ["Sarah"]
+
+    asyncio.run(scenario())
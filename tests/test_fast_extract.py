@@ -0,0 +1,96 @@
+# tests/test_fast_extract.py
+
+from fast_extract import fast_extract
+from benchmarks.fakes import FakeLLM
+from agents import RealEstateAgent
+
+def test_email_answer_is_complete():
+    fields, complete = fast_extract("sarah.johnson@example.com", "Email")
+    assert fields == {"Email": "sarah.johnson@example.com"}
+    assert complete
+
+def test_budget_answer_is_complete():
+    fields, complete = fast_extract("around $450k", "Budget Range")
+    assert fields["Budget Range"] == "$450k"
+    assert complete
+
+def test_introduction_is_a_name_when_asked():
+    fields, complete = fast_extract("My name is Sarah Johnson", "Name")
+    assert fields == {"Name": "Sarah Johnson"}
+    assert complete
+
+def test_bare_name_when_asked():
+    assert fast_extract("Sarah Johnson", "Name") == ({"Name": "Sarah Johnson"}, True)
+
+def test_introduction_without_a_question_fills_unknown_name():
+    assert fast_extract("I'm Sarah", None) == ({"Name": "Sarah"}, True)
+
+def test_introduction_ignored_when_name_known():
+    fields, complete = fast_extract("I'm Sarah", None, name_known=True)
+    assert "Name" not in fields
+    assert not complete
+
+def test_location_answer_is_not_a_name():
+    fields, complete = fast_extract("It's Downtown Austin", "Location")
+    assert "Name" not in fields
+    assert not complete
+
+def test_call_me_is_not_a_name():
+    fields, complete = fast_extract("Call me Friday", "Availability")
+    assert "Name" not in fields
+    assert not complete
+    assert "Name" not in fast_extract("Call me Friday", None)[0]
+
+def test_i_am_only_names_when_asked():
+    fields, complete = fast_extract("I am Flexible", "Timeline")
+    assert "Name" not in fields
+    assert not complete
+
+def test_answer_missing_the_target_field_is_incomplete():
+    # Only the email matched, but we asked for the location
+    fields, complete = fast_extract("bob@example.com", "Location")
+    assert fields == {"Email": "bob@example.com"}
+    assert not complete
+
+def test_yes_no_fields():
+    assert fast_extract("yes", "Decision Maker") == ({"Decision Maker": "Yes"}, True)
+    assert fast_extract("nope", "Follow-up Required") == ({"Follow-up Required": "No"}, True)
+
+def _agent_in_call(single_call=True):
+    llm = FakeLLM()
+    agent = RealEstateAgent(initial_phone="5551234567", single_call=single_call, llm=llm)
+    agent.process_message("")
+    agent.process_message("yes")
+    agent.lead_type = "residential"
+    return agent, llm
+
+def test_agent_sends_location_answer_to_llm():
+    agent, llm = _agent_in_call()
+    agent.last_question_field = "Location"
+    llm.script_fields = {"Location": "Downtown Austin"}
+    calls_before = len(llm.calls)
+    agent.process_message("It's Downtown Austin")
+    assert agent.required_fields["Name"] is None
+    assert agent.required_fields["Location"] == "Downtown Austin"
+    assert len(llm.calls) > calls_before
+
+def test_agent_fast_path_fills_asked_field_without_llm():
+    agent, llm = _agent_in_call()
+    agent.last_question_field = "Email"
+    calls_before = len(llm.calls)
+    agent.process_message("sarah.johnson@example.com")
+    assert agent.required_fields["Email"] == "sarah.johnson@example.com"
+    assert len(llm.calls) == calls_before
+
+def test_deferred_interest_call_is_not_counted_as_avoided():
+    agent, llm = _agent_in_call(single_call=False)
+    agent.last_question_field = "Name"
+    agent.process_message("My name is Sarah Lee")
+    agent.last_question_field = "Email"
+    agent.required_fields["Interest Level"] = None
+    assert agent._needs_interest_level()
+    avoided_before = agent.llm_calls_avoided
+    agent.process_message("sarah.johnson@example.com")
+    # Only the extraction call is saved; interest level still runs on a later turn
+    assert agent.llm_calls_avoided - avoided_before == 1
+    assert agent.required_fields["Interest Level"] is None
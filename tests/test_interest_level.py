@@ -0,0 +1,47 @@
+# tests/test_interest_level.py
+
+import json
+import pytest
+from benchmarks.fakes import FakeLLM
+from agents import RealEstateAgent
+
+class NoInterestLLM(FakeLLM):
+    """Single-call answers without an interest_level"""
+
+    def _answer(self, purpose):
+        answer = super()._answer(purpose)
+        if purpose == "turn":
+            result = json.loads(answer)
+            del result["interest_level"]
+            answer = json.dumps(result)
+        return answer
+
+def _run(agent, llm, script):
+    agent.process_message("")
+    for message, fields in script:
+        llm.script_fields = fields
+        agent.process_message(message)
+
+@pytest.mark.parametrize("single_call", [True, False])
+def test_initial_no_makes_the_lead_cold(single_call):
+    llm = FakeLLM()
+    agent = RealEstateAgent(initial_phone="5551234567", single_call=single_call, llm=llm)
+    agent.llm_cache = None
+    _run(agent, llm, [
+        ("no, I'm busy", {}),
+        ("okay, go ahead", {}),
+        ("I'm looking for a house", {"Property Type": "House"}),
+        ("somewhere near downtown Austin", {"Location": "Downtown Austin"}),
+    ])
+    assert agent.required_fields["Interest Level"] == "Cold"
+
+def test_single_call_defaults_to_warm():
+    llm = NoInterestLLM()
+    agent = RealEstateAgent(initial_phone="5551234567", single_call=True, llm=llm)
+    agent.llm_cache = None
+    _run(agent, llm, [
+        ("yes", {}),
+        ("I'm looking for a house", {"Property Type": "House"}),
+        ("somewhere near downtown Austin", {"Location": "Downtown Austin"}),
+    ])
+    assert agent.required_fields["Interest Level"] == "Warm"
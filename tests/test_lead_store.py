@@ -0,0 +1,120 @@
+# tests/test_lead_store.py
+
+import pytest
+import sheets
+import lead_store
+from lead_store import LeadStore, LEAD_COLUMNS
+from benchmarks.fakes import install_fake_sheets
+
+def _data(uid, name, email, phone=""):
+    data = {column: "" for column in LEAD_COLUMNS}
+    data.update({"UID": uid, "Name": name, "Email": email, "Phone": phone})
+    return data
+
+@pytest.fixture
+def store(tmp_path):
+    return LeadStore(str(tmp_path / "leads.db"))
+
+def test_save_and_find(store):
+    lead_id = store.save(_data("uid-1", "Alice", "Alice@Example.com", "+1 555 123 4567"))
+    assert store.find(email="alice@example.com")["Name"] == "Alice"
+    assert store.find(phone="+1 (555) 123-4567")["Name"] == "Alice"
+    assert store.save(_data("uid-2", "Alice B", "alice@example.com")) == lead_id
+    assert store.save(_data("uid-3", "Other Alice", "alice@example.com"), match_email=False) != lead_id
+
+def test_pending_until_synced(store):
+    lead_id = store.save(_data("uid-1", "Alice", "alice@example.com"))
+    [(pending_id, version, data, row)] = store.pending()
+    assert (pending_id, data["Name"], row) == (lead_id, "Alice", None)
+    store.mark_synced([(lead_id, version, 2)])
+    assert store.pending() == []
+    assert store.find(uid="uid-1")["row"] == 2
+
+def test_save_during_push_stays_pending(store):
+    lead_id = store.save(_data("uid-1", "Alice", "alice@example.com"))
+    [(_, version, _, _)] = store.pending()
+    store.save(_data("uid-1", "Alice Smith", "alice@example.com"))
+    store.mark_synced([(lead_id, version, 2)])
+    assert [data["Name"] for _, _, data, _ in store.pending()] == ["Alice Smith"]
+
+def test_merge_remote(store):
+    lead_id = store.save(_data("uid-1", "Alice", "alice@example.com"))
+    [(_, version, _, _)] = store.pending()
+    store.mark_synced([(lead_id, version, 2)])
+    changed = store.merge_remote([
+        (2, _data("uid-1", "Alice (edited)", "alice@example.com")),
+        (3, _data("uid-2", "Bob", "bob@example.com")),
+    ])
+    assert changed == 2
+    assert store.find(uid="uid-1")["Name"] == "Alice (edited)"
+    assert store.find(email="bob@example.com")["row"] == 3
+    assert store.pending() == []
+
+def test_unpushed_local_changes_win(store):
+    store.save(_data("uid-1", "Alice (local)", "alice@example.com"))
+    assert store.merge_remote([(2, _data("uid-1", "Alice (sheet)", "alice@example.com"))]) == 0
+    assert store.find(uid="uid-1")["Name"] == "Alice (local)"
+
+def test_lease(store):
+    assert store.acquire_lease("a", 60)
+    assert not store.acquire_lease("b", 60)
+    assert store.acquire_lease("a", 60)
+
+def _lead(uid, name, email):
+    lead = {field: "" for field in (
+        "phone", "location", "budget", "property_type", "property_size", "timeline", "interest", "status",
+        "created_date", "last_contact_date", "lead_type", "use_case", "company", "position", "industry",
+        "company_size", "decision_maker", "next_followup", "followup_required", "call_outcome", "notes",
+        "lead_source", "competitors",
+    )}
+    lead.update(uid=uid, name=name, email=email)
+    return lead
+
+@pytest.fixture
+def synced_sheet(monkeypatch):
+    monkeypatch.setattr(lead_store, "LEAD_STORE", True)
+    worksheet = install_fake_sheets()
+    yield worksheet
+    if sheets._lead_sync:
+        sheets._lead_sync.close()
+
+def test_unbatched_save_reaches_the_sheet_before_returning(synced_sheet):
+    assert sheets.log_lead(**_lead("uid-1", "Alice", "alice@example.com"), batched=False)
+    assert [row[1] for row in synced_sheet.rows[1:]] == ["Alice"]
+    assert sheets.get_lead_store().pending() == []
+
+def test_batched_save_is_left_to_the_sync_worker(synced_sheet):
+    assert sheets.log_lead(**_lead("uid-1", "Alice", "alice@example.com"), batched=True)
+    assert synced_sheet.rows[1:] == []
+    assert len(sheets.get_lead_store().pending()) == 1
+    assert sheets.flush_leads()
+    assert [row[1] for row in synced_sheet.rows[1:]] == ["Alice"]
+
+def _sheet_only_lead(worksheet):
+    worksheet.rows.append([{"UID": "uid-9", "Name": "Zoe", "Email": "zoe@example.com"}.get(column, "") for column in LEAD_COLUMNS])
+
+def test_first_lookup_waits_for_the_pull(synced_sheet):
+    _sheet_only_lead(synced_sheet)
+    synced_sheet.latency = 0.1
+    # A returning caller known only to the sheet is found on a fresh process
+    assert sheets.check_existing_lead("zoe@example.com")["Name"] == "Zoe"
+    assert [lead["Name"] for lead in sheets.get_all_leads()] == ["Zoe"]
+
+def test_lookup_falls_back_to_the_sheet_when_the_pull_is_slow(synced_sheet, monkeypatch):
+    _sheet_only_lead(synced_sheet)
+    synced_sheet.latency = 0.5
+    monkeypatch.setattr(sheets, "LEAD_SYNC_PULL_TIMEOUT", 0.05)
+    assert sheets.check_existing_lead("zoe@example.com")["Name"] == "Zoe"
+
+def test_push_reports_whether_the_lead_was_written(synced_sheet):
+    store = sheets.get_lead_store()
+    # Another process holds the sync lease, so this one writes nothing
+    assert store.acquire_lease("other-process", 60)
+    lead_id = store.save(_lead_data("uid-1", "Alice"))
+    assert not sheets.get_lead_sync().push(lead_id)
+    assert sheets.log_lead(**_lead("uid-1", "Alice", "alice@example.com"), batched=False)
+    assert synced_sheet.rows[1:] == []
+    assert len(store.pending()) == 1
+
+def _lead_data(uid, name):
+    return {column: {"UID": uid, "Name": name}.get(column, "") for column in LEAD_COLUMNS}
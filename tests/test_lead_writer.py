@@ -0,0 +1,51 @@
+# tests/test_lead_writer.py
+
+import time
+import pytest
+import lead_store
+from lead_store import LEAD_COLUMNS
+from sheets import LeadWriter
+from benchmarks.fakes import install_fake_sheets
+
+def _row(uid, name, email):
+    data = {column: "" for column in LEAD_COLUMNS}
+    data.update({"UID": uid, "Name": name, "Email": email})
+    return [data[column] for column in LEAD_COLUMNS]
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+@pytest.fixture
+def worksheet(monkeypatch):
+    monkeypatch.setattr(lead_store, "LEAD_STORE", False)
+    return install_fake_sheets()
+
+def test_repeated_upserts_for_a_lead_are_coalesced(worksheet):
+    writer = LeadWriter(max_batch_size=10, max_delay=60)
+    writer.enqueue("uid-a", "alice@example.com", _row("uid-a", "Al", "alice@example.com"))
+    writer.enqueue("uid-a", "alice@example.com", _row("uid-a", "Alice", "alice@example.com"))
+    writer.enqueue("uid-b", "bob@example.com", _row("uid-b", "Bob", "bob@example.com"))
+    assert writer.pending_count() == 2
+    assert writer.close()
+    assert [row[1] for row in worksheet.rows[1:]] == ["Alice", "Bob"]
+    assert worksheet.calls.get("append_rows") == 1
+
+def test_flushes_once_the_batch_is_full(worksheet):
+    writer = LeadWriter(max_batch_size=2, max_delay=60)
+    writer.enqueue("uid-a", "alice@example.com", _row("uid-a", "Alice", "alice@example.com"))
+    time.sleep(0.05)
+    assert len(worksheet.rows) == 1
+    writer.enqueue("uid-b", "bob@example.com", _row("uid-b", "Bob", "bob@example.com"))
+    assert _wait_for(lambda: len(worksheet.rows) == 3)
+    assert worksheet.calls.get("append_rows") == 1
+    writer.close()
+
+def test_flushes_once_the_oldest_lead_has_waited(worksheet):
+    writer = LeadWriter(max_batch_size=10, max_delay=0.1)
+    writer.enqueue("uid-a", "alice@example.com", _row("uid-a", "Alice", "alice@example.com"))
+    assert _wait_for(lambda: len(worksheet.rows) == 2)
+    assert writer.pending_count() == 0
+    writer.close()
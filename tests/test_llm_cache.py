@@ -0,0 +1,59 @@
+# tests/test_llm_cache.py
+
+import asyncio
+from types import SimpleNamespace
+import tracing
+from llm_cache import LLMCache, MemoryBackend, DiskBackend, normalize_prompt
+
+class CountingLLM:
+    model = "fake"
+    temperature = 0.0
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return SimpleNamespace(content=f"answer {self.calls}")
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+def test_equivalent_prompts_share_an_entry():
+    assert normalize_prompt("At 2024-01-02 10:11:12\n  for  123e4567-e89b-12d3-a456-426614174000") == \
+        "At <timestamp> for <uuid>"
+    cache, llm = LLMCache(MemoryBackend(), purposes={"extraction"}), CountingLLM()
+    first = cache.invoke(llm, "Extract from:  hi\n(2024-01-02 10:11:12)", "extraction")
+    second = cache.invoke(llm, "Extract from: hi (2025-06-07 08:09:10)", "extraction")
+    assert llm.calls == 1
+    assert second.content == first.content
+    assert second.response_metadata == {"cached": True}
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_only_listed_purposes_are_cached():
+    cache, llm = LLMCache(MemoryBackend(), purposes={"extraction"}), CountingLLM()
+    for _ in range(2):
+        asyncio.run(cache.ainvoke(llm, "Say hello", "conversation"))
+    assert llm.calls == 2
+    assert cache.stats()["entries"] == 0
+
+def test_expired_entries_are_misses(tmp_path):
+    cache, llm = LLMCache(DiskBackend(str(tmp_path)), ttl=-1, purposes={"extraction"}), CountingLLM()
+    cache.invoke(llm, "prompt", "extraction")
+    cache.invoke(llm, "prompt", "extraction")
+    assert llm.calls == 2
+
+def test_lru_keeps_the_newest_entries():
+    backend = MemoryBackend(max_entries=2)
+    for key in "abc":
+        backend.put(key, key)
+    assert backend.get("a") is None and len(backend) == 2
+
+def test_hits_are_only_printed_with_debug(monkeypatch, capsys):
+    cache, llm = LLMCache(MemoryBackend(), purposes={"extraction"}), CountingLLM()
+    cache.invoke(llm, "prompt", "extraction")
+    cache.invoke(llm, "prompt", "extraction")
+    assert "[LLM Cache]" not in capsys.readouterr().out
+    monkeypatch.setattr(tracing, "DEBUG", True)
+    cache.invoke(llm, "prompt", "extraction")
+    assert "[LLM Cache] Hit for extraction" in capsys.readouterr().out
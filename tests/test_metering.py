@@ -0,0 +1,51 @@
+# tests/test_metering.py
+
+import json
+import asyncio
+import threading
+from types import SimpleNamespace
+from langchain_core.messages import AIMessage
+import metering
+from metering import Meter
+
+def test_usage_is_charged_to_the_session_and_the_process():
+    meter = Meter()
+    before = metering.process_meter().usage()["llm"]["calls"]
+    with metering.session(meter):
+        metering.record_llm("extraction", "prompt", SimpleNamespace(content="x", usage_metadata={"input_tokens": 10, "output_tokens": 3}))
+        metering.record_llm("extraction", "prompt", AIMessage(content="x", response_metadata={"cached": True}))
+        metering.record_tts("Hello there")
+    usage = meter.usage()
+    assert usage["llm"]["calls"] == 2 and usage["llm"]["cached"] == 1
+    assert (usage["llm"]["input_tokens"], usage["llm"]["output_tokens"]) == (10, 3)
+    assert usage["tts"] == {"requests": 1, "characters": 11}
+    assert metering.process_meter().usage()["llm"]["calls"] == before + 2
+
+def test_threads_and_tasks_charge_the_calling_session():
+    meter = Meter()
+
+    async def task():
+        metering.record_sheets("append_row")
+
+    with metering.session(meter):
+        worker = threading.Thread(target=metering.bind(metering.record_sheets), args=("batch_update",))
+        worker.start()
+        worker.join()
+        asyncio.run(task())
+    assert meter.usage()["sheets"]["by_method"] == {"batch_update": 1, "append_row": 1}
+
+def test_state_round_trip():
+    meter = Meter()
+    meter.add_llm("turn", 100, 20)
+    meter.add_stt(1.5)
+    restored = Meter(json.loads(json.dumps(meter.to_state())))
+    assert restored.usage() == meter.usage()
+
+def test_dump_appends_to_the_log_without_printing(tmp_path, capsys):
+    meter = Meter()
+    meter.add_tts(42)
+    path = tmp_path / "usage.jsonl"
+    metering.dump(meter, "call-1", path=str(path))
+    record = json.loads(path.read_text())
+    assert record["session"] == "call-1" and record["tts"]["characters"] == 42
+    assert "[Usage]" not in capsys.readouterr().out
@@ -0,0 +1,36 @@
+# tests/test_playback.py
+
+import time
+
+import speech
+from speech import PlaybackPacer
+
+
+def _clip(seconds):
+    """MP3 bytes the pacer estimates at the given length"""
+    bitrate_kbps = int(speech.TTS_OUTPUT_FORMAT.rsplit("_", 1)[-1])
+    return b"\xff" * int(seconds * bitrate_kbps * 1000 / 8)
+
+
+def test_wait_lasts_about_as_long_as_the_clip():
+    pacer = PlaybackPacer()
+    pacer.started(_clip(0.2))
+    start = time.monotonic()
+    pacer.wait()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_sessions_do_not_delay_each_other():
+    playing, idle = PlaybackPacer(), PlaybackPacer()
+    playing.started(_clip(5))
+    start = time.monotonic()
+    idle.wait()
+    assert time.monotonic() - start < 0.1
+
+
+def test_wait_is_capped_by_max_wait():
+    pacer = PlaybackPacer()
+    pacer.started(_clip(5))
+    start = time.monotonic()
+    pacer.wait(max_wait=0.1)
+    assert time.monotonic() - start < 1
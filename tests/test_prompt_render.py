@@ -0,0 +1,49 @@
+# tests/test_prompt_render.py
+
+import pytest
+import prompt_render
+from prompt_render import render_fields, render_missing, render_prompt, PROMPT_PREFIX
+from benchmarks.fakes import FakeLLM
+from agents import RealEstateAgent
+
+@pytest.fixture
+def compact(monkeypatch):
+    monkeypatch.setattr(prompt_render, "COMPACT_PROMPTS", True)
+
+@pytest.fixture
+def original(monkeypatch):
+    monkeypatch.setattr(prompt_render, "COMPACT_PROMPTS", False)
+
+def test_only_known_fields_are_rendered(compact):
+    fields = {"UID": "abc", "Name": "Sarah", "Email": None, "Company": "-", "Notes": "  two\n lines "}
+    assert render_fields(fields) == "Name: Sarah\nNotes: two lines"
+    assert render_fields({"Name": None}) == "Nothing yet"
+
+def test_missing_fields_are_listed(compact):
+    assert render_missing(["Email", "Location"]) == "Email, Location"
+    assert render_missing([]) == "None"
+
+def test_prefix_only_on_json_prompts(compact):
+    assert render_prompt("    Return a JSON object\n\n\n    please", "extraction") == PROMPT_PREFIX + "\n\nReturn a JSON object\n\nplease"
+    for purpose in ("summary", "completion", "scheduling", "classification", "interest", "conversation"):
+        assert not render_prompt("Say hello", purpose).startswith(PROMPT_PREFIX)
+
+def test_flag_off_restores_the_original_prompts(original):
+    fields = {"Name": "Sarah", "Email": None}
+    assert render_fields(fields) == str(fields)
+    assert render_prompt("  as written  ", "extraction") == "  as written  "
+
+    agent = RealEstateAgent(initial_phone="5551234567", llm=FakeLLM())
+    extraction = agent._build_extraction_prompt("I want a house")
+    assert extraction.startswith('Extract relevant information from this message: "I want a house"')
+    assert extraction.index("Current information so far") < extraction.index("IMPORTANT")
+    turn = agent._build_turn_prompt("I want a house", ["Name", "Email"], False)
+    assert turn.index("Caller's latest message") < turn.index("Step 1")
+    conversation = agent._build_conversation_prompt(["Name"])
+    assert conversation.index("Conversation history") < conversation.index("The response should")
+
+def test_compact_prompts_put_details_last(compact):
+    agent = RealEstateAgent(initial_phone="5551234567", llm=FakeLLM())
+    extraction = agent._build_extraction_prompt("I want a house")
+    assert extraction.index("IMPORTANT") < extraction.index("Current information so far")
+    assert extraction.rstrip().endswith('Message: "I want a house"')
@@ -0,0 +1,76 @@
+# tests/test_rate_limit.py
+
+import asyncio
+import pytest
+from google.api_core import exceptions as google_exceptions
+from rate_limit import RateLimiter, RateLimitedLLM, is_rate_limit_error, is_retryable_error
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+class WrappedError(Exception):
+    pass
+
+def wrapped(cause):
+    try:
+        raise cause
+    except Exception as e:
+        try:
+            raise WrappedError("Invalid argument provided to Gemini") from e
+        except WrappedError as wrapper:
+            return wrapper
+
+def test_rate_limits_are_classified_by_type_and_status():
+    assert is_rate_limit_error(google_exceptions.ResourceExhausted("quota"))
+    assert is_rate_limit_error(StatusError(429))
+    assert is_rate_limit_error(wrapped(google_exceptions.TooManyRequests("slow down")))
+    assert not is_rate_limit_error(ValueError("rate limit 429 quota"))
+
+def test_transient_errors_are_retried():
+    assert is_retryable_error(google_exceptions.ServiceUnavailable("down"))
+    assert is_retryable_error(google_exceptions.DeadlineExceeded("slow"))
+    assert is_retryable_error(StatusError(503))
+    assert is_retryable_error(TimeoutError())
+    assert is_retryable_error(wrapped(google_exceptions.InternalServerError("oops")))
+
+def test_messages_alone_do_not_make_errors_retryable():
+    # A bad request that mentions a timeout or a 500 is still a bad request
+    assert not is_retryable_error(ValueError("Budget of 500 is internal; timeout field missing"))
+    assert not is_retryable_error(google_exceptions.InvalidArgument("deadline 504 unavailable"))
+    assert not is_retryable_error(StatusError(400))
+
+class FlakyLLM:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+def limiter():
+    return RateLimiter(rpm=6000, tpm=10_000_000, max_concurrency=4, max_retries=2, backoff_base=0.001, backoff_max=0.001)
+
+def test_retries_transient_errors_and_halves_concurrency_on_429():
+    llm = FlakyLLM([StatusError(429), google_exceptions.ServiceUnavailable("down")])
+    shared = limiter()
+    assert RateLimitedLLM(llm, shared).invoke("hello") == "ok"
+    assert llm.calls == 3
+    stats = shared.stats()
+    assert stats["retries"] == 2 and stats["rate_limited"] == 1
+    assert stats["concurrency_limit"] < 4
+
+def test_does_not_retry_permanent_errors():
+    llm = FlakyLLM([ValueError("timeout 500 internal")])
+    shared = limiter()
+    with pytest.raises(ValueError):
+        asyncio.run(RateLimitedLLM(llm, shared).ainvoke("hello"))
+    assert llm.calls == 1
+    assert shared.stats()["failures"] == 1
@@ -0,0 +1,67 @@
+# tests/test_server.py
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+import server
+import tracing
+from server import SessionManager
+from session_store import InMemorySessionStore
+from benchmarks.fakes import FakeLLM, install_fake_sheets
+
+@pytest.fixture
+def manager(monkeypatch):
+    install_fake_sheets()
+    manager = SessionManager(ttl=60, store=InMemorySessionStore())
+    manager.llm = FakeLLM()
+    monkeypatch.setattr(server, "sessions", manager)
+    return manager
+
+def _started(manager):
+    session = manager.create("5551234567")
+    asyncio.run(manager.turn(session, ""))
+    return session
+
+def _backdate(store, session_id):
+    data, _ = store._data[session_id]
+    store._data[session_id] = (data, 0)
+
+def test_expired_sessions_are_deleted_from_the_store_and_flushed(manager, monkeypatch, capsys):
+    monkeypatch.setattr(tracing, "DEBUG", True)
+    session = _started(manager)
+    session.last_active = 0
+    _backdate(manager.store, session.id)
+    assert manager.expire_idle() == 1
+    assert manager.sessions == {}
+    assert manager.store.get(session.id) is None
+    assert "[Usage]" in capsys.readouterr().out
+
+def test_sessions_served_elsewhere_are_only_dropped_from_memory(manager):
+    session = _started(manager)
+    session.last_active = 0  # Idle here, but the stored state is fresh
+    assert manager.expire_idle() == 0
+    assert manager.sessions == {}
+    assert manager.store.get(session.id) is not None
+
+def test_sessions_abandoned_by_other_workers_are_expired(manager, monkeypatch, capsys):
+    monkeypatch.setattr(tracing, "DEBUG", True)
+    session = _started(manager)
+    manager.sessions.clear()
+    _backdate(manager.store, session.id)
+    assert manager.expire_idle() == 1
+    assert manager.store.get(session.id) is None
+    assert "[Usage]" in capsys.readouterr().out
+
+def test_websocket_uses_the_shared_store(manager):
+    session = _started(manager)
+    manager.sessions.clear()  # Started by another worker
+    client = TestClient(server.app)
+    with client.websocket_connect(f"/sessions/{session.id}/ws") as websocket:
+        websocket.send_json({"message": "yes"})
+        reply = websocket.receive_json()
+        assert reply["session_id"] == session.id and reply["turns"] == 1
+        # Ended by another worker
+        manager.store.delete(session.id)
+        websocket.send_json({"message": "my name is Sarah Lee"})
+        assert websocket.receive_json() == {"error": "Session ended"}
+    assert session.id not in manager.sessions
@@ -0,0 +1,39 @@
+# tests/test_session_store.py
+
+import time
+import pytest
+from session_store import InMemorySessionStore, SQLiteSessionStore, FileSessionStore
+
+@pytest.fixture(params=["memory", "sqlite", "file"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    if request.param == "file":
+        return FileSessionStore(str(tmp_path / "sessions"))
+    return InMemorySessionStore()
+
+def test_round_trip(store):
+    state = {"memory": [{"type": "human", "content": "Héllo"}], "required_fields": {"Name": None}}
+    assert store.get("a") is None
+    store.put("a", state)
+    assert store.get("a") == state
+    store.put("a", {"turns": 2})
+    assert store.get("a") == {"turns": 2}
+    store.delete("a")
+    store.delete("a")
+    assert store.get("a") is None
+
+def test_expire_returns_and_deletes_stale_states(store):
+    store.put("a", {"n": 1})
+    store.put("b", {"n": 2})
+    assert store.expire(time.time() - 60) == {}
+    assert store.expire(time.time() + 60) == {"a": {"n": 1}, "b": {"n": 2}}
+    assert store.get("a") is None and store.get("b") is None
+    # Already claimed
+    assert store.expire(time.time() + 60) == {}
+
+def test_file_store_ids_cannot_escape_the_directory(tmp_path):
+    store = FileSessionStore(str(tmp_path / "sessions"))
+    store.put("../../evil", {"n": 1})
+    assert not (tmp_path / "evil.json").exists()
+    assert store.get("../../evil") == {"n": 1}
@@ -0,0 +1,61 @@
+# tests/test_sheets_index.py
+
+import pytest
+import sheets
+import lead_store
+from lead_store import LEAD_COLUMNS
+from benchmarks.fakes import install_fake_sheets
+
+def _row(uid, name, email):
+    data = {column: "" for column in LEAD_COLUMNS}
+    data.update({"UID": uid, "Name": name, "Email": email})
+    return [data[column] for column in LEAD_COLUMNS]
+
+def _lead(uid, name, email):
+    return dict(
+        uid=uid, name=name, email=email, phone="", location="", budget="", property_type="",
+        property_size="", timeline="", interest="", status="", created_date="", last_contact_date="",
+        lead_type="", use_case="", company="", position="", industry="", company_size="",
+        decision_maker="", next_followup="", followup_required="", call_outcome="", notes="",
+        lead_source="", competitors="",
+    )
+
+@pytest.fixture
+def worksheet(monkeypatch):
+    # Write the sheet directly, without the local store in between
+    monkeypatch.setattr(lead_store, "LEAD_STORE", False)
+    worksheet = install_fake_sheets()
+    worksheet.rows.append(_row("uid-a", "Alice", "alice@example.com"))
+    worksheet.rows.append(_row("uid-b", "Bob", "bob@example.com"))
+    return worksheet
+
+def test_existing_lead_is_found_from_the_index(worksheet):
+    record = sheets.check_existing_lead("BOB@example.com")
+    assert record["Name"] == "Bob"
+    assert record["row"] == 3
+
+def test_update_goes_to_the_indexed_row(worksheet):
+    assert sheets.log_lead(**_lead("uid-b", "Bob Smith", "bob@example.com"), batched=False)
+    assert worksheet.rows[2][1] == "Bob Smith"
+    assert len(worksheet.rows) == 3
+
+def test_resorted_sheet_does_not_overwrite_another_lead(worksheet):
+    sheets.check_existing_lead("bob@example.com")  # Index now says Bob is row 3
+    worksheet.rows[1], worksheet.rows[2] = worksheet.rows[2], worksheet.rows[1]
+    assert sheets.log_lead(**_lead("uid-b", "Bob Smith", "bob@example.com"), batched=False)
+    assert worksheet.rows[1][1] == "Bob Smith"
+    assert worksheet.rows[2][1] == "Alice"
+
+def test_batched_write_checks_rows_before_updating(worksheet):
+    sheets.check_existing_lead("bob@example.com")
+    worksheet.rows[1], worksheet.rows[2] = worksheet.rows[2], worksheet.rows[1]
+    rows = sheets.write_lead_rows(worksheet, [(_row("uid-b", "Bob Smith", "bob@example.com"), True)])
+    assert rows == [2]
+    assert worksheet.rows[1][1] == "Bob Smith"
+    assert worksheet.rows[2][1] == "Alice"
+
+def test_deleted_row_is_appended_again(worksheet):
+    sheets.check_existing_lead("bob@example.com")
+    del worksheet.rows[2]
+    assert sheets.log_lead(**_lead("uid-b", "Bob Smith", "bob@example.com"), batched=False)
+    assert [row[1] for row in worksheet.rows[1:]] == ["Alice", "Bob Smith"]
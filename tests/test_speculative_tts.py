@@ -0,0 +1,58 @@
+# tests/test_speculative_tts.py
+
+import pytest
+import speech
+import speculative_tts
+from speculative_tts import SpeculativeSynthesizer
+from tts_cache import AudioCache
+from benchmarks.fakes import FakeElevenLabs
+
+AVAILABLE = "Great! I'd love to ask you a few quick questions. What's your name?"
+BUSY = "No problem at all. When would be a better time to call you back?"
+
+@pytest.fixture
+def tts(monkeypatch, tmp_path):
+    fake = FakeElevenLabs()
+    cache = AudioCache(str(tmp_path / "tts"))
+    monkeypatch.setattr(speech, "client", fake)
+    monkeypatch.setattr(speech, "get_audio_cache", lambda: cache)
+    monkeypatch.setattr(speculative_tts, "get_audio_cache", lambda: cache)
+    return fake.text_to_speech
+
+@pytest.fixture
+def speculator():
+    speculator = SpeculativeSynthesizer(count=2, workers=1)
+    yield speculator
+    speculator.close()
+
+def test_served_guess_is_a_hit(tts, speculator):
+    speculator.speculate([AVAILABLE, BUSY])
+    assert speculator.take(AVAILABLE) == b"\xff" * (len(AVAILABLE) * 100)
+    stats = speculator.stats()
+    assert (stats["hits"], stats["misses"], stats["synthesized"]) == (1, 0, 2)
+
+def test_wrong_guess_is_a_miss(tts, speculator):
+    speculator.speculate([AVAILABLE])
+    assert speculator.take("Could you spell that for me?") is None
+    assert speculator.stats()["misses"] == 1
+    # Dropped on the next round, once it has been paid for
+    speculator.speculate([BUSY])
+    assert speculator.stats()["pending"] == 1
+
+def test_cached_replies_are_served_whole_without_synthesis(tts, speculator):
+    speech.speak(AVAILABLE)
+    assert tts.requests == 1
+    speculator.speculate([AVAILABLE, BUSY])
+    assert speculator.take(AVAILABLE) == b"\xff" * (len(AVAILABLE) * 100)
+    stats = speculator.stats()
+    assert (stats["cached_hits"], stats["misses"], stats["synthesized"]) == (1, 0, 1)
+    assert stats["hit_rate"] == 1.0
+    speculator._executor.shutdown(wait=True)
+    assert tts.requests == 2  # Only BUSY was synthesized ahead
+
+def test_cached_reply_that_was_not_guessed(tts, speculator):
+    speech.speak(BUSY)
+    assert speculator.take(BUSY) is not None
+    assert speculator.take(AVAILABLE) is None
+    stats = speculator.stats()
+    assert stats["cached_hits"] == stats["misses"] == 0
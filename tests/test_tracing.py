@@ -0,0 +1,24 @@
+# tests/test_tracing.py
+
+import tracing
+from benchmarks.fakes import FakeLLM, install_fake_sheets
+from agents import RealEstateAgent
+
+MESSAGES = ["", "yes", "My name is Sarah Lee", "sarah@example.com", "I want a house downtown"]
+
+def _run_turns():
+    install_fake_sheets()
+    agent = RealEstateAgent(initial_phone="5551234567", llm=FakeLLM())
+    agent.llm_cache = None
+    for message in MESSAGES:
+        agent.process_message(message)
+
+def test_turns_are_quiet_by_default(capsys):
+    _run_turns()
+    assert capsys.readouterr().out == ""
+
+def test_debug_prints_per_turn_diagnostics(monkeypatch, capsys):
+    monkeypatch.setattr(tracing, "DEBUG", True)
+    _run_turns()
+    out = capsys.readouterr().out
+    assert "Current required fields" in out and "[Prompt]" in out
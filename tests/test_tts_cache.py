@@ -0,0 +1,37 @@
+# tests/test_tts_cache.py
+
+import os
+
+from prompts import REPEAT_REQUEST_REPLY
+from tts_cache import AudioCache, static_prompts
+
+
+def _age(cache, key, mtime):
+    os.utime(cache._path(key), (mtime, mtime))
+
+
+def test_least_recently_used_clip_is_evicted_first(tmp_path):
+    cache = AudioCache(directory=str(tmp_path), max_bytes=300)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, b"x" * 100)
+        _age(cache, key, 1000 + i)
+    # Reading "a" makes it the most recently used
+    assert cache.get("a") == b"x" * 100
+    cache.put("d", b"x" * 100)
+    assert not cache.contains("b")
+    assert all(cache.contains(key) for key in ["a", "c", "d"])
+
+
+def test_cache_stays_under_the_size_limit(tmp_path):
+    cache = AudioCache(directory=str(tmp_path), max_bytes=250)
+    for i in range(5):
+        cache.put(f"clip{i}", b"x" * 100)
+        _age(cache, f"clip{i}", 1000 + i)
+    assert cache.stats()["bytes"] <= 250
+    assert cache.contains("clip4") and not cache.contains("clip0")
+    # A reopened cache counts what's already on disk
+    assert AudioCache(directory=str(tmp_path), max_bytes=250).stats()["bytes"] == cache.stats()["bytes"]
+
+
+def test_static_prompts_include_the_repeat_request():
+    assert REPEAT_REQUEST_REPLY in static_prompts()
@@ -0,0 +1,222 @@
+# tracing.py
+
+import os
+import json
+import time
+import bisect
+import inspect
+import threading
+import functools
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+TRACING_ENABLED = os.getenv("AGENT_TRACING", "false").lower() in ("1", "true", "yes")
+TRACE_KEEP_TURNS = int(os.getenv("AGENT_TRACE_KEEP_TURNS", "200"))
+DEBUG = os.getenv("AGENT_DEBUG", "false").lower() in ("1", "true", "yes")  # Per-call diagnostics
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_current_turn = contextvars.ContextVar("trace_turn", default=None)
+_lock = threading.Lock()
+_histograms = {}
+_recent_turns = deque(maxlen=TRACE_KEEP_TURNS)
+
+class Histogram:
+    """Latency histogram with fixed buckets (BUCKETS_MS plus an overflow bucket)"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.errors = 0
+
+    def observe(self, ms, error=False):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        target = pct / 100 * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS + (self.max_ms,), self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "min_ms": self.min_ms or 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "buckets": {f"le_{bound}": count for bound, count in zip(BUCKETS_MS, self.counts)} | {"le_inf": self.counts[-1]},
+        }
+
+class Turn:
+    """Spans recorded while handling one conversation turn"""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+        self.total_ms = None
+        self.spans = []  # (name, ms, tags)
+
+    def breakdown(self):
+        """Milliseconds per span name; concurrent spans overlap, so these can add up to more than total_ms"""
+        totals = {}
+        for name, ms, _ in self.spans:
+            totals[name] = totals.get(name, 0.0) + ms
+        return totals
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "total_ms": self.total_ms,
+            "breakdown": self.breakdown(),
+            "spans": [{"name": name, "ms": ms, **tags} for name, ms, tags in self.spans],
+        }
+
+    def summary(self):
+        parts = " | ".join(f"{name} {ms:.0f}" for name, ms in sorted(self.breakdown().items(), key=lambda item: -item[1]))
+        return f"{self.label}: {self.total_ms:.0f} ms total" + (f" | {parts}" if parts else "")
+
+def set_enabled(enabled):
+    """Turn tracing on or off at runtime"""
+    global TRACING_ENABLED
+    TRACING_ENABLED = enabled
+
+def record(name, seconds, error=False, **tags):
+    """Record an already-measured duration as a span"""
+    if not TRACING_ENABLED:
+        return
+    ms = seconds * 1000
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(ms, error)
+    current = _current_turn.get()
+    if current is not None:
+        current.spans.append((name, ms, tags))
+
+class _Span:
+    __slots__ = ("name", "tags", "started")
+
+    def __init__(self, name, tags):
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self.started, error=exc_type is not None, **self.tags)
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(name, **tags):
+    """Context manager timing a block as a span; a shared no-op when tracing is off"""
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    return _Span(name, tags)
+
+def traced(name):
+    """Decorator recording every call of the function as a span"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not TRACING_ENABLED:
+                    return await func(*args, **kwargs)
+                with _Span(name, {}):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED:
+                return func(*args, **kwargs)
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def debug(message):
+    """Print a per-call diagnostic (cache hits, token counts, timings) when AGENT_DEBUG is on"""
+    if DEBUG:
+        print(message)
+
+@contextmanager
+def turn(label="turn"):
+    """
+    Collect the spans of one conversation turn. Spans from threads started with
+    asyncio.to_thread and tasks started with asyncio.gather are included, since
+    both copy the current context.
+    """
+    if not TRACING_ENABLED:
+        yield None
+        return
+    current = Turn(label)
+    token = _current_turn.set(current)
+    try:
+        yield current
+    finally:
+        _current_turn.reset(token)
+        elapsed = time.perf_counter() - current.started
+        current.total_ms = elapsed * 1000
+        record("turn", elapsed)
+        with _lock:
+            _recent_turns.append(current)
+        print(f"[Trace] {current.summary()}")
+
+def histograms():
+    """Latency histograms for every span name seen so far"""
+    with _lock:
+        return {name: histogram.to_dict() for name, histogram in sorted(_histograms.items())}
+
+def recent_turns(limit=None):
+    with _lock:
+        turns = list(_recent_turns)
+    return [t.to_dict() for t in (turns[-limit:] if limit else turns)]
+
+def export(path):
+    """Write histograms and recent per-turn breakdowns to a JSON file"""
+    with open(path, "w") as f:
+        json.dump({"histograms": histograms(), "turns": recent_turns()}, f, indent=2)
+    print(f"[Trace] Exported {len(_histograms)} histograms to {path}")
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _recent_turns.clear()
@@ -0,0 +1,187 @@
+# tts_cache.py
+
+import os
+import sys
+import json
+import hashlib
+import threading
+from dotenv import load_dotenv
+from tracing import debug
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".tts_cache")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_MB", "200")) * 1024 * 1024
+
+def audio_cache_key(text, voice_id, model_id, output_format, voice_settings):
+    """Content address for a synthesized clip: everything that changes the audio"""
+    payload = json.dumps({
+        "text": text,
+        "voice_id": voice_id,
+        "model_id": model_id,
+        "output_format": output_format,
+        "voice_settings": voice_settings,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class AudioCache:
+    """
+    On-disk cache of synthesized audio, keyed by audio_cache_key.
+    Entries are evicted least-recently-used first (by file mtime, which is
+    bumped on every hit) once the cache grows past max_bytes.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._total_bytes = sum(size for _, _, size in self._entries())
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.audio")
+
+    def _entries(self):
+        """(path, mtime, size) for every cached clip"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".audio"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def get(self, key):
+        """Return cached audio bytes, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def contains(self, key):
+        """True if the clip is cached (without counting a hit or miss)"""
+        return os.path.exists(self._path(key))
+
+    def put(self, key, data):
+        """Store audio bytes and evict old entries if the cache is over size"""
+        if not data:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            if os.path.exists(path):
+                self._total_bytes -= os.path.getsize(path)
+            os.replace(tmp_path, path)
+            self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Caller holds self._lock
+        for path, _, size in sorted(self._entries(), key=lambda entry: entry[1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+                debug(f"[TTS Cache] Evicted {os.path.basename(path)} ({size} bytes)")
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+def get_audio_cache():
+    """Get the process-wide audio cache, or None if caching is disabled"""
+    global _audio_cache
+    if not TTS_CACHE_ENABLED:
+        return None
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache()
+        return _audio_cache
+
+def static_prompts():
+    """Every fixed utterance the agent can say, for pre-warming the cache"""
+    from prompts import (
+        GREETING_PROMPT,
+        ERROR_PROMPT,
+        AVAILABLE_REPLY,
+        BUSY_REPLY,
+        UNSURE_REPLY,
+        SCHEDULING_FALLBACK,
+        COMPLETION_FALLBACK,
+        SAVE_FAILED_REPLY,
+        ANYTHING_ELSE_FALLBACK,
+        REPEAT_REQUEST_REPLY,
+        FIELD_QUESTIONS
+    )
+    texts = [
+        GREETING_PROMPT,
+        ERROR_PROMPT,
+        AVAILABLE_REPLY,
+        BUSY_REPLY,
+        UNSURE_REPLY,
+        SCHEDULING_FALLBACK,
+        COMPLETION_FALLBACK,
+        SAVE_FAILED_REPLY,
+        ANYTHING_ELSE_FALLBACK,
+        REPEAT_REQUEST_REPLY,
+    ]
+    for questions in FIELD_QUESTIONS.values():
+        texts.extend(questions)
+    return texts
+
+def prewarm():
+    """Synthesize every static prompt so the first call to say it is a cache hit"""
+    from speech import speak
+
+    texts = static_prompts()
+    failed = 0
+    for i, text in enumerate(texts, 1):
+        print(f"[TTS Cache] Pre-warming {i}/{len(texts)}: {text[:50]}")
+        if speak(text) is None:
+            failed += 1
+    print(f"[TTS Cache] Pre-warm finished: {len(texts) - failed} ok, {failed} failed")
+    print(f"[TTS Cache] Stats: {get_audio_cache().stats()}")
+    return failed == 0
+
+if __name__ == "__main__":
+    if "--prewarm" in sys.argv:
+        sys.exit(0 if prewarm() else 1)
+    elif "--stats" in sys.argv:
+        cache = get_audio_cache()
+        print(cache.stats() if cache else "TTS cache is disabled")
+    else:
+        print("Usage: python tts_cache.py --prewarm | --stats")
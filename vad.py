@@ -0,0 +1,143 @@
+# vad.py
+
+import os
+import math
+import time
+from array import array
+from collections import deque
+from dotenv import load_dotenv
+
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30  # Frame length; 10, 20 or 30 ms also suits webrtcvad
+VAD_BACKEND = os.getenv("VAD_BACKEND", "auto").lower()  # auto, webrtc or energy
+VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", "2"))  # webrtcvad mode, 0-3
+VAD_ENERGY_RATIO = float(os.getenv("VAD_ENERGY_RATIO", "3.0"))  # Speech is this many times louder than the noise floor
+VAD_MIN_RMS = float(os.getenv("VAD_MIN_RMS", "300"))  # ...and at least this loud (16-bit samples)
+VAD_START_MS = int(os.getenv("VAD_START_MS", "90"))  # Voiced audio needed to count as speech
+VAD_PRE_ROLL_MS = int(os.getenv("VAD_PRE_ROLL_MS", "300"))  # Audio kept from before speech started
+VAD_SEGMENT_PAUSE_MS = int(os.getenv("VAD_SEGMENT_PAUSE_MS", "250"))  # Pause that closes a segment
+VAD_MIN_SEGMENT_MS = int(os.getenv("VAD_MIN_SEGMENT_MS", "600"))  # Shorter segments wait for more speech
+VAD_END_SILENCE_MS = int(os.getenv("VAD_END_SILENCE_MS", "700"))  # Trailing silence that ends the turn
+
+def frame_rms(frame):
+    """Root mean square of a frame of 16-bit little-endian PCM"""
+    samples = array("h", frame[:len(frame) // 2 * 2])
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+class EnergyVAD:
+    """Loudness against an adaptive noise floor; needs nothing beyond the standard library"""
+
+    def __init__(self, ratio=VAD_ENERGY_RATIO, min_rms=VAD_MIN_RMS):
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.noise_floor = None
+
+    def is_speech(self, frame):
+        rms = frame_rms(frame)
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        speech = rms > max(self.min_rms, self.noise_floor * self.ratio)
+        if not speech:
+            # Track the room's background level between words
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return speech
+
+class WebRTCVAD:
+    """Google's WebRTC voice activity detector, when the webrtcvad package is installed"""
+
+    def __init__(self, sample_rate=VAD_SAMPLE_RATE, aggressiveness=VAD_AGGRESSIVENESS):
+        self.sample_rate = sample_rate
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frame):
+        return self.vad.is_speech(frame, self.sample_rate)
+
+def make_vad(sample_rate=VAD_SAMPLE_RATE):
+    """The detector selected by VAD_BACKEND (auto prefers webrtcvad when installed)"""
+    if VAD_BACKEND == "webrtc" or (VAD_BACKEND == "auto" and webrtcvad is not None):
+        if webrtcvad is None:
+            print("[VAD] webrtcvad is not installed, using the energy detector")
+        else:
+            return WebRTCVAD(sample_rate)
+    return EnergyVAD()
+
+class Endpointer:
+    """
+    Turns a stream of fixed-length frames into turn events. push() returns:
+      "start"   - speech began; pre_roll() holds the frames to keep from before it
+      "segment" - a pause closed a segment that can be transcribed now
+      "end"     - trailing silence (or the length limit) ended the turn
+      "timeout" - no speech began within timeout seconds
+      None      - nothing changed
+    """
+
+    def __init__(self, vad, frame_ms=VAD_FRAME_MS, timeout=None, max_speech=None,
+                 start_ms=VAD_START_MS, pre_roll_ms=VAD_PRE_ROLL_MS, segment_pause_ms=VAD_SEGMENT_PAUSE_MS,
+                 min_segment_ms=VAD_MIN_SEGMENT_MS, end_silence_ms=VAD_END_SILENCE_MS):
+        self.vad = vad
+        self.frame_ms = frame_ms
+        self.timeout_ms = timeout * 1000 if timeout else None
+        self.max_speech_ms = max_speech * 1000 if max_speech else None
+        self.start_ms = start_ms
+        self.segment_pause_ms = max(frame_ms, segment_pause_ms // frame_ms * frame_ms)
+        self.min_segment_ms = min_segment_ms
+        self.end_silence_ms = end_silence_ms
+        self._pre_roll = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+        self.started = False
+        self.waited_ms = 0
+        self.speech_ms = 0  # Since the turn started, pauses included
+        self.voiced_run_ms = 0
+        self.silence_ms = 0
+        self.segment_voiced_ms = 0  # Voiced audio in the open segment
+        self.last_voiced_at = None  # perf_counter() of the last voiced frame
+
+    @property
+    def segment_has_speech(self):
+        return self.segment_voiced_ms > 0
+
+    def pre_roll(self):
+        frames = list(self._pre_roll)
+        self._pre_roll.clear()
+        return frames
+
+    def push(self, frame):
+        voiced = self.vad.is_speech(frame)
+        if voiced:
+            self.last_voiced_at = time.perf_counter()
+
+        if not self.started:
+            self._pre_roll.append(frame)
+            self.waited_ms += self.frame_ms
+            self.voiced_run_ms = self.voiced_run_ms + self.frame_ms if voiced else 0
+            if self.voiced_run_ms >= self.start_ms:
+                self.started = True
+                self.segment_voiced_ms = self.voiced_run_ms
+                return "start"
+            if self.timeout_ms and self.waited_ms >= self.timeout_ms:
+                return "timeout"
+            return None
+
+        self.speech_ms += self.frame_ms
+        if voiced:
+            self.silence_ms = 0
+            self.segment_voiced_ms += self.frame_ms
+        else:
+            self.silence_ms += self.frame_ms
+
+        if self.silence_ms >= self.end_silence_ms or (self.max_speech_ms and self.speech_ms >= self.max_speech_ms):
+            return "end"
+        if self.silence_ms == self.segment_pause_ms and self.segment_voiced_ms >= self.min_segment_ms:
+            self.segment_voiced_ms = 0
+            return "segment"
+        return None